@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot paths and compare against a saved baseline
+"""
+
+import atexit
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+import torch
+from typing import Callable, Dict, Tuple
+from connect4 import Connect4, GameResult, Player
+from connect4_board import Connect4Board
+from dqn_agent import DQNAgent, DQNBot, Connect4Environment
+from opponents import GreedyPolicy, HeuristicPolicy, UniformPolicy, play_games, valid_masks
+from position_stats import PositionStats
+from solver import Position
+from train_dqn import train_dqn
+
+# A fixed 20-move game without a winner, so every move is legal
+OPENING = [1, 4, 4, 1, 2, 4, 3, 5, 4, 0, 4, 0, 6, 3, 2, 4, 1, 1, 6, 3]
+
+def time_per_op(fn: Callable[[], int], min_time: float = 0.2, repeats: int = 5) -> float:
+    """Best seconds per operation; ``fn`` returns how many operations it ran"""
+    # Calibrate the number of calls so each repeat runs for about ``min_time``
+    calls = 1
+    while True:
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            fn()
+        if time.perf_counter() - start_time >= min_time / 4:
+            break
+        calls *= 2
+
+    best = float('inf')
+    for _ in range(repeats):
+        ops = 0
+        start_time = time.perf_counter()
+        for _ in range(calls):
+            ops += fn()
+        best = min(best, (time.perf_counter() - start_time) / ops)
+    return best
+
+def _midgame_game() -> Connect4:
+    game = Connect4()
+    for col in OPENING[:12]:
+        game.make_move(col, game.current_player)
+    return game
+
+def _midgame_board() -> Connect4Board:
+    board = Connect4Board()
+    for col in OPENING[:12]:
+        board.make_move(col)
+    return board
+
+def build_cases() -> Dict[str, Callable[[], int]]:
+    """Benchmark name -> callable returning its operation count"""
+    cases = {}
+
+    game = Connect4()
+    def connect4_make_move():
+        game.reset()
+        for col in OPENING:
+            game.make_move(col, game.current_player)
+        return len(OPENING)
+    cases["connect4.make_move"] = connect4_make_move
+
+    midgame = _midgame_game()
+    cases["connect4.check_winner"] = lambda: (midgame.check_winner(), 1)[1]
+    cases["connect4.get_valid_moves"] = lambda: (midgame.get_valid_moves(), 1)[1]
+
+    board = Connect4Board()
+    def board_make_move():
+        board.reset()
+        for col in OPENING:
+            board.make_move(col)
+        return len(OPENING)
+    cases["board.make_move"] = board_make_move
+
+    midboard = _midgame_board()
+    cases["board.check_winner"] = lambda: (midboard.check_winner(), 1)[1]
+    cases["board.get_valid_actions"] = lambda: (midboard.get_valid_actions(), 1)[1]
+
+    env = Connect4Environment()
+    def env_step():
+        env.reset()
+        for col in OPENING:
+            env.step(col, env.get_current_player())
+        return len(OPENING)
+    cases["env.step"] = env_step
+    cases["env.game_to_state"] = lambda: (env._game_to_state(midgame), 1)[1]
+
+    agent = DQNAgent()
+    agent.epsilon = 0.0
+    state = env._game_to_state(midgame)
+    valid_actions = midgame.get_valid_moves()
+    cases["agent.act"] = lambda: (agent.act(state, valid_actions), 1)[1]
+
+    learner = DQNAgent()
+    rng = np.random.default_rng(0)
+    for _ in range(learner.batch_size * 10):
+        learner.remember(rng.integers(-1, 2, (6, 7)).astype(np.float32), int(rng.integers(7)),
+                         float(rng.choice([0.0, 1.0, -1.0])), rng.integers(-1, 2, (6, 7)).astype(np.float32),
+                         bool(rng.random() < 0.1))
+    cases["agent.replay"] = lambda: (learner.replay(), 1)[1]
+
+    # Sampling throughput of the in-memory deque against the memmap ring buffer
+    replay_states = rng.integers(-1, 2, (4096, 42)).astype(np.float32)
+    replay_actions = rng.integers(0, 7, 4096)
+    replay_rewards = rng.choice([0.0, 1.0, -1.0], 4096).astype(np.float32)
+    replay_dones = rng.random(4096) < 0.1
+    in_memory = DQNAgent(memory_size=4096, batch_size=64)
+    for i in range(4096):
+        in_memory.remember(replay_states[i].reshape(6, 7), int(replay_actions[i]), float(replay_rewards[i]),
+                           replay_states[i - 1].reshape(6, 7), bool(replay_dones[i]))
+    cases["replay.sample[memory]"] = lambda: (in_memory.sample_batch(), 64)[1]
+    replay_dir = tempfile.mkdtemp()
+    atexit.register(shutil.rmtree, replay_dir, True)
+    on_disk = DQNAgent(memory_size=4096, batch_size=64, replay_backend="memmap",
+                       replay_path=os.path.join(replay_dir, "replay.c4r"))
+    on_disk.memory.extend(replay_states, replay_actions, replay_rewards, np.roll(replay_states, 1, axis=0),
+                          replay_dones)
+    cases["replay.sample[memmap]"] = lambda: (on_disk.sample_batch(), 64)[1]
+    cases["replay.append[memmap]"] = lambda: (on_disk.remember(state, 3, 0.0, state, False), 1)[1]
+
+    bot = DQNBot(agent)
+    cases["bot.get_move"] = lambda: (bot.get_move(midgame), 1)[1]
+    for batch_size in (8, 32, 128):
+        games = [midgame] * batch_size
+        cases[f"bot.get_moves[{batch_size}]"] = lambda games=games: (bot.get_moves(games), len(games))[1]
+
+    selfplay_env = Connect4Environment()
+    agents = {Player.HUMAN: DQNAgent(epsilon=0.1), Player.BOT: DQNAgent(epsilon=0.1)}
+    def selfplay_episode():
+        state = selfplay_env.reset()
+        done = False
+        while not done and selfplay_env.get_valid_actions():
+            player = selfplay_env.get_current_player()
+            action = agents[player].act(state, selfplay_env.get_valid_actions())
+            next_state, reward, done, _ = selfplay_env.step(action, player)
+            agents[player].remember(state, action, reward, next_state, done)
+            state = next_state
+        return 1
+    cases["selfplay.episode"] = selfplay_episode
+
+    batch_boards = np.stack([env._game_to_state(midgame)] * 256)
+    batch_masks = valid_masks(batch_boards)
+    for name, policy in (("uniform", UniformPolicy(0)), ("greedy", GreedyPolicy(seed=0)),
+                         ("heuristic", HeuristicPolicy(seed=0))):
+        cases[f"opponents.{name}[256]"] = lambda policy=policy: (policy(batch_boards, batch_masks), 256)[1]
+    uniform = UniformPolicy(0)
+    cases["opponents.play_games[256]"] = lambda: (play_games(uniform, uniform, 256), 256)[1]
+
+    # Visits per second into a warm table, which mostly hits existing entries
+    stats_outcomes, stats_moves = play_games(UniformPolicy(0), UniformPolicy(1), 1000, return_moves=True)
+    stats = PositionStats()
+    stats.add_games(stats_moves, stats_outcomes)
+    stats_visits = int((stats_moves >= 0).sum()) + len(stats_moves)
+    cases["stats.add_games[1000]"] = lambda: (stats.add_games(stats_moves, stats_outcomes), stats_visits)[1]
+
+    return cases
+
+COMPILED_MODES = {
+    "eager": dict(),
+    "script": dict(compile_mode="script"),
+    "compile": dict(compile_mode="compile"),
+    "eager+bf16": dict(bf16=True),
+    "compile+bf16": dict(compile_mode="compile", bf16=True),
+}
+
+def compiled_speedups(batch_sizes=(32, 128, 512), modes=tuple(COMPILED_MODES), min_time: float = 0.2) -> dict:
+    """Learner step and inference time per mode and batch size, with speedup over eager"""
+    rng = np.random.default_rng(0)
+    states = rng.integers(-1, 2, (2048, 6, 7)).astype(np.float32)
+    results = {}
+    for batch_size in batch_sizes:
+        for mode in modes:
+            torch.manual_seed(0)
+            # Compiled and bf16 agents warm up while they are built
+            start_time = time.perf_counter()
+            agent = DQNAgent(batch_size=batch_size, memory_size=2048, **COMPILED_MODES[mode])
+            agent.warm_up((batch_size,))
+            warm_up = time.perf_counter() - start_time
+            for i in range(len(states)):
+                agent.remember(states[i], int(rng.integers(7)), float(rng.choice([0.0, 1.0, -1.0])),
+                               states[i - 1], bool(rng.random() < 0.1))
+            inputs = torch.from_numpy(states[:batch_size].reshape(batch_size, -1))
+            results[(mode, batch_size)] = {
+                "replay_us": time_per_op(lambda: (agent.replay(decay_epsilon=False), 1)[1], min_time) * 1e6,
+                "inference_us": time_per_op(lambda: (agent.predict(inputs), 1)[1], min_time) * 1e6,
+                "warm_up_s": warm_up,
+            }
+
+    print(f"{'mode':14s} {'batch':>5s} {'replay us':>11s} {'speedup':>8s} {'infer us':>10s} {'speedup':>8s} {'warm-up':>8s}")
+    for (mode, batch_size), result in results.items():
+        eager = results.get(("eager", batch_size), result)
+        print(f"{mode:14s} {batch_size:5d} {result['replay_us']:11.1f} "
+              f"{eager['replay_us'] / result['replay_us']:7.2f}x {result['inference_us']:10.1f} "
+              f"{eager['inference_us'] / result['inference_us']:7.2f}x {result['warm_up_s']:7.1f}s")
+    return results
+
+BOARD_SIZES = {"7x6": (6, 7), "8x7": (7, 8), "9x7": (7, 9)}
+
+def _scaling_opening(rows: int, cols: int, moves: int):
+    """A deterministic opening without a winner, stepping three columns at a time"""
+    game = Connect4(rows, cols)
+    opening = []
+    col = 0
+    while len(opening) < moves:
+        for offset in range(cols):
+            trial = game.copy()
+            candidate = (col + offset) % cols
+            if trial.is_valid_move(candidate):
+                trial.make_move(candidate, trial.current_player)
+                if trial.check_winner() == GameResult.ONGOING:
+                    break
+        else:
+            raise ValueError(f"no quiet {moves}-move opening on {rows}x{cols}")
+        game = trial
+        opening.append(candidate)
+        col = (candidate + 3) % cols
+    return opening
+
+def board_scaling(sizes=tuple(BOARD_SIZES), episodes: int = 20, min_time: float = 0.2) -> dict:
+    """Move generation, win detection and training throughput per board size"""
+    results = {}
+    for size in sizes:
+        rows, cols = BOARD_SIZES[size]
+        opening = _scaling_opening(rows, cols, rows * cols // 2)
+        game, board, position = Connect4(rows, cols), Connect4Board(rows, cols), Position(rows, cols)
+        for col in opening:
+            game.make_move(col, game.current_player)
+            board.make_move(col)
+            position.play(col)
+
+        torch.manual_seed(0)
+        agent = DQNAgent(rows=rows, cols=cols, batch_size=32, memory_size=4096)
+        rng = np.random.default_rng(0)
+        for _ in range(1024):
+            agent.remember(rng.integers(-1, 2, (rows, cols)).astype(np.float32), int(rng.integers(cols)),
+                           float(rng.choice([0.0, 1.0, -1.0])),
+                           rng.integers(-1, 2, (rows, cols)).astype(np.float32), bool(rng.random() < 0.1))
+
+        start_time = time.perf_counter()
+        train_dqn(episodes=episodes, save_freq=0, rows=rows, cols=cols, agent_kwargs=dict(batch_size=32))
+        train_seconds = time.perf_counter() - start_time
+
+        results[size] = {
+            "connect4.get_valid_moves_us": time_per_op(lambda: (game.get_valid_moves(), 1)[1], min_time) * 1e6,
+            "connect4.check_winner_us": time_per_op(lambda: (game.check_winner(), 1)[1], min_time) * 1e6,
+            "board.check_winner_us": time_per_op(lambda: (board.check_winner(), 1)[1], min_time) * 1e6,
+            "position.possible_us": time_per_op(lambda: (position.possible(), 1)[1], min_time) * 1e6,
+            "position.winning_position_us":
+                time_per_op(lambda: (position.winning_position(), 1)[1], min_time) * 1e6,
+            "replay_steps_per_sec":
+                1.0 / time_per_op(lambda: (agent.replay(decay_epsilon=False), 1)[1], min_time),
+            "episodes_per_sec": episodes / train_seconds,
+        }
+
+    names = list(next(iter(results.values())))
+    print(f"\n{'metric':30s}" + "".join(f"{size:>12s}" for size in results))
+    for name in names:
+        print(f"{name:30s}" + "".join(f"{result[name]:12.2f}" for result in results.values()))
+    return results
+
+def run_benchmarks(filter_text: str = "", min_time: float = 0.2) -> Dict[str, dict]:
+    random.seed(0)
+    np.random.seed(0)
+    torch.manual_seed(0)
+
+    results = {}
+    for name, fn in build_cases().items():
+        if filter_text and filter_text not in name:
+            continue
+        seconds = time_per_op(fn, min_time)
+        results[name] = {"us_per_op": seconds * 1e6, "ops_per_sec": 1.0 / seconds}
+        print(f"{name:28s} {seconds * 1e6:12.2f} us/op {1.0 / seconds:14.1f} ops/s")
+    return results
+
+def environment_info() -> dict:
+    return {"python": platform.python_version(), "platform": platform.platform(),
+            "numpy": np.__version__, "torch": torch.__version__,
+            "threads": torch.get_num_threads()}
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> Tuple[list, list]:
+    """Names slower (and faster) than the baseline by more than ``threshold``"""
+    slower, faster = [], []
+    print(f"\n{'benchmark':28s} {'baseline':>12s} {'current':>12s} {'change':>8s}")
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        old, new = baseline[name]["us_per_op"], result["us_per_op"]
+        change = new / old - 1.0
+        flag = ""
+        if change > threshold:
+            slower.append(name)
+            flag = "  ❌ slower"
+        elif change < -threshold:
+            faster.append(name)
+            flag = "  ✅ faster"
+        print(f"{name:28s} {old:12.2f} {new:12.2f} {change:+8.1%}{flag}")
+    return slower, faster
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark Connect 4 hot paths")
+    parser.add_argument("--save", type=str, default=None, help="Write results to this JSON baseline file")
+    parser.add_argument("--compare", type=str, default=None, help="Compare against this JSON baseline file")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Relative slowdown flagged as a regression")
+    parser.add_argument("--filter", type=str, default="", help="Only run benchmarks whose name contains this")
+    parser.add_argument("--min-time", type=float, default=0.2, help="Seconds per timing repeat")
+    parser.add_argument("--compiled", action="store_true",
+                        help="Compare eager, TorchScript, torch.compile and bf16 across batch sizes instead")
+    parser.add_argument("--board-scaling", action="store_true",
+                        help="Compare move generation, win detection and training on 7x6, 8x7 and 9x7 instead")
+
+    args = parser.parse_args()
+
+    if args.compiled:
+        compiled_speedups(min_time=args.min_time)
+        sys.exit(0)
+    if args.board_scaling:
+        board_scaling(min_time=args.min_time)
+        sys.exit(0)
+
+    results = run_benchmarks(args.filter, args.min_time)
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"environment": environment_info(), "results": results}, f, indent=2)
+        print(f"\n✅ Baseline saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        slower, faster = compare(results, baseline["results"], args.threshold)
+        if baseline.get("environment") != environment_info():
+            print("⚠️  Baseline was recorded in a different environment")
+        if slower:
+            print(f"\n❌ {len(slower)} regression(s) beyond {args.threshold:.0%}: {', '.join(slower)}")
+            sys.exit(1)
+        print(f"\n✅ No regressions beyond {args.threshold:.0%}")
@@ -1,5 +1,4 @@
 import random
-import os
 from typing import List, Optional, Tuple
 from enum import Enum
 
@@ -38,26 +37,28 @@ class Connect4:
         self.current_player = Player.HUMAN
         
     def display_board(self):
-        os.system('clear' if os.name == 'posix' else 'cls')
-        
-        print(f"\n{Colors.CYAN}{Colors.BOLD}┌{'─' * (self.cols * 4 - 1)}┐{Colors.END}")
-        print(f"{Colors.CYAN}│{Colors.END}", end="")
-        for i in range(1, self.cols + 1):
-            print(f"{Colors.WHITE}{Colors.BOLD} {i} {Colors.END}", end="")
-        print(f"{Colors.CYAN}│{Colors.END}")
-        print(f"{Colors.CYAN}├{'─' * (self.cols * 4 - 1)}┤{Colors.END}")
-        
+        # One write per frame; ANSI clear instead of spawning `clear`
+        print("\033[2J\033[H" + "\n".join(self.board_lines()), flush=True)
+    
+    @staticmethod
+    def cell_string(cell: Player) -> str:
+        if cell == Player.EMPTY:
+            return f"{Colors.BACKGROUND_BLUE} ⚪ {Colors.END}"
+        elif cell == Player.HUMAN:
+            return f"{Colors.BACKGROUND_BLUE}{Colors.BLUE}{Colors.BOLD} 🔵 {Colors.END}"
+        return f"{Colors.BACKGROUND_BLUE}{Colors.RED}{Colors.BOLD} 🔴 {Colors.END}"
+    
+    def board_lines(self) -> List[str]:
+        """Lines of the framed board, starting with a blank line"""
+        lines = ["", f"{Colors.CYAN}{Colors.BOLD}┌{'─' * (self.cols * 4 - 1)}┐{Colors.END}"]
+        numbers = "".join(f"{Colors.WHITE}{Colors.BOLD} {i} {Colors.END}" for i in range(1, self.cols + 1))
+        lines.append(f"{Colors.CYAN}│{Colors.END}{numbers}{Colors.CYAN}│{Colors.END}")
+        lines.append(f"{Colors.CYAN}├{'─' * (self.cols * 4 - 1)}┤{Colors.END}")
         for row in self.board:
-            print(f"{Colors.CYAN}│{Colors.END}", end="")
-            for cell in row:
-                if cell == Player.EMPTY:
-                    print(f"{Colors.BACKGROUND_BLUE} ⚪ {Colors.END}", end="")
-                elif cell == Player.HUMAN:
-                    print(f"{Colors.BACKGROUND_BLUE}{Colors.BLUE}{Colors.BOLD} 🔵 {Colors.END}", end="")
-                else:
-                    print(f"{Colors.BACKGROUND_BLUE}{Colors.RED}{Colors.BOLD} 🔴 {Colors.END}", end="")
-            print(f"{Colors.CYAN}│{Colors.END}")
-        print(f"{Colors.CYAN}└{'─' * (self.cols * 4 - 1)}┘{Colors.END}")
+            cells = "".join(self.cell_string(cell) for cell in row)
+            lines.append(f"{Colors.CYAN}│{Colors.END}{cells}{Colors.CYAN}│{Colors.END}")
+        lines.append(f"{Colors.CYAN}└{'─' * (self.cols * 4 - 1)}┘{Colors.END}")
+        return lines
     
     def is_valid_move(self, col: int) -> bool:
         return 0 <= col < self.cols and self.board[0][col] == Player.EMPTY
@@ -77,6 +78,15 @@ class Connect4:
                 return True
         return False
     
+    def undo_move(self, col: int) -> bool:
+        """Remove the top piece of a column and give the turn back"""
+        for row in range(self.rows):
+            if self.board[row][col] != Player.EMPTY:
+                self.board[row][col] = Player.EMPTY
+                self.current_player = Player.BOT if self.current_player == Player.HUMAN else Player.HUMAN
+                return True
+        return False
+    
     def check_winner(self) -> GameResult:
         for row in range(self.rows):
             for col in range(self.cols):
@@ -116,6 +126,12 @@ class Connect4:
     def reset(self):
         self.board = [[Player.EMPTY for _ in range(self.cols)] for _ in range(self.rows)]
         self.current_player = Player.HUMAN
+    
+    def copy(self):
+        new_game = Connect4(self.rows, self.cols)
+        new_game.board = [row[:] for row in self.board]
+        new_game.current_player = self.current_player
+        return new_game
 
 class RandomBot:
     def get_move(self, game: Connect4) -> int:
@@ -135,9 +151,21 @@ def get_human_move(game: Connect4) -> int:
         except ValueError:
             print("Please enter a valid number.")
 
-def play_game(mode: str = "pvp", dqn_bot=None):
+def play_game(mode: str = "pvp", dqn_bot=None, deadline_ms: Optional[float] = None, ponder: bool = True):
     """Play a game of Connect 4"""
-    game = Connect4()
+    # Play on the board the agent was trained for
+    game = Connect4(dqn_bot.agent.rows, dqn_bot.agent.cols) if dqn_bot is not None else Connect4()
+    
+    if deadline_ms is not None and dqn_bot is not None:
+        # Search with the DQN as a guide until the deadline instead of one forward pass
+        from timed_bot import anytime_bot
+        dqn_bot = anytime_bot(dqn_bot.agent, deadline_ms)
+    
+    ponder = ponder and mode == "pve" and dqn_bot is not None
+    if ponder:
+        # Think about replies while waiting for the human
+        from pondering import PonderingBot
+        dqn_bot = PonderingBot(dqn_bot)
     
     if mode == "pvp":
         print("Player 1: 🔵 (Blue) | Player 2: 🔴 (Red)")
@@ -155,6 +183,8 @@ def play_game(mode: str = "pvp", dqn_bot=None):
                 move = get_human_move(game)
             elif mode == "pve":
                 print(f"\n🔵 Your turn")
+                if ponder:
+                    dqn_bot.start_pondering(game)
                 move = get_human_move(game)
             else:  # eve
                 move = dqn_bot.get_move(game)
@@ -174,6 +204,9 @@ def play_game(mode: str = "pvp", dqn_bot=None):
         
         result = game.check_winner()
         if result != GameResult.ONGOING:
+            if ponder:
+                # The human's last move may have ended the game while the bot was pondering
+                dqn_bot.stop_pondering()
             game.display_board()
             if result == GameResult.PLAYER1_WIN:
                 if mode == "pvp":
@@ -191,9 +224,11 @@ def play_game(mode: str = "pvp", dqn_bot=None):
                     print(f"\n🏆 DQN Agent 2 (🔴) wins!")
             else:
                 print(f"\n🤝 It's a draw!")
+            if hasattr(dqn_bot, "histogram"):
+                print(f"⏱️  Bot latency: {dqn_bot.histogram.summary()}")
             break
 
-def main():
+def main(deadline_ms: Optional[float] = None):
     # Try to load DQN bot if available
     dqn_bot = None
     try:
@@ -219,12 +254,12 @@ def main():
                 play_game("pvp")
             elif choice == "2":
                 if dqn_bot:
-                    play_game("pve", dqn_bot)
+                    play_game("pve", dqn_bot, deadline_ms)
                 else:
                     print("❌ DQN agent not available!")
             elif choice == "3":
                 if dqn_bot:
-                    play_game("eve", dqn_bot)
+                    play_game("eve", dqn_bot, deadline_ms)
                 else:
                     print("❌ DQN agent not available!")
             elif choice == "4":
@@ -240,4 +275,10 @@ def main():
             print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    import argparse
+    
+    parser = argparse.ArgumentParser(description="Play Connect 4")
+    parser.add_argument("--deadline-ms", type=float, default=None, help="Bot thinking time per move (enables search)")
+    
+    args = parser.parse_args()
+    main(args.deadline_ms) 
\ No newline at end of file
@@ -27,6 +27,15 @@ class Connect4Board:
         self.current_player = 3 - self.current_player
         return True
     
+    def undo_move(self, col: int) -> bool:
+        """Remove the top piece of a column and give the turn back"""
+        for row in range(self.rows):
+            if self.board[row][col] != 0:
+                self.board[row][col] = 0
+                self.current_player = 3 - self.current_player
+                return True
+        return False
+    
     def check_winner(self) -> int:
         # Check horizontal
         for row in range(self.rows):
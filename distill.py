@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Distill a trained DQN into a smaller student network
+
+The student regresses the teacher's Q-values on positions from recorded
+games, a replay file or the teacher's own exploratory self-play, and is
+saved in the usual checkpoint format (with its hidden size) so DQNBot can
+load it like any other agent.
+"""
+
+import random
+import time
+from typing import Optional, Tuple
+import numpy as np
+import torch
+import torch.nn.functional as F
+from connect4 import Connect4, GameResult, Player
+from dqn_agent import DQNAgent, DQNBot, Connect4Environment
+from generate_dataset import load_games
+from replay_storage import MemmapReplayBuffer
+from solver import Position
+
+def positions_from_games(path: str, rows: int = 6, cols: int = 7) -> np.ndarray:
+    """Every non-terminal prefix of the recorded games as flat states"""
+    states = []
+    for record in load_games(path):
+        position = Position(rows, cols)
+        states.append(position.to_state().flatten())
+        for char in record:
+            col = int(char) - 1
+            if not position.can_play(col) or position.is_winning_move(col):
+                break
+            position.play(col)
+            states.append(position.to_state().flatten())
+    return np.array(states, dtype=np.float32)
+
+def positions_from_replay(path: str, rows: int = 6, cols: int = 7) -> np.ndarray:
+    buffer = MemmapReplayBuffer.open(path, cols)
+    if buffer.rows != rows:
+        raise ValueError(f"{path} holds {buffer.rows}x{buffer.cols} boards, not {rows}x{cols}")
+    states, _, _, next_states, dones = buffer.sample(len(buffer))
+    buffer.close()
+    return np.concatenate([states, next_states[~dones]])
+
+def positions_from_self_play(agent: DQNAgent, games: int, epsilon: float = 0.3) -> np.ndarray:
+    """States visited by the teacher playing itself with exploration"""
+    env = Connect4Environment(rows=agent.rows, cols=agent.cols)
+    saved_epsilon, agent.epsilon = agent.epsilon, epsilon
+    states = []
+    with torch.no_grad():
+        for _ in range(games):
+            state = env.reset()
+            done = False
+            while not done and env.get_valid_actions():
+                states.append(state.flatten())
+                state, _, done, _ = env.step(agent.act(state, env.get_valid_actions()), env.get_current_player())
+    agent.epsilon = saved_epsilon
+    return np.array(states, dtype=np.float32)
+
+def train_student(teacher: DQNAgent, states: np.ndarray, hidden_size: int = 64, epochs: int = 20,
+                  batch_size: int = 256, lr: float = 1e-3, seed: int = 0) -> DQNAgent:
+    """Fit a student's Q-values to the teacher's with an MSE loss"""
+    torch.manual_seed(seed)
+    student = DQNAgent(hidden_size=hidden_size, lr=lr, epsilon=0.0, rows=teacher.rows, cols=teacher.cols)
+    inputs = torch.from_numpy(states).to(student.device)
+    with torch.no_grad():
+        targets = teacher.q_network(inputs)
+
+    generator = torch.Generator().manual_seed(seed)
+    for epoch in range(1, epochs + 1):
+        order = torch.randperm(len(inputs), generator=generator)
+        total = 0.0
+        for start in range(0, len(inputs), batch_size):
+            batch = order[start:start + batch_size]
+            loss = F.mse_loss(student.q_network(inputs[batch]), targets[batch])
+            student.optimizer.zero_grad()
+            loss.backward()
+            student.optimizer.step()
+            total += loss.item() * len(batch)
+        if epoch == 1 or epoch % 5 == 0 or epoch == epochs:
+            print(f"Epoch {epoch}/{epochs}: loss {total / len(inputs):.5f}")
+    student.update_target_network()
+    return student
+
+def move_agreement(teacher: DQNAgent, student: DQNAgent, states: np.ndarray) -> float:
+    """Fraction of positions where both pick the same legal move"""
+    inputs = torch.from_numpy(states)
+    with torch.no_grad():
+        teacher_q = teacher.q_network(inputs.to(teacher.device)).cpu().numpy()
+        student_q = student.q_network(inputs.to(student.device)).cpu().numpy()
+    valid = states.reshape(len(states), teacher.rows, teacher.cols)[:, 0, :] == 0
+    teacher_moves = np.argmax(np.where(valid, teacher_q, -np.inf), axis=1)
+    student_moves = np.argmax(np.where(valid, student_q, -np.inf), axis=1)
+    return float(np.mean(teacher_moves == student_moves))
+
+def play_match(student: DQNAgent, teacher: DQNAgent, games: int = 100, random_moves: int = 2,
+               seed: int = 0) -> Tuple[int, int, int]:
+    """(student wins, teacher wins, draws); openings start with a few random moves"""
+    rng = random.Random(seed)
+    bots = {"student": DQNBot(student), "teacher": DQNBot(teacher)}
+    results = {"student": 0, "teacher": 0, "draw": 0}
+    with torch.no_grad():
+        for game_index in range(games):
+            players = {Player.HUMAN: "student", Player.BOT: "teacher"}
+            if game_index % 2:
+                players = {Player.HUMAN: "teacher", Player.BOT: "student"}
+            game = Connect4(teacher.rows, teacher.cols)
+            moves = 0
+            while game.check_winner() == GameResult.ONGOING:
+                if moves < random_moves:
+                    col = rng.choice(game.get_valid_moves())
+                else:
+                    col = bots[players[game.current_player]].get_move(game)
+                game.make_move(col, game.current_player)
+                moves += 1
+            winner = game.check_winner()
+            if winner == GameResult.DRAW:
+                results["draw"] += 1
+            else:
+                results[players[Player.HUMAN if winner == GameResult.PLAYER1_WIN else Player.BOT]] += 1
+    return results["student"], results["teacher"], results["draw"]
+
+def inference_latency_us(agent: DQNAgent, repeats: int = 2000) -> float:
+    """Mean microseconds per single-position forward pass"""
+    state = torch.zeros(1, agent.state_size, device=agent.device)
+    with torch.no_grad():
+        for _ in range(50):
+            agent.q_network(state)
+        start_time = time.perf_counter()
+        for _ in range(repeats):
+            agent.q_network(state)
+    return (time.perf_counter() - start_time) / repeats * 1e6
+
+def parameter_bytes(agent: DQNAgent) -> int:
+    return sum(p.numel() * p.element_size() for p in agent.q_network.parameters())
+
+def distill(teacher_path: str, output_path: str, hidden_size: int = 64, games_path: Optional[str] = None,
+            replay_path: Optional[str] = None, self_play_games: int = 2000,
+            epochs: int = 20, match_games: int = 100, seed: int = 0) -> dict:
+    random.seed(seed)
+    np.random.seed(seed)
+    teacher = DQNAgent()
+    teacher.load(teacher_path)
+    teacher.epsilon = 0.0
+
+    if games_path:
+        states = positions_from_games(games_path, teacher.rows, teacher.cols)
+    elif replay_path:
+        states = positions_from_replay(replay_path, teacher.rows, teacher.cols)
+    else:
+        states = positions_from_self_play(teacher, self_play_games)
+    states = np.unique(states, axis=0)
+    np.random.default_rng(seed).shuffle(states)
+    held_out = max(1, len(states) // 10)
+    train_states, test_states = states[held_out:], states[:held_out]
+    print(f"Distilling on {len(train_states)} positions ({len(test_states)} held out)")
+
+    student = train_student(teacher, train_states, hidden_size, epochs, seed=seed)
+    student.save(output_path)
+
+    wins, losses, draws = play_match(student, teacher, match_games, seed=seed)
+    report = {
+        "agreement": move_agreement(teacher, student, test_states),
+        "student_wins": wins, "teacher_wins": losses, "draws": draws,
+        "teacher_latency_us": inference_latency_us(teacher),
+        "student_latency_us": inference_latency_us(student),
+        "teacher_bytes": parameter_bytes(teacher),
+        "student_bytes": parameter_bytes(student),
+    }
+    print(f"\n✅ Student saved to {output_path}")
+    print(f"Move agreement (held out): {report['agreement']:.1%}")
+    print(f"Student vs teacher: {wins} wins, {losses} losses, {draws} draws "
+          f"({wins / max(match_games, 1):.1%} win rate)")
+    print(f"Latency: {report['teacher_latency_us']:.1f}us -> {report['student_latency_us']:.1f}us "
+          f"({report['teacher_latency_us'] / report['student_latency_us']:.1f}x faster)")
+    print(f"Parameters: {report['teacher_bytes'] / 1024:.0f}KB -> {report['student_bytes'] / 1024:.0f}KB "
+          f"({report['teacher_bytes'] / report['student_bytes']:.0f}x smaller)")
+    return report
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distill a DQN into a smaller student")
+    parser.add_argument("--teacher", type=str, default="dqn_connect4.pth", help="Teacher checkpoint")
+    parser.add_argument("--output", type=str, default="dqn_student.pth", help="Student checkpoint")
+    parser.add_argument("--hidden-size", type=int, default=64, help="Student hidden layer width")
+    parser.add_argument("--games", type=str, default=None, help="Recorded games file for positions")
+    parser.add_argument("--replay", type=str, default=None, help="Memmap replay file for positions")
+    parser.add_argument("--self-play-games", type=int, default=2000, help="Teacher games when no other source")
+    parser.add_argument("--epochs", type=int, default=20, help="Training epochs")
+    parser.add_argument("--match-games", type=int, default=100, help="Games of student vs teacher")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    distill(args.teacher, args.output, args.hidden_size, args.games, args.replay,
+            args.self_play_games, args.epochs, args.match_games, args.seed)
@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+Distributed self-play: actor processes feed one learner over TCP
+
+Actors play train_dqn-style self-play episodes with local copies of both
+networks and stream transitions to the learner, which trains the two
+agents and broadcasts versioned weights back.
+
+Frames are a 5-byte header (type, payload length) followed by the payload.
+Transition batches are packed WIRE_DTYPE records (39 bytes each). Every
+batch is acknowledged once the learner has queued it. Actors start with a
+fixed number of credits and spend one per batch, so a slow learner holds
+them back. Unacknowledged batches are resent after a reconnect.
+"""
+
+import io
+import multiprocessing
+import queue
+import socket
+import struct
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import torch
+from connect4 import GameResult, Player
+from dqn_agent import DQNAgent, Connect4Environment
+from episodes import EpisodeBuffer
+from replay_storage import RECORD_DTYPE, encode_states, decode_states
+
+FRAME = struct.Struct("<BI")  # frame type, payload length
+HELLO, TRANSITIONS, ACK, WEIGHTS, STOP = range(1, 6)
+HELLO_BODY = struct.Struct("<Iq")  # actor id, weights version the actor holds
+BATCH_HEADER = struct.Struct("<II")  # episodes, records
+ACK_BODY = struct.Struct("<Iq")  # credits granted, latest weights version
+# Seat 0 transitions train player 1's agent, seat 1 player 2's
+WIRE_DTYPE = np.dtype([("seat", "u1")] + RECORD_DTYPE.descr)
+
+def send_frame(sock: socket.socket, frame_type: int, payload: bytes = b""):
+    sock.sendall(FRAME.pack(frame_type, len(payload)) + payload)
+
+def _recv_exact(sock: socket.socket, size: int) -> bytes:
+    data = bytearray()
+    while len(data) < size:
+        chunk = sock.recv(size - len(data))
+        if not chunk:
+            raise ConnectionError("connection closed")
+        data += chunk
+    return bytes(data)
+
+def recv_frame(sock: socket.socket) -> Tuple[int, bytes]:
+    frame_type, length = FRAME.unpack(_recv_exact(sock, FRAME.size))
+    return frame_type, _recv_exact(sock, length)
+
+def pack_transitions(episodes: int, seats, states, actions, rewards, next_states, dones) -> bytes:
+    records = np.empty(len(actions), dtype=WIRE_DTYPE)
+    records["seat"] = seats
+    records["state"] = encode_states(states)
+    records["next_state"] = encode_states(next_states)
+    records["action"] = actions
+    records["done"] = dones
+    records["reward"] = rewards
+    return BATCH_HEADER.pack(episodes, len(records)) + records.tobytes()
+
+def unpack_transitions(payload: bytes) -> Tuple[int, np.ndarray]:
+    episodes, count = BATCH_HEADER.unpack_from(payload)
+    return episodes, np.frombuffer(payload, dtype=WIRE_DTYPE, count=count, offset=BATCH_HEADER.size)
+
+class ActorStats:
+    """Throughput of one actor as seen by the learner"""
+
+    def __init__(self):
+        self.episodes = 0
+        self.transitions = 0
+        self.connections = 0
+        self.first_seen = time.perf_counter()
+
+    def episodes_per_sec(self) -> float:
+        return self.episodes / max(time.perf_counter() - self.first_seen, 1e-9)
+
+class Learner:
+    """Accepts actor connections, trains on their transitions and publishes weights"""
+
+    def __init__(self, agents: Optional[Tuple[DQNAgent, DQNAgent]] = None, host: str = "127.0.0.1",
+                 port: int = 0, credits: int = 4, max_queue: int = 16, broadcast_every: int = 8,
+                 target_update_freq: int = 100, rows: int = 6, cols: int = 7):
+        self.agents = agents or (DQNAgent(rows=rows, cols=cols), DQNAgent(rows=rows, cols=cols))
+        self.credits = credits
+        self.broadcast_every = broadcast_every
+        self.target_update_freq = target_update_freq
+        self.queue: queue.Queue = queue.Queue(maxsize=max_queue)
+        self.actor_stats: Dict[int, ActorStats] = {}
+        self.episodes = 0
+        self.version = 0
+        self._weights = self._serialize()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+        self._server = socket.create_server((host, port))
+        self.address = self._server.getsockname()[:2]
+        self._threads: List[threading.Thread] = []
+
+    def start(self):
+        thread = threading.Thread(target=self._accept_loop, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _serialize(self) -> bytes:
+        buffer = io.BytesIO()
+        torch.save({"agent1": self.agents[0].q_network.state_dict(),
+                    "agent2": self.agents[1].q_network.state_dict()}, buffer)
+        return struct.pack("<q", self.version) + buffer.getvalue()
+
+    def _publish(self):
+        self.version += 1
+        weights = self._serialize()
+        with self._lock:
+            self._weights = weights
+
+    def _accept_loop(self):
+        while not self._stopping.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except OSError:
+                return
+            thread = threading.Thread(target=self._serve_actor, args=(conn,), daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _send_weights_if_stale(self, conn: socket.socket, actor_version: int) -> int:
+        with self._lock:
+            weights = self._weights
+        version = struct.unpack_from("<q", weights)[0]
+        if actor_version != version:
+            send_frame(conn, WEIGHTS, weights)
+        return version
+
+    def _serve_actor(self, conn: socket.socket):
+        try:
+            frame_type, payload = recv_frame(conn)
+            if frame_type != HELLO:
+                return
+            actor_id, actor_version = HELLO_BODY.unpack(payload)
+            stats = self.actor_stats.setdefault(actor_id, ActorStats())
+            stats.connections += 1
+            actor_version = self._send_weights_if_stale(conn, actor_version)
+            send_frame(conn, ACK, ACK_BODY.pack(self.credits, actor_version))
+
+            while True:
+                frame_type, payload = recv_frame(conn)
+                if frame_type != TRANSITIONS:
+                    return
+                episodes, records = unpack_transitions(payload)
+                # Blocks while the learner is behind, which withholds the actor's next credit
+                while not self._stopping.is_set():
+                    try:
+                        self.queue.put((actor_id, episodes, records), timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if self._stopping.is_set():
+                    send_frame(conn, STOP)
+                    return
+                stats.episodes += episodes
+                stats.transitions += len(records)
+                actor_version = self._send_weights_if_stale(conn, actor_version)
+                send_frame(conn, ACK, ACK_BODY.pack(1, actor_version))
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+
+    def _store(self, agent: DQNAgent, records: np.ndarray):
+        cells = agent.state_size
+        states = decode_states(records["state"], cells)
+        next_states = decode_states(records["next_state"], cells)
+        agent.remember_batch(states, records["action"], records["reward"], next_states, records["done"])
+
+    def run(self, total_episodes: int, report_every: float = 10.0):
+        """Train until ``total_episodes`` episodes have arrived from the actors"""
+        next_report = time.perf_counter() + report_every
+        while self.episodes < total_episodes:
+            try:
+                _, episodes, records = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            for seat, agent in enumerate(self.agents):
+                self._store(agent, records[records["seat"] == seat])
+
+            # One replay per agent and episode, like train_dqn
+            for _ in range(episodes):
+                self.episodes += 1
+                for agent in self.agents:
+                    agent.replay()
+                if self.episodes % self.target_update_freq == 0:
+                    for agent in self.agents:
+                        agent.update_target_network()
+                if self.episodes % self.broadcast_every == 0:
+                    self._publish()
+
+            if time.perf_counter() >= next_report:
+                next_report += report_every
+                print(self.report())
+
+    def report(self) -> str:
+        lines = [f"Episodes {self.episodes}, weights v{self.version}, "
+                 f"{sum(s.episodes_per_sec() for s in self.actor_stats.values()):.1f} episodes/s total"]
+        for actor_id, stats in sorted(self.actor_stats.items()):
+            lines.append(f"  actor {actor_id}: {stats.episodes} episodes, {stats.episodes_per_sec():.1f}/s, "
+                         f"{stats.connections} connection(s)")
+        return "\n".join(lines)
+
+    def stop(self):
+        self._stopping.set()
+        self._server.close()
+
+def play_episode(env: Connect4Environment, agents: Tuple[DQNAgent, DQNAgent], transitions: list):
+    """One self-play episode; appends (seat, state, action, reward, next_state, done) tuples
+
+    Transitions are built per seat by EpisodeBuffer as in train_dqn, so both
+    players' last moves carry the outcome.
+    """
+    episode = EpisodeBuffer()
+    state = env.reset()
+    done = False
+    while not done and env.get_valid_actions():
+        player = env.get_current_player()
+        seat = 0 if player == Player.HUMAN else 1
+        action = agents[seat].act(state, env.get_valid_actions())
+        next_state, reward, done, _ = env.step(action, player)
+        episode.add(state, action, reward)
+        state = next_state
+    won = env.result in (GameResult.PLAYER1_WIN, GameResult.PLAYER2_WIN)
+    for seat, seat_transitions in enumerate(episode.finish(state, won)):
+        transitions.extend((seat,) + transition for transition in zip(*seat_transitions))
+
+def run_actor(address: Tuple[str, int], actor_id: int, episodes: Optional[int] = None,
+              batch_episodes: int = 4, epsilon: float = 0.1, max_backoff: float = 5.0,
+              give_up_after: float = 60.0, seed: Optional[int] = None, rows: int = 6,
+              cols: int = 7) -> Tuple[int, int]:
+    """Play and stream episodes until ``episodes`` are acknowledged or the learner stops
+
+    Returns (episodes played, weights version held at exit).
+    """
+    if seed is not None:
+        np.random.seed(seed)
+    torch.set_num_threads(1)
+    env = Connect4Environment(rows=rows, cols=cols)
+    agents = (DQNAgent(epsilon=epsilon, rows=rows, cols=cols), DQNAgent(epsilon=epsilon, rows=rows, cols=cols))
+    version = -1
+    unacked: deque = deque()
+    credits = 0
+    played = 0
+    sock = None
+    backoff = 0.1
+    disconnected_since = None
+
+    def read_until_ack() -> bool:
+        """Apply weight frames until an ACK; False when the learner says STOP"""
+        nonlocal credits, version
+        while True:
+            frame_type, payload = recv_frame(sock)
+            if frame_type == WEIGHTS:
+                version = struct.unpack_from("<q", payload)[0]
+                state_dicts = torch.load(io.BytesIO(payload[8:]), map_location="cpu")
+                agents[0].q_network.load_state_dict(state_dicts["agent1"])
+                agents[1].q_network.load_state_dict(state_dicts["agent2"])
+            elif frame_type == ACK:
+                granted, _ = ACK_BODY.unpack(payload)
+                credits += granted
+                return True
+            else:
+                return False
+
+    while True:
+        try:
+            if sock is None:
+                sock = socket.create_connection(address)
+                send_frame(sock, HELLO, HELLO_BODY.pack(actor_id, version))
+                credits = 0
+                if not read_until_ack():
+                    break
+                backoff, disconnected_since = 0.1, None
+                for payload in unacked:
+                    send_frame(sock, TRANSITIONS, payload)
+                    credits -= 1
+
+            if episodes is not None and played >= episodes:
+                # Wait for the outstanding acknowledgements before leaving
+                while unacked:
+                    if not read_until_ack():
+                        break
+                    unacked.popleft()
+                break
+
+            while credits <= 0:
+                if not read_until_ack():
+                    return played, version
+                unacked.popleft()
+
+            transitions = []
+            count = batch_episodes if episodes is None else min(batch_episodes, episodes - played)
+            for _ in range(count):
+                play_episode(env, agents, transitions)
+            seats, states, actions, rewards, next_states, dones = zip(*transitions)
+            payload = pack_transitions(count, seats, np.stack(states), actions, rewards,
+                                       np.stack(next_states), dones)
+            unacked.append(payload)
+            played += count
+            send_frame(sock, TRANSITIONS, payload)
+            credits -= 1
+        except (ConnectionError, OSError):
+            if sock is not None:
+                sock.close()
+                sock = None
+            now = time.perf_counter()
+            disconnected_since = disconnected_since or now
+            if now - disconnected_since > give_up_after:
+                break
+            time.sleep(backoff)
+            backoff = min(backoff * 2, max_backoff)
+
+    if sock is not None:
+        sock.close()
+    return played, version
+
+def train_distributed(total_episodes: int = 2000, num_actors: int = 2, batch_episodes: int = 4,
+                      epsilon: float = 0.1, host: str = "127.0.0.1", port: int = 0,
+                      save_prefix: Optional[str] = None, rows: int = 6, cols: int = 7) -> Learner:
+    """Run a learner here and ``num_actors`` actor processes against it on localhost"""
+    learner = Learner(host=host, port=port, rows=rows, cols=cols)
+    learner.start()
+    print(f"✅ Learner listening on {learner.address[0]}:{learner.address[1]}")
+
+    context = multiprocessing.get_context("spawn")
+    actors = [context.Process(target=run_actor, args=(learner.address, actor_id),
+                              kwargs=dict(batch_episodes=batch_episodes, epsilon=epsilon, seed=actor_id,
+                                          rows=rows, cols=cols),
+                              daemon=True)
+              for actor_id in range(num_actors)]
+    for actor in actors:
+        actor.start()
+
+    try:
+        learner.run(total_episodes)
+    finally:
+        learner.stop()
+        for actor in actors:
+            actor.join(timeout=10)
+            if actor.is_alive():
+                actor.terminate()
+
+    print(learner.report())
+    if save_prefix:
+        learner.agents[0].save(f"{save_prefix}_agent1.pth")
+        learner.agents[1].save(f"{save_prefix}_agent2.pth")
+        print(f"Agents saved to {save_prefix}_agent1.pth and {save_prefix}_agent2.pth")
+    return learner
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Distributed DQN self-play")
+    parser.add_argument("mode", choices=["local", "learner", "actor"], help="Run everything, or one side")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="Learner host")
+    parser.add_argument("--port", type=int, default=9100, help="Learner port")
+    parser.add_argument("--episodes", type=int, default=2000, help="Episodes to train on (learner/local)")
+    parser.add_argument("--actors", type=int, default=2, help="Actor processes (local)")
+    parser.add_argument("--actor-id", type=int, default=0, help="Actor id (actor)")
+    parser.add_argument("--batch-episodes", type=int, default=4, help="Episodes per transition batch")
+    parser.add_argument("--epsilon", type=float, default=0.1, help="Actor exploration rate")
+    parser.add_argument("--save-prefix", type=str, default=None, help="Save trained agents with this prefix")
+
+    args = parser.parse_args()
+
+    if args.mode == "local":
+        train_distributed(args.episodes, args.actors, args.batch_episodes, args.epsilon,
+                          args.host, 0, args.save_prefix)
+    elif args.mode == "learner":
+        learner = Learner(host=args.host, port=args.port)
+        learner.start()
+        print(f"✅ Learner listening on {args.host}:{args.port}")
+        try:
+            learner.run(args.episodes)
+        finally:
+            learner.stop()
+        print(learner.report())
+        if args.save_prefix:
+            learner.agents[0].save(f"{args.save_prefix}_agent1.pth")
+            learner.agents[1].save(f"{args.save_prefix}_agent2.pth")
+    else:
+        played, version = run_actor((args.host, args.port), args.actor_id,
+                                    batch_episodes=args.batch_episodes, epsilon=args.epsilon)
+        print(f"Actor {args.actor_id} played {played} episodes, last weights v{version}")
@@ -3,9 +3,19 @@ import torch.nn as nn
 import torch.optim as optim
 import torch.nn.functional as F
 import numpy as np
+import os
 import random
+import shutil
+import tempfile
+import weakref
 from collections import deque
+from typing import List, Optional
 from connect4 import Connect4, Player, GameResult
+from eval_cache import EvaluationCache
+from heuristic import evaluate_boards
+from replay_storage import MemmapReplayBuffer, mirror_transitions
+from solver import Position
+from tactics import TacticsCounter, tactical_move
 
 class DQN(nn.Module):
     def __init__(self, input_size=42, hidden_size=512, output_size=7):
@@ -24,38 +34,135 @@ class DQN(nn.Module):
 class DQNAgent:
     def __init__(self, state_size=42, action_size=7, lr=0.001, gamma=0.95, 
                  epsilon=1.0, epsilon_min=0.01, epsilon_decay=0.995, 
-                 memory_size=10000, batch_size=32):
+                 memory_size=10000, batch_size=32, replay_backend="memory",
+                 replay_path=None, hidden_size=512, mirror_prob=0.0, tactical=False,
+                 compile_mode=None, bf16=False, rows=None, cols=None, n_step=1):
+        # A board size overrides state_size/action_size: one input per cell, one output per column
+        if rows is not None or cols is not None:
+            rows = rows or 6
+            cols = cols or 7
+            state_size, action_size = rows * cols, cols
+        self.rows = state_size // action_size
+        self.cols = action_size
         self.state_size = state_size
         self.action_size = action_size
         self.lr = lr
         self.gamma = gamma
+        # Rewards in replay are n-step returns, so targets bootstrap with gamma ** n_step
+        self.n_step = n_step
         self.epsilon = epsilon
         self.epsilon_min = epsilon_min
         self.epsilon_decay = epsilon_decay
         self.memory_size = memory_size
         self.batch_size = batch_size
+        self.hidden_size = hidden_size
+        # Chance of training on a sampled transition's left-right mirror image
+        self.mirror_prob = mirror_prob
+        # Play wins and forced blocks without the network and never hand the opponent a win
+        self.tactical = tactical
+        self.tactics = TacticsCounter()
+        # None runs eagerly, "compile" uses torch.compile and "script" TorchScript
+        if compile_mode not in (None, "compile", "script"):
+            raise ValueError(f"unknown compile mode {compile_mode!r}")
+        self.compile_mode = compile_mode
+        # bfloat16 autocast for forward passes (CPU)
+        self.bf16 = bf16
         
-        self.memory = deque(maxlen=memory_size)
+        # "memory" keeps transitions in a deque, "memmap" in a file-backed ring buffer
+        if replay_backend not in ("memory", "memmap"):
+            raise ValueError(f"unknown replay backend {replay_backend!r}")
+        self.replay_backend = replay_backend
+        self.replay_path = replay_path
+        self._replay_cleanup = None
+        self._build_memory()
         self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
         
-        self.q_network = DQN(state_size, 512, action_size).to(self.device)
-        self.target_network = DQN(state_size, 512, action_size).to(self.device)
-        self.optimizer = optim.Adam(self.q_network.parameters(), lr=lr)
+        self._build_networks()
         
+    def _build_memory(self):
+        if self.replay_backend == "memmap":
+            replay_path = self.replay_path
+            if replay_path is None:
+                # A private file per agent, removed with the agent, so agents never share a ring buffer
+                replay_dir = tempfile.mkdtemp(prefix="c4_replay_")
+                replay_path = os.path.join(replay_dir, "replay.c4r")
+                self._replay_cleanup = weakref.finalize(self, shutil.rmtree, replay_dir, ignore_errors=True)
+            self.memory = MemmapReplayBuffer(replay_path, self.memory_size, self.rows, self.cols)
+        else:
+            self.memory = deque(maxlen=self.memory_size)
+        self._buffers = None
+    
+    def _build_networks(self):
+        self.q_network = DQN(self.state_size, self.hidden_size, self.action_size).to(self.device)
+        self.target_network = DQN(self.state_size, self.hidden_size, self.action_size).to(self.device)
+        if self.compile_mode == "script":
+            self.q_network = torch.jit.script(self.q_network)
+            self.target_network = torch.jit.script(self.target_network)
+        self.optimizer = optim.Adam(self.q_network.parameters(), lr=self.lr)
         self.update_target_network()
         
+        # Compiled callables share parameters with the networks, so state dicts stay unchanged
+        self._inference_network = self.q_network
+        self._loss_fn = self._td_loss
+        if self.compile_mode == "compile":
+            self._inference_network = torch.compile(self.q_network)
+            self._loss_fn = torch.compile(self._td_loss)
+        # Pay compilation and autocast setup here rather than on the first real move
+        if self.compile_mode is not None or self.bf16:
+            self.warm_up()
+    
+    def _autocast(self):
+        return torch.autocast(self.device.type, dtype=torch.bfloat16, enabled=self.bf16)
+    
+    def predict(self, states):
+        """Q-values for a (N, state_size) tensor without gradients, float32"""
+        with torch.no_grad(), self._autocast():
+            return self._inference_network(states).float()
+    
+    def warm_up(self, batch_sizes=(1, 2, 8, 32)):
+        """Run inference and the learner step once per shape so compilation happens now
+
+        Called automatically whenever compiled or bf16 networks are built.
+        """
+        for size in batch_sizes:
+            self.predict(torch.zeros(size, self.state_size, device=self.device))
+        states = torch.zeros(self.batch_size, self.state_size, device=self.device)
+        actions = torch.zeros(self.batch_size, dtype=torch.long, device=self.device)
+        rewards = torch.zeros(self.batch_size, device=self.device)
+        dones = torch.zeros(self.batch_size, dtype=torch.bool, device=self.device)
+        # Forward and backward without an optimizer step leave the weights untouched
+        self._loss_fn(states, actions, rewards, states, dones).backward()
+        self.optimizer.zero_grad()
+    
     def update_target_network(self):
         self.target_network.load_state_dict(self.q_network.state_dict())
     
     def remember(self, state, action, reward, next_state, done):
-        self.memory.append((state, action, reward, next_state, done))
+        if self.replay_backend == "memmap":
+            self.memory.append(state, action, reward, next_state, done)
+        else:
+            self.memory.append((state, action, reward, next_state, done))
+    
+    def remember_batch(self, states, actions, rewards, next_states, dones):
+        """Store many transitions at once, e.g. a whole episode"""
+        if self.replay_backend == "memmap":
+            self.memory.extend(states, actions, rewards, next_states, dones)
+        else:
+            self.memory.extend(zip(states, actions.tolist(), rewards.tolist(), next_states, dones.tolist()))
     
     def act(self, state, valid_actions):
+        if self.tactical:
+            position = Position.from_state(np.asarray(state).reshape(self.rows, self.cols))
+            move, allowed = tactical_move(position, self.tactics)
+            if move is not None:
+                return move
+            valid_actions = [col for col in valid_actions if allowed[col]]
+        
         if np.random.random() <= self.epsilon:
             return random.choice(valid_actions)
         
         state_tensor = torch.FloatTensor(state.flatten()).unsqueeze(0).to(self.device)
-        q_values = self.q_network(state_tensor)
+        q_values = self.predict(state_tensor)
         
         # Mask invalid actions
         masked_q_values = q_values.clone()
@@ -65,39 +172,101 @@ class DQNAgent:
         
         return masked_q_values.argmax().item()
     
-    def replay(self):
+    def replay(self, decay_epsilon=True):
+        """One gradient step on a sampled minibatch; ``decay_epsilon=False`` leaves exploration to the caller"""
         if len(self.memory) < self.batch_size:
             return
         
-        batch = random.sample(self.memory, self.batch_size)
-        states = torch.FloatTensor([e[0].flatten() for e in batch]).to(self.device)
-        actions = torch.LongTensor([e[1] for e in batch]).to(self.device)
-        rewards = torch.FloatTensor([e[2] for e in batch]).to(self.device)
-        next_states = torch.FloatTensor([e[3].flatten() for e in batch]).to(self.device)
-        dones = torch.BoolTensor([e[4] for e in batch]).to(self.device)
-        
-        current_q_values = self.q_network(states).gather(1, actions.unsqueeze(1))
-        next_q_values = self.target_network(next_states).max(1)[0].detach()
-        target_q_values = rewards + (self.gamma * next_q_values * ~dones)
-        
-        loss = F.mse_loss(current_q_values.squeeze(), target_q_values)
+        states, actions, rewards, next_states, dones = self.sample_batch()
+        loss = self._loss_fn(states, actions, rewards, next_states, dones)
         
         self.optimizer.zero_grad()
         loss.backward()
         self.optimizer.step()
         
+        if decay_epsilon:
+            self.decay_epsilon()
+    
+    def _td_loss(self, states, actions, rewards, next_states, dones):
+        """MSE between Q(s, a) and the n-step target from the target network"""
+        with self._autocast():
+            current_q_values = self.q_network(states).gather(1, actions.unsqueeze(1)).squeeze(1).float()
+            with torch.no_grad():
+                next_q_values = self.target_network(next_states).max(1)[0].float()
+        target_q_values = rewards + (self.gamma ** self.n_step * next_q_values * ~dones)
+        return F.mse_loss(current_q_values, target_q_values)
+    
+    def decay_epsilon(self, steps=1):
+        """Apply ``steps`` rounds of epsilon decay, stopping at epsilon_min"""
         if self.epsilon > self.epsilon_min:
-            self.epsilon *= self.epsilon_decay
+            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay ** steps)
+    
+    def sample_batch(self):
+        """Random minibatch from replay memory as tensors
+        
+        The deque backend fills buffers that are reused by every call, so the
+        returned tensors are only valid until the next one.
+        """
+        if self.replay_backend == "memmap":
+            states, actions, rewards, next_states, dones = self.memory.sample(
+                self.batch_size, mirror_prob=self.mirror_prob)
+        else:
+            states, actions, rewards, next_states, dones = self._batch_buffers()
+            for i, (state, action, reward, next_state, done) in enumerate(
+                    random.sample(self.memory, self.batch_size)):
+                states[i] = state.ravel()
+                actions[i] = action
+                rewards[i] = reward
+                next_states[i] = next_state.ravel()
+                dones[i] = done
+            if self.mirror_prob > 0:
+                mirror_transitions(states, actions, next_states, np.random.random(self.batch_size) < self.mirror_prob,
+                                   self.rows, self.cols)
+        return (torch.from_numpy(states).to(self.device), torch.from_numpy(actions).to(self.device),
+                torch.from_numpy(rewards).to(self.device), torch.from_numpy(next_states).to(self.device),
+                torch.from_numpy(dones).to(self.device))
+    
+    def _batch_buffers(self):
+        if self._buffers is None or len(self._buffers[1]) != self.batch_size:
+            self._buffers = (np.zeros((self.batch_size, self.state_size), dtype=np.float32),
+                             np.zeros(self.batch_size, dtype=np.int64),
+                             np.zeros(self.batch_size, dtype=np.float32),
+                             np.zeros((self.batch_size, self.state_size), dtype=np.float32),
+                             np.zeros(self.batch_size, dtype=bool))
+        return self._buffers
     
     def save(self, filepath):
+        # Write then rename, so a watcher such as eval_daemon never reads half a checkpoint
+        partial = f"{filepath}.partial"
         torch.save({
             'model_state_dict': self.q_network.state_dict(),
             'optimizer_state_dict': self.optimizer.state_dict(),
-            'epsilon': self.epsilon
-        }, filepath)
+            'epsilon': self.epsilon,
+            'hidden_size': self.hidden_size,
+            'rows': self.rows,
+            'cols': self.cols
+        }, partial)
+        os.replace(partial, filepath)
     
     def load(self, filepath):
         checkpoint = torch.load(filepath, map_location=self.device)
+        # Checkpoints of other widths (e.g. distilled students) or boards rebuild the networks
+        hidden_size = checkpoint.get('hidden_size', 512)
+        rows, cols = checkpoint.get('rows', 6), checkpoint.get('cols', 7)
+        resized = (rows, cols) != (self.rows, self.cols)
+        if resized and self.replay_backend == "memmap" and self.replay_path is not None:
+            raise ValueError(f"{self.replay_path} holds {self.rows}x{self.cols} transitions, "
+                             f"the checkpoint is for {rows}x{cols} boards")
+        if (hidden_size, rows, cols) != (self.hidden_size, self.rows, self.cols):
+            self.hidden_size, self.rows, self.cols = hidden_size, rows, cols
+            self.state_size, self.action_size = rows * cols, cols
+            self._build_networks()
+        if resized:
+            # Stored transitions have the old board layout, start an empty replay memory
+            if self.replay_backend == "memmap":
+                self.memory.close()
+                self._replay_cleanup()
+            self._build_memory()
         self.q_network.load_state_dict(checkpoint['model_state_dict'])
         self.target_network.load_state_dict(checkpoint['model_state_dict'])
         self.optimizer.load_state_dict(checkpoint['optimizer_state_dict'])
@@ -106,18 +275,30 @@ class DQNAgent:
 class DQNBot:
     """Bot wrapper for DQN agent"""
     
-    def __init__(self, agent: DQNAgent):
+    def __init__(self, agent: DQNAgent, cache: Optional[EvaluationCache] = None, symmetric: bool = False,
+                 tactical: bool = False):
         self.agent = agent
+        self.cache = cache
+        # Average Q-values over each position and its mirror image
+        self.symmetric = symmetric
+        # Answer wins and forced blocks without the network, mask moves that lose on the spot
+        self.tactical = tactical
+        self.tactics = TacticsCounter()
     
     def get_move(self, game: Connect4) -> int:
         """Get move from DQN agent"""
+        if self.cache is not None:
+            return self._get_cached_move(game)
+        if self.symmetric or self.tactical:
+            return self.get_moves([game])[0]
+        
         # Convert game state to tensor format
         state = self._game_to_state(game)
         valid_actions = game.get_valid_moves()
         
         # Use greedy action (no exploration during testing)
         state_tensor = torch.FloatTensor(state.flatten()).unsqueeze(0).to(self.agent.device)
-        q_values = self.agent.q_network(state_tensor)
+        q_values = self.agent.predict(state_tensor)
         
         # Mask invalid actions
         masked_q_values = q_values.clone()
@@ -127,11 +308,56 @@ class DQNBot:
         
         return masked_q_values.argmax().item()
     
+    def get_moves(self, games: List[Connect4]) -> List[int]:
+        """Get moves for several games with one forward pass"""
+        moves: List[Optional[int]] = [None] * len(games)
+        valid = [[cell == Player.EMPTY for cell in game.board[0]] for game in games]
+        if self.tactical:
+            for i, game in enumerate(games):
+                moves[i], valid[i] = tactical_move(Position.from_game(game), self.tactics)
+        
+        # Only games without a tactical answer go through the network
+        pending = [i for i, move in enumerate(moves) if move is None]
+        if pending:
+            q_values = self._q_values(np.stack([self._game_to_state(games[i]) for i in pending]))
+            
+            # Mask invalid actions
+            masked = np.where(np.array([valid[i] for i in pending]), q_values, -np.inf)
+            for i, move in zip(pending, np.argmax(masked, axis=1).tolist()):
+                moves[i] = move
+        return moves
+    
+    def _q_values(self, states: np.ndarray) -> np.ndarray:
+        """Q-values for (N, rows, cols) states, in one forward pass of N or 2N boards"""
+        count = len(states)
+        if self.symmetric:
+            states = np.concatenate([states, states[:, :, ::-1]])
+        inputs = torch.from_numpy(np.ascontiguousarray(states).reshape(len(states), -1)).to(self.agent.device)
+        q_values = self.agent.predict(inputs).cpu().numpy()
+        if self.symmetric:
+            # Column c of a mirrored board is column cols - 1 - c of the original
+            q_values = (q_values[:count] + q_values[count:, ::-1]) / 2
+        return q_values
+    
+    def _get_cached_move(self, game: Connect4) -> int:
+        """Get move using cached Q-values when the position was seen before"""
+        def evaluate():
+            return self._q_values(self._game_to_state(game)[np.newaxis])[0]
+        
+        position = Position.from_game(game)
+        valid = [game.board[0][col] == Player.EMPTY for col in range(game.cols)]
+        if self.tactical:
+            move, valid = tactical_move(position, self.tactics)
+            if move is not None:
+                return move
+        q_values = self.cache.q_values(position, self.agent.q_network, evaluate)
+        return int(np.argmax(np.where(np.array(valid), q_values, -np.inf)))
+    
     def _game_to_state(self, game: Connect4) -> np.ndarray:
         """Convert Connect4 game to state array"""
-        state = np.zeros((6, 7), dtype=np.float32)
-        for row in range(6):
-            for col in range(7):
+        state = np.zeros((game.rows, game.cols), dtype=np.float32)
+        for row in range(game.rows):
+            for col in range(game.cols):
                 if game.board[row][col] == Player.HUMAN:
                     state[row][col] = 1.0
                 elif game.board[row][col] == Player.BOT:
@@ -139,12 +365,16 @@ class DQNBot:
         return state
 
 class Connect4Environment:
-    def __init__(self):
-        self.board = Connect4()
+    def __init__(self, shaping_weight: float = 0.0, rows: int = 6, cols: int = 7):
+        self.board = Connect4(rows, cols)
+        # Weight of the heuristic potential difference added to each move's reward
+        self.shaping_weight = shaping_weight
         self.reset()
     
     def reset(self):
         self.board.reset()
+        self.result = GameResult.ONGOING
+        self._potential = 0.0
         return self._game_to_state(self.board)
     
     def step(self, action, player):
@@ -153,8 +383,17 @@ class Connect4Environment:
         
         self.board.make_move(action, player)
         state = self._game_to_state(self.board)
-        reward = self._get_reward(self.board, player)
-        done = self.board.check_winner() != GameResult.ONGOING
+        # One win check per move; callers read it back from ``result``
+        self.result = self.board.check_winner()
+        reward = self._result_reward(self.result, player)
+        done = self.result != GameResult.ONGOING
+        
+        if self.shaping_weight and not done:
+            # Potential-based shaping: change of the heuristic score from the mover's view
+            potential = float(evaluate_boards(state[np.newaxis])[0])
+            sign = 1.0 if player == Player.HUMAN else -1.0
+            reward += self.shaping_weight * sign * (potential - self._potential)
+            self._potential = potential
         
         return state, reward, done, {}
     
@@ -166,9 +405,9 @@ class Connect4Environment:
     
     def _game_to_state(self, game: Connect4) -> np.ndarray:
         """Convert Connect4 game to state array"""
-        state = np.zeros((6, 7), dtype=np.float32)
-        for row in range(6):
-            for col in range(7):
+        state = np.zeros((game.rows, game.cols), dtype=np.float32)
+        for row in range(game.rows):
+            for col in range(game.cols):
                 if game.board[row][col] == Player.HUMAN:
                     state[row][col] = 1.0
                 elif game.board[row][col] == Player.BOT:
@@ -177,7 +416,9 @@ class Connect4Environment:
     
     def _get_reward(self, game: Connect4, player: Player) -> float:
         """Calculate reward based on game result"""
-        result = game.check_winner()
+        return self._result_reward(game.check_winner(), player)
+    
+    def _result_reward(self, result: GameResult, player: Player) -> float:
         if result == GameResult.ONGOING:
             return 0.0
         elif result == GameResult.DRAW:
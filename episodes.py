@@ -0,0 +1,80 @@
+"""
+Episode-level transitions for two-player self-play
+
+Moves are buffered until the game ends and then split by seat. A seat's
+transition runs from one of its turns to its next turn. The outcome is
+written into both seats' last transitions: the winner's and also the
+loser's, whose final move came before the winning reply. Optional n-step
+returns are computed with NumPy, and each seat's transitions go to replay
+in one bulk insert.
+"""
+
+from typing import List, Tuple
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+LOSS_REWARD = -1.0
+DRAW_REWARD = 0.1  # Same as Connect4Environment gives the player who fills the board
+
+def n_step_returns(rewards: np.ndarray, n: int, gamma: float) -> np.ndarray:
+    """sum over k < n of gamma^k * rewards[t + k], cut off at the end of the episode"""
+    rewards = np.asarray(rewards, dtype=np.float32)
+    if n == 1:
+        return rewards.copy()
+    padded = np.concatenate([rewards, np.zeros(n - 1, dtype=np.float32)])
+    return sliding_window_view(padded, n) @ (gamma ** np.arange(n, dtype=np.float32))
+
+class EpisodeBuffer:
+    """One game's moves, turned into per-seat transitions when it ends
+
+    ``add`` takes the reward Connect4Environment.step gave the mover, which
+    already holds the mover's own win or draw reward (and any shaping).
+    """
+
+    def __init__(self, n_step: int = 1, gamma: float = 0.95):
+        if n_step < 1:
+            raise ValueError(f"n_step must be at least 1, got {n_step}")
+        self.n_step = n_step
+        self.gamma = gamma
+        self.reset()
+
+    def reset(self):
+        self.states = []
+        self.actions = []
+        self.rewards = []
+
+    def __len__(self) -> int:
+        return len(self.actions)
+
+    def add(self, state: np.ndarray, action: int, reward: float):
+        self.states.append(state)
+        self.actions.append(action)
+        self.rewards.append(reward)
+
+    def finish(self, final_state: np.ndarray, won: bool
+               ) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]]:
+        """(states, actions, returns, next_states, dones) for seat 0 and seat 1; empties the buffer
+
+        ``won`` says whether the last move won; otherwise the game was drawn.
+        """
+        moves = len(self.actions)
+        states = np.stack(self.states + [final_state]).reshape(moves + 1, -1).astype(np.float32)
+        actions = np.asarray(self.actions, dtype=np.int64)
+        rewards = np.asarray(self.rewards, dtype=np.float32)
+        if moves >= 2:
+            # The other seat's last move is the one before the final move
+            rewards[moves - 2] += LOSS_REWARD if won else DRAW_REWARD
+
+        seats = []
+        for seat in (0, 1):
+            turns = np.arange(seat, moves, 2)
+            count = len(turns)
+            ahead = np.arange(count) + self.n_step
+            dones = ahead >= count
+            # Bootstrap from this seat's own turn n moves later, or stop at the final board
+            next_index = np.where(dones, moves, turns[np.minimum(ahead, count - 1)])
+            seats.append((states[turns], actions[turns],
+                          n_step_returns(rewards[turns], self.n_step, self.gamma).astype(np.float32),
+                          states[next_index], dones))
+        self.reset()
+        return seats
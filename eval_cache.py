@@ -0,0 +1,89 @@
+"""
+Bounded LRU cache of network evaluations keyed by position
+"""
+
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+import numpy as np
+from solver import Position
+
+class EvaluationCache:
+    """LRU cache of Q-values keyed by canonical position
+
+    A position and its mirror image share one entry; Q-values are stored in
+    the canonical orientation and flipped back on lookup. Entries belong to
+    one model state: any in-place change to the network's parameters (an
+    optimizer step, ``load_state_dict``) bumps their version counters and
+    clears the cache on the next lookup.
+    """
+
+    def __init__(self, max_entries: int = 100000, fold_mirror: bool = True):
+        self.max_entries = max_entries
+        self.fold_mirror = fold_mirror
+        self.entries: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.hit_time = 0.0
+        self.miss_time = 0.0
+        self._model_identity = None
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        self.entries.clear()
+
+    def _identity(self, model) -> tuple:
+        return (id(model),) + tuple(p._version for p in model.parameters())
+
+    def q_values(self, position: Position, model, evaluate: Callable[[], np.ndarray]) -> np.ndarray:
+        """Q-values for ``position``, calling ``evaluate`` on a miss"""
+        start_time = time.perf_counter()
+        identity = self._identity(model)
+        if identity != self._model_identity:
+            if self.entries:
+                self.invalidations += 1
+                self.entries.clear()
+            self._model_identity = identity
+
+        key = position.key()
+        mirrored = False
+        if self.fold_mirror:
+            mirror_key = position.mirror_key()
+            if mirror_key < key:
+                key, mirrored = mirror_key, True
+
+        q_values = self.entries.get(key)
+        if q_values is not None:
+            self.entries.move_to_end(key)
+            self.hits += 1
+            result = q_values[::-1] if mirrored else q_values
+            self.hit_time += time.perf_counter() - start_time
+            return result
+
+        result = evaluate()
+        self.entries[key] = result[::-1].copy() if mirrored else result
+        if len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+        self.misses += 1
+        self.miss_time += time.perf_counter() - start_time
+        return result
+
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def latency_saved(self) -> float:
+        """Estimated seconds saved: each hit avoided an average miss"""
+        if self.misses == 0:
+            return 0.0
+        return self.hits * (self.miss_time / self.misses) - self.hit_time
+
+    def summary(self) -> str:
+        return (f"entries={len(self.entries)} hits={self.hits} misses={self.misses} "
+                f"hit_rate={self.hit_rate():.1%} evictions={self.evictions} "
+                f"invalidations={self.invalidations} saved={self.latency_saved():.2f}s")
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Background evaluator: scores new checkpoints in agents/ while training runs
+
+Run it next to train_dqn.py. It lowers its own priority, keeps torch to a
+small thread budget (optionally pinned to given CPUs) and polls the agents
+directory. Each new checkpoint plays batched games against a fixed panel
+of scripted opponents, half of them moving first, and one JSON line per
+checkpoint is appended to the metrics log. A checkpoint that keeps failing
+to load is logged with its error after a few attempts. Checkpoints already
+in the log are skipped, so restarting the daemon picks up where it stopped.
+"""
+
+import glob
+import json
+import os
+import pickle
+import re
+import time
+from typing import Dict, Iterable, List, Optional, Sequence
+import numpy as np
+import torch
+from dqn_agent import DQNAgent
+from opponents import OPPONENTS, DQNPolicy, play_games
+
+PANEL = ("uniform", "center", "greedy", "heuristic")
+CHECKPOINT_NAME = re.compile(r"dqn_agent(\d+)_(?:episode_(\d+)|final)\.pth$")
+
+def lower_priority(niceness: int = 10, threads: int = 1, cpus: Optional[Iterable[int]] = None):
+    """Yield the CPU to training: nice this process, cap torch threads, optionally pin to ``cpus``"""
+    if niceness and hasattr(os, "nice"):
+        os.nice(niceness)
+    if cpus is not None and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, set(cpus))
+    torch.set_num_threads(threads)
+    try:
+        torch.set_num_interop_threads(threads)
+    except RuntimeError:
+        pass  # Only settable before the first parallel op
+
+def evaluate_checkpoint(path: str, panel: Sequence[str] = PANEL, games: int = 200, seed: int = 0) -> dict:
+    """Win, loss and draw rates of a checkpoint against each opponent in ``panel``"""
+    agent = DQNAgent()
+    agent.load(path)
+    rng = np.random.default_rng(seed)
+    policy = DQNPolicy(agent, 0.0, rng)
+    results = {}
+    for name in panel:
+        opponent = OPPONENTS[name](seed=rng)
+        first = games - games // 2
+        outcomes = np.concatenate([
+            play_games(policy, opponent, first, agent.rows, agent.cols),
+            -play_games(opponent, policy, games - first, agent.rows, agent.cols),
+        ])
+        results[name] = {"win_rate": float(np.mean(outcomes == 1)),
+                         "loss_rate": float(np.mean(outcomes == -1)),
+                         "draw_rate": float(np.mean(outcomes == 0))}
+    return results
+
+class EvalDaemon:
+    """Polls ``directory`` for *.pth files and logs panel results for each new one"""
+
+    def __init__(self, directory: str = "agents", metrics_path: Optional[str] = None,
+                 panel: Sequence[str] = PANEL, games: int = 200, interval: float = 10.0,
+                 settle: float = 2.0, seed: int = 0, max_failures: int = 3):
+        unknown = [name for name in panel if name not in OPPONENTS]
+        if unknown:
+            raise ValueError(f"unknown opponents {unknown}, expected some of {list(OPPONENTS)}")
+        self.directory = directory
+        self.metrics_path = metrics_path or os.path.join(directory, "metrics.jsonl")
+        self.panel = tuple(panel)
+        self.games = games
+        self.interval = interval
+        self.settle = settle
+        self.seed = seed
+        self.max_failures = max_failures
+        self.failures: Dict[tuple, int] = {}
+        self.seen = self._logged()
+
+    def _logged(self) -> set:
+        seen = set()
+        if os.path.exists(self.metrics_path):
+            with open(self.metrics_path) as f:
+                for line in f:
+                    if line.strip():
+                        record = json.loads(line)
+                        seen.add((record["checkpoint"], record["mtime"]))
+        return seen
+
+    def pending(self) -> List[str]:
+        """Unscored checkpoints old enough to be fully written, oldest first"""
+        now = time.time()
+        paths = []
+        for path in glob.glob(os.path.join(self.directory, "*.pth")):
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                continue  # Deleted since the glob
+            if (os.path.basename(path), mtime) not in self.seen and now - mtime >= self.settle:
+                paths.append((mtime, path))
+        return [path for _, path in sorted(paths)]
+
+    def evaluate(self, path: str) -> Optional[dict]:
+        name = os.path.basename(path)
+        mtime = os.path.getmtime(path)
+        start_time = time.perf_counter()
+        try:
+            results = evaluate_checkpoint(path, self.panel, self.games, self.seed)
+        except (RuntimeError, EOFError, KeyError, OSError, pickle.UnpicklingError) as e:
+            attempts = self.failures.get((name, mtime), 0) + 1
+            self.failures[(name, mtime)] = attempts
+            if attempts < self.max_failures:
+                print(f"⚠️  Skipping {name} for now ({attempts}/{self.max_failures}): {e}")
+                return None
+            # Log the failure so neither this daemon nor a restarted one retries it
+            print(f"❌ Giving up on {name} after {attempts} attempts: {e}")
+            self._log({"checkpoint": name, "mtime": mtime, "failed_at": time.time(),
+                       "attempts": attempts, "error": str(e)})
+            del self.failures[(name, mtime)]
+            return None
+        match = CHECKPOINT_NAME.search(name)
+        record = {
+            "checkpoint": name,
+            "mtime": mtime,
+            "agent": int(match.group(1)) if match else None,
+            "episode": int(match.group(2)) if match and match.group(2) else None,
+            "evaluated_at": time.time(),
+            "seconds": time.perf_counter() - start_time,
+            "games": self.games,
+            "opponents": results,
+        }
+        self._log(record)
+        return record
+
+    def _log(self, record: dict):
+        with open(self.metrics_path, "a") as metrics:
+            metrics.write(json.dumps(record) + "\n")
+        self.seen.add((record["checkpoint"], record["mtime"]))
+
+    def poll(self) -> List[dict]:
+        """Score every pending checkpoint once"""
+        records = []
+        for path in self.pending():
+            record = self.evaluate(path)
+            if record is not None:
+                records.append(record)
+                rates = ", ".join(f"{name} {result['win_rate']:.0%}"
+                                  for name, result in record["opponents"].items())
+                print(f"📈 {record['checkpoint']}: {rates} ({record['seconds']:.1f}s)")
+        return records
+
+    def run(self, max_idle: Optional[float] = None):
+        """Poll until interrupted, or until nothing new has appeared for ``max_idle`` seconds"""
+        idle_since = time.perf_counter()
+        try:
+            while True:
+                if self.poll():
+                    idle_since = time.perf_counter()
+                elif max_idle is not None and time.perf_counter() - idle_since >= max_idle:
+                    return
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+
+def win_rate_curve(metrics_path: str, opponent: str = "uniform", agent: int = 1) -> Dict[int, float]:
+    """Episode -> win rate against ``opponent`` from a metrics log"""
+    curve = {}
+    with open(metrics_path) as f:
+        for line in f:
+            record = json.loads(line)
+            if "error" in record:
+                continue  # A checkpoint that never loaded
+            if record["agent"] == agent and record["episode"] is not None and opponent in record["opponents"]:
+                curve[record["episode"]] = record["opponents"][opponent]["win_rate"]
+    return dict(sorted(curve.items()))
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Score new checkpoints in the background while training")
+    parser.add_argument("--dir", type=str, default="agents", help="Directory to watch for .pth files")
+    parser.add_argument("--metrics", type=str, default=None, help="Metrics log (default: <dir>/metrics.jsonl)")
+    parser.add_argument("--panel", type=str, nargs="+", default=list(PANEL), choices=list(OPPONENTS),
+                        help="Opponents every checkpoint plays")
+    parser.add_argument("--games", type=int, default=200, help="Games per opponent")
+    parser.add_argument("--interval", type=float, default=10.0, help="Seconds between polls")
+    parser.add_argument("--nice", type=int, default=10, help="Niceness increment for this process")
+    parser.add_argument("--threads", type=int, default=1, help="Torch threads for evaluation")
+    parser.add_argument("--cpus", type=int, nargs="+", default=None, help="Pin the evaluator to these CPUs")
+    parser.add_argument("--max-idle", type=float, default=None, help="Exit after this long without new checkpoints")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the opponents")
+    parser.add_argument("--max-failures", type=int, default=3,
+                        help="Load attempts before a broken checkpoint is logged and skipped")
+
+    args = parser.parse_args()
+
+    lower_priority(args.nice, args.threads, args.cpus)
+    daemon = EvalDaemon(args.dir, args.metrics, args.panel, args.games, args.interval, seed=args.seed,
+                        max_failures=args.max_failures)
+    print(f"👀 Watching {daemon.directory}/ ({len(daemon.seen)} checkpoints already scored), "
+          f"logging to {daemon.metrics_path}")
+    daemon.run(args.max_idle)
@@ -0,0 +1,384 @@
+#!/usr/bin/env python3
+"""
+asyncio game server: many concurrent human-vs-DQN games over TCP or a Unix socket
+
+Protocol: one JSON object per line in each direction. Requests:
+    {"cmd": "new", "bot_first": false}        -> new session (bot may move first)
+    {"cmd": "move", "session": 1, "col": 3}   -> human move (0-based), bot replies
+    {"cmd": "close", "session": 1}            -> drop a session
+    {"cmd": "stats"}                          -> server metrics
+Every response carries "ok"; failures carry "error". Requests of one
+connection are served concurrently, so replies may arrive out of order:
+a request's "id", if given, is echoed in its response. Sessions belong to
+the connection that created them and are dropped when it closes.
+"""
+
+import asyncio
+import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Set
+import numpy as np
+import torch
+from dqn_agent import DQNAgent
+from solver import Position
+from timed_bot import LatencyHistogram
+
+class Session:
+    """Compact per-game state: the bitboard fields plus latency counters"""
+
+    __slots__ = ('current', 'mask', 'moves', 'human_first', 'result', 'busy',
+                 'move_count', 'latency_total_ms', 'latency_max_ms')
+
+    def __init__(self, human_first: bool):
+        self.current = 0
+        self.mask = 0
+        self.moves = 0
+        self.human_first = human_first
+        self.result = "ongoing"
+        self.busy = False  # A bot reply is being computed, further moves must wait
+        self.move_count = 0
+        self.latency_total_ms = 0.0
+        self.latency_max_ms = 0.0
+
+class BatchedInference:
+    """Collects move requests from all sessions and answers them with batched forward passes"""
+
+    def __init__(self, agent: DQNAgent, max_batch: int = 256, max_wait_ms: float = 2.0):
+        self.agent = agent
+        self.max_batch = max_batch
+        self.max_wait_ms = max_wait_ms
+        self.queue: Optional[asyncio.Queue] = None
+        self.batches = 0
+        self.requests = 0
+        # One thread runs the network so the event loop keeps serving sockets
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._task = None
+
+    def start(self):
+        self.queue = asyncio.Queue()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=False)
+
+    async def get_move(self, position: Position) -> int:
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((position, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + self.max_wait_ms / 1000
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            positions = [position for position, _ in batch]
+            try:
+                moves = await loop.run_in_executor(self._executor, self._evaluate, positions)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), move in zip(batch, moves):
+                if not future.done():
+                    future.set_result(move)
+
+    def _evaluate(self, positions: List[Position]) -> List[int]:
+        states = np.stack([position.to_state().flatten() for position in positions])
+        q_values = self.agent.predict(torch.from_numpy(states).to(self.agent.device)).cpu().numpy()
+        valid = np.array([[position.can_play(col) for col in range(position.cols)] for position in positions])
+        return np.argmax(np.where(valid, q_values, -np.inf), axis=1).tolist()
+
+class GameServer:
+    """Hosts human-vs-bot sessions and routes every bot move through one batcher"""
+
+    def __init__(self, agent: DQNAgent, rows: int = 6, cols: int = 7, max_batch: int = 256,
+                 max_wait_ms: float = 2.0):
+        self.rows = rows
+        self.cols = cols
+        self.inference = BatchedInference(agent, max_batch, max_wait_ms)
+        self.sessions: Dict[int, Session] = {}
+        self.histogram = LatencyHistogram()
+        self.total_sessions = 0
+        self.connections = 0
+        self._next_id = 1
+        self._template = Position(rows, cols)
+        self._servers = []
+
+    async def start(self, host: Optional[str] = "127.0.0.1", port: Optional[int] = 8765,
+                    unix_path: Optional[str] = None):
+        self.inference.start()
+        if unix_path:
+            self._servers.append(await asyncio.start_unix_server(self._handle, path=unix_path))
+        if port is not None:
+            self._servers.append(await asyncio.start_server(self._handle, host, port))
+        return self._servers
+
+    async def stop(self):
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+        await self.inference.stop()
+
+    def _position(self, session: Session) -> Position:
+        position = self._template.copy()
+        position.current, position.mask, position.moves = session.current, session.mask, session.moves
+        return position
+
+    def _store(self, session: Session, position: Position):
+        session.current, session.mask, session.moves = position.current, position.mask, position.moves
+
+    def _board(self, session: Session) -> List[str]:
+        """Rows top to bottom: '.' empty, 'X' human, 'O' bot"""
+        position = self._position(session)
+        player1 = position.player1_stones()
+        human, bot = ("X", "O") if session.human_first else ("O", "X")
+        rows = []
+        for row in range(self.rows - 1, -1, -1):
+            line = ""
+            for col in range(self.cols):
+                bit = 1 << (col * position.height + row)
+                line += "." if not position.mask & bit else (human if player1 & bit else bot)
+            rows.append(line)
+        return rows
+
+    def _human_to_move(self, session: Session) -> bool:
+        return (session.moves % 2 == 0) == session.human_first
+
+    async def _bot_move(self, session: Session) -> Optional[int]:
+        col = await self.inference.get_move(self._position(session))
+        # Re-read after the await: only play if it is still the bot's turn
+        position = self._position(session)
+        if session.result != "ongoing" or self._human_to_move(session) or not position.can_play(col):
+            return None
+        self._play(session, position, col, human=False)
+        return col
+
+    def _play(self, session: Session, position: Position, col: int, human: bool):
+        cells = self.rows * self.cols
+        if position.is_winning_move(col):
+            session.result = "human_win" if human else "bot_win"
+        elif position.moves + 1 == cells:
+            session.result = "draw"
+        position.play(col)
+        self._store(session, position)
+
+    def _state(self, session_id: int, session: Session, **extra) -> dict:
+        return dict(ok=True, session=session_id, board=self._board(session), result=session.result, **extra)
+
+    def _session(self, session_id) -> Optional[Session]:
+        # bool is an int subclass and True would find session 1
+        if not isinstance(session_id, int) or isinstance(session_id, bool):
+            return None
+        return self.sessions.get(session_id)
+
+    async def handle_request(self, request: dict, owned: Optional[Set[int]] = None) -> dict:
+        """Serve one request; sessions it creates are added to ``owned``"""
+        response = await self._dispatch(request, owned)
+        if isinstance(request, dict) and "id" in request:
+            response["id"] = request["id"]
+        return response
+
+    async def _dispatch(self, request: dict, owned: Optional[Set[int]]) -> dict:
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "request must be a JSON object"}
+        cmd = request.get("cmd")
+        if cmd == "new":
+            session_id = self._next_id
+            self._next_id += 1
+            session = Session(human_first=not request.get("bot_first", False))
+            self.sessions[session_id] = session
+            if owned is not None:
+                owned.add(session_id)
+            self.total_sessions += 1
+            bot_move = None
+            if not session.human_first:
+                session.busy = True
+                try:
+                    bot_move = await self._bot_move(session)
+                finally:
+                    session.busy = False
+            return self._state(session_id, session, bot_move=bot_move)
+
+        if cmd == "move":
+            session_id = request.get("session")
+            session = self._session(session_id)
+            if session is None:
+                return {"ok": False, "error": f"unknown session {session_id}"}
+            if session.result != "ongoing":
+                return {"ok": False, "error": "game is over"}
+            if session.busy or not self._human_to_move(session):
+                return {"ok": False, "error": "bot is still moving"}
+            col = request.get("col")
+            position = self._position(session)
+            if (not isinstance(col, int) or isinstance(col, bool) or not 0 <= col < self.cols
+                    or not position.can_play(col)):
+                return {"ok": False, "error": f"invalid move {col}"}
+
+            start_time = time.perf_counter()
+            self._play(session, position, col, human=True)
+            bot_move = None
+            if session.result == "ongoing":
+                session.busy = True
+                try:
+                    bot_move = await self._bot_move(session)
+                finally:
+                    session.busy = False
+            latency_ms = (time.perf_counter() - start_time) * 1000
+            self.histogram.record(latency_ms)
+            session.move_count += 1
+            session.latency_total_ms += latency_ms
+            session.latency_max_ms = max(session.latency_max_ms, latency_ms)
+            return self._state(session_id, session, bot_move=bot_move, latency_ms=latency_ms)
+
+        if cmd == "close":
+            session_id = request.get("session")
+            if self._session(session_id) is None:
+                return {"ok": False, "error": f"unknown session {session_id}"}
+            session = self.sessions.pop(session_id)
+            if owned is not None:
+                owned.discard(session_id)
+            return {"ok": True, "moves": session.move_count,
+                    "mean_latency_ms": session.latency_total_ms / max(session.move_count, 1),
+                    "max_latency_ms": session.latency_max_ms}
+
+        if cmd == "stats":
+            return {"ok": True, **self.stats()}
+
+        return {"ok": False, "error": f"unknown command {cmd}"}
+
+    def stats(self) -> dict:
+        return {"active_sessions": len(self.sessions), "total_sessions": self.total_sessions,
+                "connections": self.connections, "moves": self.histogram.count,
+                "latency_p50_ms": self.histogram.percentile(50),
+                "latency_p99_ms": self.histogram.percentile(99),
+                "latency_max_ms": self.histogram.max_ms,
+                "batches": self.inference.batches,
+                "mean_batch": self.inference.requests / max(self.inference.batches, 1)}
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        pending = set()
+        owned: Set[int] = set()
+        lock = asyncio.Lock()
+
+        async def respond(request):
+            response = await self.handle_request(request, owned)
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                try:
+                    request = json.loads(line)
+                except json.JSONDecodeError:
+                    request = {"cmd": None}
+                # Requests of one connection may belong to many sessions, serve them concurrently
+                task = asyncio.ensure_future(respond(request))
+                pending.add(task)
+                task.add_done_callback(pending.discard)
+        except ConnectionError:
+            pass
+        finally:
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+            # Nobody can reach this connection's games any more
+            for session_id in owned:
+                self.sessions.pop(session_id, None)
+            self.connections -= 1
+            writer.close()
+
+async def load_test(host: str, port: int, sessions: int = 1000, connections: int = 10, seed: int = 0):
+    """Play random human moves in many sessions and report throughput"""
+    rng = np.random.default_rng(seed)
+    start_time = time.perf_counter()
+    moves = 0
+
+    async def client(count: int):
+        nonlocal moves
+        reader, writer = await asyncio.open_connection(host, port)
+
+        async def call(request):
+            writer.write((json.dumps(request) + "\n").encode())
+            await writer.drain()
+            return json.loads(await reader.readline())
+
+        for _ in range(count):
+            state = await call({"cmd": "new"})
+            session_id = state["session"]
+            while state["result"] == "ongoing":
+                valid = [col for col in range(len(state["board"][0])) if state["board"][0][col] == "."]
+                state = await call({"cmd": "move", "session": session_id, "col": int(rng.choice(valid))})
+                moves += 1
+            await call({"cmd": "close", "session": session_id})
+        stats = await call({"cmd": "stats"})
+        writer.close()
+        return stats
+
+    per_client = [sessions // connections + (i < sessions % connections) for i in range(connections)]
+    results = await asyncio.gather(*[client(count) for count in per_client])
+    elapsed = time.perf_counter() - start_time
+    print(f"Played {sessions} games ({moves} moves) in {elapsed:.1f}s: {moves / elapsed:.0f} moves/s")
+    print(f"Server stats: {results[-1]}")
+
+async def serve(agent: DQNAgent, host: str, port: Optional[int], unix_path: Optional[str],
+                stats_interval: float = 10.0):
+    server = GameServer(agent, agent.rows, agent.cols)
+    await server.start(host, port, unix_path)
+    where = " and ".join(filter(None, [f"{host}:{port}" if port is not None else None, unix_path]))
+    print(f"✅ Game server listening on {where}")
+    try:
+        while True:
+            await asyncio.sleep(stats_interval)
+            print(f"📊 {server.stats()}")
+    finally:
+        await server.stop()
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Serve human-vs-DQN Connect 4 games")
+    parser.add_argument("--model", type=str, default="dqn_connect4.pth", help="Model path")
+    parser.add_argument("--host", type=str, default="127.0.0.1", help="TCP host")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port")
+    parser.add_argument("--unix", type=str, default=None, help="Also listen on this Unix socket")
+    parser.add_argument("--load-test", type=int, default=0, help="Run N games against a running server instead")
+    parser.add_argument("--connections", type=int, default=10, help="Client connections for the load test")
+
+    args = parser.parse_args()
+
+    if args.load_test:
+        asyncio.run(load_test(args.host, args.port, args.load_test, args.connections))
+    else:
+        agent = DQNAgent()
+        try:
+            agent.load(args.model)
+        except FileNotFoundError:
+            print(f"⚠️  {args.model} not found, serving an untrained agent")
+        agent.epsilon = 0.0
+        try:
+            asyncio.run(serve(agent, args.host, args.port, args.unix))
+        except KeyboardInterrupt:
+            print("\nGoodbye!")
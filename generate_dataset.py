@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Generate Connect 4 positions labeled with exact solver values and best moves
+"""
+
+import os
+import glob
+import json
+import random
+import time
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import List, Optional
+from connect4 import Connect4, GameResult, Player
+from solver import Position, Solver, TranspositionTable
+
+NO_SCORE = -128  # Marks unplayable columns in move_scores
+
+# Each worker process owns its solver and transposition table
+_solver = None
+_games = None
+
+def _init_worker(table_size: int, games: Optional[List[str]]):
+    global _solver, _games
+    _solver = Solver(TranspositionTable(table_size))
+    _games = games
+
+def load_games(path: str) -> List[str]:
+    """Load recorded games, one move string of 1-based columns per line"""
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+def _record_move(game: Connect4, record: str, ply: int) -> int:
+    """Column of a recorded game's move, raising ValueError if it is illegal in ``game``"""
+    move = int(record[ply]) - 1 if record[ply].isdigit() else -1
+    if move not in game.get_valid_moves():
+        raise ValueError(f"illegal move {record[ply]!r} at ply {ply + 1} in recorded game {record}")
+    return move
+
+def check_games(games: List[str], rows: int = 6, cols: int = 7):
+    """Replay every recorded game, raising ValueError at the first illegal move or move after the end"""
+    for record in games:
+        game = Connect4(rows, cols)
+        for ply in range(len(record)):
+            if game.check_winner() != GameResult.ONGOING:
+                raise ValueError(f"recorded game {record} continues after it ended at ply {ply}")
+            game.make_move(_record_move(game, record, ply), game.current_player)
+
+def sample_position(rng: random.Random, min_ply: int, max_ply: int,
+                    rows: int = 6, cols: int = 7, games: Optional[List[str]] = None,
+                    max_attempts: int = 10000):
+    """Sample a non-terminal position by random play or from a recorded game prefix
+
+    Raises ValueError for a recorded game with an illegal move, or when no
+    attempt reaches a non-terminal position in the ply range.
+    """
+    for _ in range(max_attempts):
+        game = Connect4(rows, cols)
+        moves = []
+        if games:
+            record = rng.choice(games)
+            ply = rng.randint(min(min_ply, len(record)), min(max_ply, len(record)))
+        else:
+            ply = rng.randint(min_ply, max_ply)
+            record = None
+
+        for i in range(ply):
+            if record is not None:
+                move = _record_move(game, record, i)
+            else:
+                move = rng.choice(game.get_valid_moves())
+            game.make_move(move, game.current_player)
+            moves.append(move)
+            if game.check_winner() != GameResult.ONGOING:
+                break
+
+        if game.check_winner() == GameResult.ONGOING:
+            return game, "".join(str(m + 1) for m in moves)
+    raise ValueError(f"no non-terminal position between ply {min_ply} and {max_ply} "
+                     f"after {max_attempts} attempts")
+
+def solve_chunk(index: int, output_dir: str, config: dict) -> dict:
+    """Sample and solve one chunk, then write it atomically"""
+    rows, cols = config["rows"], config["cols"]
+    rng = random.Random(config["seed"] * 1000003 + index)
+    size = config["chunk_size"]
+
+    states = np.zeros((size, rows, cols), dtype=np.int8)
+    values = np.zeros(size, dtype=np.int8)
+    best_moves = np.zeros(size, dtype=np.int8)
+    move_scores = np.full((size, cols), NO_SCORE, dtype=np.int8)
+    sequences = []
+
+    start_time = time.time()
+    start_nodes = _solver.node_count
+    for i in range(size):
+        game, sequence = sample_position(rng, config["min_ply"], config["max_ply"], rows, cols, _games)
+        position = Position.from_game(game)
+        scores = _solver.analyze(position, weak=config["weak"])
+        best_col = max((c for c in range(cols) if scores[c] is not None), key=lambda c: scores[c])
+
+        for row in range(rows):
+            for col in range(cols):
+                if game.board[row][col] == Player.HUMAN:
+                    states[i, row, col] = 1
+                elif game.board[row][col] == Player.BOT:
+                    states[i, row, col] = -1
+        for col in range(cols):
+            if scores[col] is not None:
+                move_scores[i, col] = scores[col]
+        values[i] = scores[best_col]
+        best_moves[i] = best_col
+        sequences.append(sequence)
+
+    path = os.path.join(output_dir, f"chunk_{index:05d}.npz")
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        np.savez(f, states=states, values=values, best_moves=best_moves,
+                 move_scores=move_scores, sequences=np.array(sequences))
+    os.replace(tmp_path, path)
+
+    return {"chunk": index, "positions": size, "nodes": _solver.node_count - start_nodes,
+            "seconds": time.time() - start_time}
+
+def generate_dataset(output_dir: str, num_chunks: int = 10, chunk_size: int = 100,
+                     min_ply: int = 14, max_ply: int = 30, workers: int = None,
+                     games_path: str = None, weak: bool = False, seed: int = 0,
+                     table_size: int = (1 << 20) + 7, rows: int = 6, cols: int = 7) -> List[dict]:
+    """Solve chunks across a process pool, skipping chunks that already exist"""
+    os.makedirs(output_dir, exist_ok=True)
+    config = {"num_chunks": num_chunks, "chunk_size": chunk_size, "min_ply": min_ply,
+              "max_ply": max_ply, "games_path": games_path, "weak": weak, "seed": seed,
+              "rows": rows, "cols": cols}
+
+    # Resuming with different settings would silently mix two datasets
+    manifest_path = os.path.join(output_dir, "manifest.json")
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            existing = json.load(f)
+        if existing != config:
+            raise ValueError(f"{output_dir} was generated with different settings: {existing}")
+    else:
+        with open(manifest_path, "w") as f:
+            json.dump(config, f, indent=2)
+
+    pending = [i for i in range(num_chunks)
+               if not os.path.exists(os.path.join(output_dir, f"chunk_{i:05d}.npz"))]
+    if len(pending) < num_chunks:
+        print(f"Resuming: {num_chunks - len(pending)}/{num_chunks} chunks already done")
+    if not pending:
+        return []
+
+    games = load_games(games_path) if games_path else None
+    if games:
+        check_games(games, rows, cols)
+    workers = workers or os.cpu_count()
+    results = []
+    start_time = time.time()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(table_size, games)) as executor:
+        futures = [executor.submit(solve_chunk, i, output_dir, config) for i in pending]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            elapsed = time.time() - start_time
+            solved = sum(r["positions"] for r in results)
+            print(f"Chunk {result['chunk']} done ({len(results)}/{len(pending)}) - "
+                  f"{solved / elapsed:.1f} positions/s")
+    return results
+
+def load_dataset(output_dir: str) -> dict:
+    """Concatenate all finished chunks of a dataset"""
+    paths = sorted(glob.glob(os.path.join(output_dir, "chunk_*.npz")))
+    if not paths:
+        raise FileNotFoundError(f"No dataset chunks found in {output_dir}")
+    chunks = [np.load(path) for path in paths]
+    return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0].files}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate solver-labeled Connect 4 positions")
+    parser.add_argument("--output", type=str, default="datasets/solved", help="Output directory")
+    parser.add_argument("--chunks", type=int, default=10, help="Number of chunks")
+    parser.add_argument("--chunk-size", type=int, default=100, help="Positions per chunk")
+    parser.add_argument("--min-ply", type=int, default=14, help="Minimum moves played before sampling")
+    parser.add_argument("--max-ply", type=int, default=30, help="Maximum moves played before sampling")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--games", type=str, default=None, help="Recorded games file (one move string per line)")
+    parser.add_argument("--weak", action="store_true", help="Only label win/draw/loss, not distance")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    results = generate_dataset(args.output, args.chunks, args.chunk_size, args.min_ply,
+                               args.max_ply, args.workers, args.games, args.weak, args.seed)
+    nodes = sum(r["nodes"] for r in results)
+    print(f"\n✅ Solved {sum(r['positions'] for r in results)} positions ({nodes} nodes) into {args.output}")
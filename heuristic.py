@@ -0,0 +1,102 @@
+"""
+Vectorized static evaluation of many Connect 4 boards at once
+
+Boards use the DQN state encoding: +1 for player 1, -1 for player 2 and 0
+for empty cells, row 0 at the top. Every line of four cells (69 on the
+standard board) is turned into a base-3 code and scored by table lookup.
+"""
+
+import functools
+from typing import List, Sequence, Tuple
+import numpy as np
+from connect4 import Connect4, Player
+from solver import Position
+
+WIN_SCORE = 10000.0
+TWO_SCORE = 2.0
+THREE_SCORE = 5.0
+CENTER_SCORE = 3.0
+
+@functools.lru_cache(maxsize=None)
+def line_indices(rows: int = 6, cols: int = 7) -> np.ndarray:
+    """Flat cell indices of every line of four, shape (lines, 4)"""
+    lines = []
+    for row in range(rows):
+        for col in range(cols):
+            for delta_row, delta_col in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                end_row, end_col = row + 3 * delta_row, col + 3 * delta_col
+                if 0 <= end_row < rows and 0 <= end_col < cols:
+                    lines.append([(row + i * delta_row) * cols + col + i * delta_col for i in range(4)])
+    return np.array(lines, dtype=np.intp)
+
+@functools.lru_cache(maxsize=None)
+def _window_scores(two: float, three: float, win: float) -> np.ndarray:
+    """Score of each of the 81 window codes from player 1's view"""
+    scores = np.zeros(81, dtype=np.float32)
+    for code in range(81):
+        cells = [(code // 3 ** i) % 3 - 1 for i in range(4)]
+        own, other = cells.count(1), cells.count(-1)
+        if own and other:
+            continue  # Blocked for both sides
+        count, sign = (own, 1.0) if own else (other, -1.0)
+        scores[code] = sign * {2: two, 3: three, 4: win}.get(count, 0.0)
+    return scores
+
+def evaluate_boards(boards: np.ndarray, two: float = TWO_SCORE, three: float = THREE_SCORE,
+                    win: float = WIN_SCORE, center: float = CENTER_SCORE) -> np.ndarray:
+    """Score a stack of boards (N, rows, cols) from player 1's view"""
+    boards = np.asarray(boards)
+    count, rows, cols = boards.shape
+    flat = boards.reshape(count, rows * cols).astype(np.int8) + 1
+    windows = flat[:, line_indices(rows, cols)]
+    codes = windows[..., 0] + 3 * windows[..., 1].astype(np.int16) \
+        + 9 * windows[..., 2].astype(np.int16) + 27 * windows[..., 3].astype(np.int16)
+    scores = _window_scores(two, three, win)[codes].sum(axis=1)
+    scores += center * boards[:, :, cols // 2].sum(axis=1)
+    return scores
+
+def side_to_move_sign(boards: np.ndarray) -> np.ndarray:
+    """+1 where player 1 is to move, -1 where player 2 is"""
+    stones = np.count_nonzero(np.asarray(boards).reshape(len(boards), -1), axis=1)
+    return np.where(stones % 2 == 0, 1.0, -1.0)
+
+def evaluate_positions(positions: Sequence[Position]) -> np.ndarray:
+    """Scores of bitboard positions from each side to move's view"""
+    boards = np.stack([position.to_state() for position in positions])
+    return evaluate_boards(boards) * side_to_move_sign(boards)
+
+def game_to_board(game: Connect4) -> np.ndarray:
+    board = np.zeros((game.rows, game.cols), dtype=np.int8)
+    for row in range(game.rows):
+        for col in range(game.cols):
+            if game.board[row][col] == Player.HUMAN:
+                board[row][col] = 1
+            elif game.board[row][col] == Player.BOT:
+                board[row][col] = -1
+    return board
+
+def child_boards(board: np.ndarray, player_value: int) -> Tuple[np.ndarray, List[int]]:
+    """Boards after each valid move of ``player_value`` (+1 or -1)"""
+    rows, cols = board.shape
+    moves = [col for col in range(cols) if board[0][col] == 0]
+    children = np.repeat(board[np.newaxis], len(moves), axis=0)
+    for i, col in enumerate(moves):
+        row = rows - 1 - np.count_nonzero(board[:, col])
+        children[i, row, col] = player_value
+    return children, moves
+
+class HeuristicBot:
+    """Fast opponent: plays the move with the best one-ply heuristic score"""
+
+    def __init__(self, noise: float = 0.0, seed=None):
+        self.noise = noise
+        self.rng = np.random.default_rng(seed)
+
+    def get_move(self, game: Connect4) -> int:
+        """Get move with the best static evaluation"""
+        player_value = 1 if game.current_player == Player.HUMAN else -1
+        children, moves = child_boards(game_to_board(game), player_value)
+        scores = evaluate_boards(children) * player_value
+        if self.noise > 0:
+            scores = scores + self.rng.normal(0.0, self.noise, len(scores))
+        return moves[int(np.argmax(scores))]
@@ -0,0 +1,214 @@
+"""
+Monte Carlo tree search bot guided by a trained DQN
+"""
+
+import math
+import threading
+import time
+import numpy as np
+import torch
+from typing import List, Optional
+from connect4 import Connect4
+from dqn_agent import DQNAgent
+from solver import Position
+
+class MCTSNode:
+    """Search tree node; values are from the view of the player who moved into it"""
+
+    __slots__ = ('position', 'parent', 'move', 'prior', 'children', 'visits',
+                 'value_sum', 'terminal_value')
+
+    def __init__(self, position: Position, parent=None, move: int = -1, prior: float = 1.0,
+                 terminal_value: Optional[float] = None):
+        self.position = position
+        self.parent = parent
+        self.move = move
+        self.prior = prior
+        self.children: List["MCTSNode"] = []
+        self.visits = 0.0
+        self.value_sum = 0.0
+        self.terminal_value = terminal_value
+
+    def is_expanded(self) -> bool:
+        return len(self.children) > 0
+
+    def q_value(self) -> float:
+        return self.value_sum / self.visits if self.visits > 0 else 0.0
+
+class MCTSBot:
+    """PUCT search with DQN Q-values as move priors and leaf values
+
+    Leaves from several simulations are gathered with virtual loss and
+    evaluated in one batched forward pass. The tree is kept between moves.
+    """
+
+    def __init__(self, agent: DQNAgent, simulations: Optional[int] = 800, time_limit: Optional[float] = None,
+                 batch_size: int = 16, c_puct: float = 1.5, virtual_loss: float = 1.0,
+                 temperature: float = 1.0, reuse_tree: bool = True):
+        self.agent = agent
+        self.simulations = simulations
+        self.time_limit = time_limit
+        self.batch_size = batch_size
+        self.c_puct = c_puct
+        self.virtual_loss = virtual_loss
+        self.temperature = temperature
+        self.reuse_tree = reuse_tree
+
+        self.root: Optional[MCTSNode] = None
+        self.last_simulations = 0
+        self.simulations_per_second = 0.0
+        self.total_simulations = 0
+        self.total_search_time = 0.0
+        self.forward_passes = 0
+
+    def get_move(self, game: Connect4, deadline: Optional[float] = None,
+                 stop: Optional[threading.Event] = None) -> int:
+        """Search from the game position and return the most visited move
+
+        ``deadline`` is an absolute ``time.perf_counter()`` value that cuts
+        the search short of the configured budget, as does setting ``stop``.
+        """
+        root = self._find_root(Position.from_game(game))
+        self.search(root, deadline=deadline, stop=stop)
+
+        best = max(root.children, key=lambda child: child.visits)
+        self.root = best if self.reuse_tree else None
+        return best.move
+
+    def reset(self):
+        self.root = None
+
+    def snapshot(self):
+        """Kept tree and search statistics, for ``restore`` after a speculative search"""
+        return (self.root, self.last_simulations, self.simulations_per_second,
+                self.total_simulations, self.total_search_time, self.forward_passes)
+
+    def restore(self, state):
+        # Nodes searched meanwhile keep their visits, so the restored tree is only richer
+        (self.root, self.last_simulations, self.simulations_per_second,
+         self.total_simulations, self.total_search_time, self.forward_passes) = state
+
+    def _find_root(self, position: Position) -> MCTSNode:
+        # Our last move and the opponent's reply are at most two plies below the old root
+        key = position.key()
+        if self.root is not None:
+            for node in [self.root] + self.root.children:
+                if node.position.key() == key:
+                    return self._detach(node)
+                for child in node.children:
+                    if child.position.key() == key:
+                        return self._detach(child)
+        return MCTSNode(position)
+
+    def _detach(self, node: MCTSNode) -> MCTSNode:
+        node.parent = None
+        return node
+
+    def search(self, root: MCTSNode, simulations: Optional[int] = None,
+               deadline: Optional[float] = None, stop: Optional[threading.Event] = None) -> MCTSNode:
+        """Run simulations on ``root`` until the simulation or time budget is spent
+
+        With no simulation budget the search runs until the time limit or deadline.
+        """
+        simulations = simulations if simulations is not None else self.simulations
+        start_time = time.perf_counter()
+        if self.time_limit is not None:
+            limit = start_time + self.time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+        if simulations is None:
+            if deadline is None:
+                raise ValueError("MCTSBot needs a simulation budget, a time_limit or a deadline")
+            simulations = float("inf")
+
+        if not root.is_expanded() and root.terminal_value is None:
+            self._expand_and_evaluate([root])
+
+        done = 0
+        while done < simulations:
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+            if stop is not None and stop.is_set():
+                break
+            self.run_batch(root, min(self.batch_size, simulations - done))
+            done += min(self.batch_size, simulations - done)
+
+        elapsed = time.perf_counter() - start_time
+        self.last_simulations = done
+        self.total_simulations += done
+        self.total_search_time += elapsed
+        self.simulations_per_second = done / elapsed if elapsed > 0 else 0.0
+        return root
+
+    def run_batch(self, root: MCTSNode, count: int):
+        """Select ``count`` leaves under virtual loss, evaluate them together, back up"""
+        paths = []
+        for _ in range(count):
+            path = self._select(root)
+            paths.append(path)
+            for node in path[1:]:
+                node.visits += self.virtual_loss
+                node.value_sum -= self.virtual_loss
+
+        leaves = []
+        seen = set()
+        for path in paths:
+            leaf = path[-1]
+            if leaf.terminal_value is None and not leaf.is_expanded() and id(leaf) not in seen:
+                seen.add(id(leaf))
+                leaves.append(leaf)
+        values = self._expand_and_evaluate(leaves) if leaves else {}
+
+        for path in paths:
+            leaf = path[-1]
+            if leaf.terminal_value is not None:
+                value = leaf.terminal_value
+            else:
+                # Evaluated from the side to move at the leaf, i.e. the opponent of the mover
+                value = -values[id(leaf)]
+            for node in reversed(path[1:]):
+                node.visits += 1 - self.virtual_loss
+                node.value_sum += value + self.virtual_loss
+                value = -value
+            root.visits += 1
+
+    def _select(self, root: MCTSNode) -> List[MCTSNode]:
+        path = [root]
+        node = root
+        while node.is_expanded():
+            sqrt_visits = math.sqrt(max(node.visits, 1.0))
+            best_score, best_child = -float('inf'), None
+            for child in node.children:
+                score = child.q_value() + self.c_puct * child.prior * sqrt_visits / (1.0 + child.visits)
+                if score > best_score:
+                    best_score, best_child = score, child
+            node = best_child
+            path.append(node)
+        return path
+
+    def _expand_and_evaluate(self, leaves: List[MCTSNode]) -> dict:
+        """Expand leaves with DQN priors; returns each leaf's value for its side to move"""
+        states = np.stack([leaf.position.to_state().flatten() for leaf in leaves])
+        q_values = self.agent.predict(torch.from_numpy(states).to(self.agent.device)).cpu().numpy()
+        self.forward_passes += 1
+
+        values = {}
+        for leaf, q in zip(leaves, q_values):
+            position = leaf.position
+            valid_moves = position.valid_moves()
+            logits = np.array([q[col] for col in valid_moves], dtype=np.float64) / self.temperature
+            priors = np.exp(logits - logits.max())
+            priors /= priors.sum()
+
+            full_board = position.moves + 1 == position.rows * position.cols
+            for col, prior in zip(valid_moves, priors):
+                child = position.copy()
+                terminal_value = None
+                if position.is_winning_move(col):
+                    terminal_value = 1.0
+                elif full_board:
+                    terminal_value = 0.0
+                child.play(col)
+                leaf.children.append(MCTSNode(child, leaf, col, float(prior), terminal_value))
+
+            values[id(leaf)] = float(np.clip(logits.max() * self.temperature, -1.0, 1.0))
+        return values
@@ -0,0 +1,173 @@
+"""
+Batched opponent policies over stacks of boards
+
+Boards use the DQN state encoding (+1 player 1, -1 player 2, row 0 at the
+top) stacked as (N, rows, cols), with valid-action masks of shape (N, cols).
+A policy returns one column per board from a single vectorized call, and
+``play_games`` runs many games in lockstep so every ply is one policy call.
+"""
+
+from typing import Optional, Sequence
+import numpy as np
+import torch
+from connect4 import Connect4
+from heuristic import evaluate_boards, game_to_board, line_indices, side_to_move_sign
+
+def valid_masks(boards: np.ndarray) -> np.ndarray:
+    """Columns with room left, shape (N, cols)"""
+    return np.asarray(boards)[:, 0, :] == 0
+
+def masked_argmax(scores: np.ndarray, masks: np.ndarray) -> np.ndarray:
+    return np.where(masks, scores, -np.inf).argmax(axis=1)
+
+def child_stacks(boards: np.ndarray, values: Optional[np.ndarray] = None) -> np.ndarray:
+    """Flat boards after a ``values`` stone (default: the side to move's) drops in each column
+
+    Shape (N, cols, cells). Full columns are left unchanged; callers mask them out.
+    """
+    boards = np.asarray(boards, dtype=np.float32)
+    count, rows, cols = boards.shape
+    if values is None:
+        values = side_to_move_sign(boards)
+    landing = rows - 1 - np.count_nonzero(boards, axis=1)
+    children = np.repeat(boards.reshape(count, 1, rows * cols), cols, axis=1)
+    games, columns = np.nonzero(landing >= 0)
+    children[games, columns, landing[games, columns] * cols + columns] = values[games]
+    return children
+
+def winning_moves(boards: np.ndarray, masks: np.ndarray, values: Optional[np.ndarray] = None) -> np.ndarray:
+    """Columns where a ``values`` stone (default: the side to move's) completes four, shape (N, cols)"""
+    boards = np.asarray(boards, dtype=np.float32)
+    rows, cols = boards.shape[1:]
+    if values is None:
+        values = side_to_move_sign(boards)
+    sums = child_stacks(boards, values)[:, :, line_indices(rows, cols)].sum(axis=3)
+    return masks & (sums == 4 * values[:, np.newaxis, np.newaxis]).any(axis=2)
+
+class BatchedPolicy:
+    """Picks a column for every board in a stack at once"""
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def __call__(self, boards: np.ndarray, masks: np.ndarray) -> np.ndarray:
+        raise NotImplementedError
+
+    def get_move(self, game: Connect4) -> int:
+        """Single-game interface, so a policy can stand in for RandomBot"""
+        board = game_to_board(game)[np.newaxis].astype(np.float32)
+        return int(self(board, valid_masks(board))[0])
+
+class UniformPolicy(BatchedPolicy):
+    """Uniformly random valid columns"""
+
+    def __call__(self, boards, masks):
+        return masked_argmax(self.rng.random(masks.shape), masks)
+
+class CenterWeightedPolicy(BatchedPolicy):
+    """Random valid columns, more likely near the center (1, 2, 3, 4, 3, 2, 1 on 7 columns)"""
+
+    def __init__(self, weights: Optional[Sequence[float]] = None, seed=None):
+        super().__init__(seed)
+        self.weights = None if weights is None else np.asarray(weights, dtype=np.float64)
+
+    def __call__(self, boards, masks):
+        cols = masks.shape[1]
+        weights = self.weights
+        if weights is None:
+            weights = cols // 2 + 1 - np.abs(np.arange(cols) - cols // 2)
+        # Gumbel-max: argmax of log weight plus Gumbel noise samples proportionally to weight
+        return masked_argmax(np.log(weights) + self.rng.gumbel(size=masks.shape), masks)
+
+class GreedyPolicy(BatchedPolicy):
+    """Takes a win, else blocks an opponent win, else defers to ``fallback`` (uniform by default)"""
+
+    def __init__(self, fallback: Optional[BatchedPolicy] = None, seed=None):
+        super().__init__(seed)
+        self.fallback = fallback or UniformPolicy(self.rng)
+
+    def __call__(self, boards, masks):
+        boards = np.asarray(boards, dtype=np.float32)
+        sign = side_to_move_sign(boards)
+        wins = winning_moves(boards, masks, sign)
+        blocks = winning_moves(boards, masks, -sign)
+        targets = np.where(wins.any(axis=1, keepdims=True), wins, blocks)
+        actions = masked_argmax(self.rng.random(masks.shape), targets)
+        free = ~targets.any(axis=1)
+        if free.any():
+            actions[free] = self.fallback(boards[free], masks[free])
+        return actions
+
+class HeuristicPolicy(BatchedPolicy):
+    """Best one-ply static evaluation, HeuristicBot for a whole batch"""
+
+    def __init__(self, noise: float = 0.0, seed=None):
+        super().__init__(seed)
+        self.noise = noise
+
+    def __call__(self, boards, masks):
+        boards = np.asarray(boards, dtype=np.float32)
+        count, rows, cols = boards.shape
+        children = child_stacks(boards).reshape(count * cols, rows, cols)
+        scores = evaluate_boards(children).reshape(count, cols) * side_to_move_sign(boards)[:, np.newaxis]
+        if self.noise > 0:
+            scores = scores + self.rng.normal(0.0, self.noise, scores.shape)
+        return masked_argmax(scores, masks)
+
+class DQNPolicy(BatchedPolicy):
+    """An agent's greedy moves from one forward pass, exploring with probability ``epsilon``"""
+
+    def __init__(self, agent, epsilon: float = 0.0, seed=None):
+        super().__init__(seed)
+        self.agent = agent
+        self.epsilon = epsilon
+
+    def __call__(self, boards, masks):
+        states = torch.from_numpy(np.asarray(boards, dtype=np.float32).reshape(len(boards), -1))
+        q_values = self.agent.predict(states.to(self.agent.device)).cpu().numpy()
+        actions = masked_argmax(q_values, masks)
+        if self.epsilon > 0:
+            explore = self.rng.random(len(actions)) <= self.epsilon
+            actions[explore] = masked_argmax(self.rng.random((explore.sum(), masks.shape[1])), masks[explore])
+        return actions
+
+OPPONENTS = {
+    "uniform": UniformPolicy,
+    "center": CenterWeightedPolicy,
+    "greedy": GreedyPolicy,
+    "heuristic": HeuristicPolicy,
+}
+
+def play_games(first: BatchedPolicy, second: BatchedPolicy, games: int, rows: int = 6,
+               cols: int = 7, return_moves: bool = False):
+    """Outcomes of ``games`` games played in lockstep: +1 first player won, -1 second, 0 draw
+
+    With ``return_moves`` the columns played are returned too, (games, rows * cols)
+    padded with -1 after each game's last move.
+    """
+    moves = np.full((games, rows * cols), -1, dtype=np.int8) if return_moves else None
+    boards = np.zeros((games, rows, cols), dtype=np.float32)
+    heights = np.zeros((games, cols), dtype=np.intp)
+    outcomes = np.zeros(games, dtype=np.int8)
+    active = np.ones(games, dtype=bool)
+    lines = line_indices(rows, cols)
+
+    for ply in range(rows * cols):
+        index = np.flatnonzero(active)
+        if not len(index):
+            break
+        value = 1 if ply % 2 == 0 else -1
+        policy = first if value == 1 else second
+        masks = heights[index] < rows
+        actions = np.asarray(policy(boards[index], masks))
+        if not masks[np.arange(len(index)), actions].all():
+            raise ValueError(f"{type(policy).__name__} played a full column")
+
+        boards[index, rows - 1 - heights[index, actions], actions] = value
+        if return_moves:
+            moves[index, ply] = actions
+        heights[index, actions] += 1
+        won = (boards[index].reshape(len(index), -1)[:, lines].sum(axis=2) == 4 * value).any(axis=1)
+        outcomes[index[won]] = value
+        active[index[won]] = False
+    return (outcomes, moves) if return_moves else outcomes
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Parallel exact solving: worker processes share one lock-free transposition table
+
+Two strategies split the work of Solver across processes:
+- "lazy" (lazy SMP): every worker solves the whole position with its own
+  column order and the first answer wins; the others stop. The shared table
+  lets each worker skip subtrees another worker has already bounded.
+- "split": root moves are handed out to the workers, one child per task.
+
+Table entries are upper bounds proven by some worker, so whichever worker
+answers returns exactly the single-threaded score.
+"""
+
+import ctypes
+import multiprocessing
+import os
+import time
+from typing import List, Optional, Sequence
+from solver import Position, Solver, TranspositionTable
+
+STRATEGIES = ("lazy", "split")
+# Prefixes of one recorded game, from about two seconds of single-threaded solving down to a fraction
+REPORT_GAME = "7422341735647741166133573473242566"
+REPORT_PLIES = (16, 18, 20, 22)
+
+class SearchStopped(Exception):
+    """Raised inside a worker once another worker has answered"""
+
+class SharedTranspositionTable(TranspositionTable):
+    """TranspositionTable in shared memory that many processes use without locks
+
+    Each slot holds ``key ^ value`` and ``value``. A reader only trusts a slot
+    whose two words xor back to the key it asked for, so a write torn by
+    another process reads as a miss rather than as a wrong bound.
+    """
+
+    def __init__(self, size: int = (1 << 20) + 7, slots=None):
+        self.size = size
+        self.slots = slots if slots is not None else multiprocessing.RawArray(ctypes.c_uint64, 2 * size)
+
+    def put(self, key: int, value: int):
+        index = 2 * (key % self.size)
+        self.slots[index] = key ^ value
+        self.slots[index + 1] = value
+
+    def get(self, key: int) -> int:
+        index = 2 * (key % self.size)
+        value = self.slots[index + 1]
+        return value if self.slots[index] ^ value == key else 0
+
+    def reset(self):
+        ctypes.memset(self.slots, 0, ctypes.sizeof(self.slots))
+
+class _WorkerSolver(Solver):
+    """Solver with a per-worker column order that stops when told to"""
+
+    def __init__(self, table: TranspositionTable, stop, worker_id: int = 0):
+        super().__init__(table)
+        self.stop = stop
+        self.worker_id = worker_id
+        self._orders = {}
+
+    def _column_order(self, cols: int) -> List[int]:
+        order = self._orders.get(cols)
+        if order is None:
+            # Rotating the center-first order makes helpers explore different subtrees first
+            order = super()._column_order(cols)
+            shift = self.worker_id % cols
+            order = self._orders[cols] = order[shift:] + order[:shift]
+        return order
+
+    def negamax(self, position: Position, alpha: int, beta: int) -> int:
+        if self.node_count & 1023 == 0 and self.stop.is_set():
+            raise SearchStopped()
+        return super().negamax(position, alpha, beta)
+
+# Each worker process attaches to the shared table once
+_table = None
+_stop = None
+
+def _init_worker(slots, size: int, stop):
+    global _table, _stop
+    _table = SharedTranspositionTable(size, slots)
+    _stop = stop
+
+def _solve_task(args):
+    worker_id, position, weak = args
+    solver = _WorkerSolver(_table, _stop, worker_id)
+    try:
+        score = solver.solve(position, weak)
+    except SearchStopped:
+        score = None
+    return score, solver.node_count
+
+def _analyze_task(args):
+    col, child, weak = args
+    solver = _WorkerSolver(_table, _stop)
+    return col, -solver.solve(child, weak), solver.node_count
+
+class ParallelSolver:
+    """Solver's solve/analyze/best_move spread over ``workers`` processes
+
+    Keys are stored in 64-bit words, so boards up to 64 bitboard cells
+    (``cols * (rows + 1)``) are supported, which covers 7x6 and 8x7.
+    """
+
+    def __init__(self, workers: Optional[int] = None, strategy: str = "lazy",
+                 table_size: int = (1 << 20) + 7):
+        if strategy not in STRATEGIES:
+            raise ValueError(f"unknown strategy {strategy!r}, expected one of {STRATEGIES}")
+        self.workers = workers or os.cpu_count() or 1
+        self.strategy = strategy
+        self.table = SharedTranspositionTable(table_size)
+        self.node_count = 0
+        context = multiprocessing.get_context()
+        self._stop = context.Event()
+        self._pool = context.Pool(self.workers, _init_worker, (self.table.slots, table_size, self._stop))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.terminate()
+        self._pool.join()
+
+    def reset(self):
+        self.node_count = 0
+        self.table.reset()
+
+    def solve(self, position: Position, weak: bool = False) -> int:
+        """Exact score of a position (or only its sign if ``weak``), as Solver.solve"""
+        _check_key_bits(position)
+        cells = position.rows * position.cols
+        if position.can_win_next():
+            return (cells + 1 - position.moves) // 2
+        if position.moves == cells:
+            return 0  # Full board: a draw, as Solver.solve scores it
+        if self.strategy == "split":
+            return max(score for score in self.analyze(position, weak) if score is not None)
+
+        self._stop.clear()
+        result = None
+        tasks = [(worker_id, position, weak) for worker_id in range(self.workers)]
+        for score, nodes in self._pool.imap_unordered(_solve_task, tasks):
+            self.node_count += nodes
+            if result is None and score is not None:
+                result = score
+                self._stop.set()
+        self._stop.clear()
+        return result
+
+    def analyze(self, position: Position, weak: bool = False) -> List[Optional[int]]:
+        """Score of every column from the side to move's view (None if unplayable)"""
+        _check_key_bits(position)
+        cells = position.rows * position.cols
+        scores: List[Optional[int]] = [None] * position.cols
+        children = []
+        for col in range(position.cols):
+            if not position.can_play(col):
+                continue
+            if position.is_winning_move(col):
+                scores[col] = (cells + 1 - position.moves) // 2
+            else:
+                child = position.copy()
+                child.play(col)
+                children.append((col, child))
+
+        if self.strategy == "split":
+            tasks = [(col, child, weak) for col, child in children]
+            for col, score, nodes in self._pool.imap_unordered(_analyze_task, tasks):
+                scores[col] = score
+                self.node_count += nodes
+        else:
+            for col, child in children:
+                scores[col] = -self.solve(child, weak)
+        return scores
+
+    def best_move(self, position: Position, weak: bool = False):
+        """Best column and its score, preferring center columns on ties"""
+        scores = self.analyze(position, weak)
+        best_col, best_score = -1, None
+        for col in sorted(range(position.cols), key=lambda col: abs(col - position.cols // 2)):
+            if scores[col] is not None and (best_score is None or scores[col] > best_score):
+                best_col, best_score = col, scores[col]
+        return best_col, best_score
+
+def _check_key_bits(position: Position):
+    if position.cols * position.height > 64:
+        raise ValueError(f"{position.rows}x{position.cols} keys do not fit in the 64-bit shared table")
+
+def scaling_report(sequences: Sequence[str], worker_counts: Sequence[int], strategy: str = "lazy",
+                   table_size: int = (1 << 20) + 7) -> List[dict]:
+    """Time to solve each position and nodes/sec per worker count, checked against Solver"""
+    positions = [Position.from_moves(sequence) for sequence in sequences]
+    expected = [Solver().solve(position) for position in positions]
+
+    rows = []
+    for workers in worker_counts:
+        with ParallelSolver(workers, strategy, table_size) as solver:
+            times = []
+            for sequence, position, score in zip(sequences, positions, expected):
+                solver.reset()
+                start_time = time.perf_counter()
+                result = solver.solve(position)
+                times.append(time.perf_counter() - start_time)
+                if result != score:
+                    raise RuntimeError(f"{workers} workers scored {sequence} {result}, Solver {score}")
+                rows.append({"workers": workers, "ply": len(sequence), "seconds": times[-1],
+                             "nodes": solver.node_count, "nodes_per_sec": solver.node_count / times[-1]})
+
+    print(f"{'workers':>7s} {'ply':>4s} {'seconds':>9s} {'speedup':>8s} {'nodes':>10s} {'nodes/s':>10s}")
+    serial = {row["ply"]: row["seconds"] for row in rows if row["workers"] == worker_counts[0]}
+    for row in rows:
+        print(f"{row['workers']:7d} {row['ply']:4d} {row['seconds']:9.2f} "
+              f"{serial[row['ply']] / row['seconds']:7.2f}x {row['nodes']:10d} {row['nodes_per_sec']:10.0f}")
+    return rows
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Solve positions with several processes sharing a table")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8], help="Worker counts to compare")
+    parser.add_argument("--strategy", choices=STRATEGIES, default="lazy", help="Lazy SMP or root splitting")
+    parser.add_argument("--moves", type=str, nargs="+", default=None,
+                        help="Positions as move strings (default: prefixes of a recorded game)")
+    parser.add_argument("--table-size", type=int, default=(1 << 20) + 7, help="Shared table entries")
+
+    args = parser.parse_args()
+
+    sequences = args.moves or [REPORT_GAME[:ply] for ply in REPORT_PLIES]
+    print(f"🧵 {args.strategy} search on {os.cpu_count()} CPUs")
+    scaling_report(sequences, args.workers, args.strategy, args.table_size)
+    print("\n✅ Every worker count matched the single-threaded solver")
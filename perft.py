@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+"""
+Perft: count every legal move sequence to a fixed depth
+
+Stresses move generation and win detection of each engine and gives a
+fair speed comparison between them. Counts are checked against
+reference values for the standard board.
+"""
+
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Optional, Tuple
+from connect4 import Connect4
+from connect4_board import Connect4Board
+from solver import Position
+
+ONGOING, PLAYER1_WIN, PLAYER2_WIN, DRAW = 0, 1, 2, 3
+
+# (leaves, player 1 wins, player 2 wins, draws) from the empty 6x7 board
+REFERENCE = {
+    0: (1, 0, 0, 0),
+    1: (7, 0, 0, 0),
+    2: (49, 0, 0, 0),
+    3: (343, 0, 0, 0),
+    4: (2401, 0, 0, 0),
+    5: (16807, 0, 0, 0),
+    6: (117649, 0, 0, 0),
+    7: (823536, 13032, 0, 0),
+    8: (5673234, 13032, 44430, 0),
+    9: (39394572, 1099914, 44430, 0),
+    10: (268031646, 1099914, 4305488, 0),
+}
+
+class PerftCounts:
+    """Leaf count at the target depth plus terminal outcomes along the way"""
+
+    def __init__(self, leaves: int = 0, player1_wins: int = 0, player2_wins: int = 0,
+                 draws: int = 0, nodes: int = 0):
+        self.leaves = leaves
+        self.player1_wins = player1_wins
+        self.player2_wins = player2_wins
+        self.draws = draws
+        self.nodes = nodes
+
+    def __iadd__(self, other: "PerftCounts") -> "PerftCounts":
+        self.leaves += other.leaves
+        self.player1_wins += other.player1_wins
+        self.player2_wins += other.player2_wins
+        self.draws += other.draws
+        self.nodes += other.nodes
+        return self
+
+    def as_tuple(self) -> Tuple[int, int, int, int]:
+        return self.leaves, self.player1_wins, self.player2_wins, self.draws
+
+class Connect4Engine:
+    """Perft adapter for the Connect4 game class"""
+
+    def __init__(self, moves: str = "", rows: int = 6, cols: int = 7):
+        self.game = Connect4(rows, cols)
+        for char in moves:
+            self.game.make_move(int(char) - 1, self.game.current_player)
+
+    def moves(self):
+        return self.game.get_valid_moves()
+
+    def play(self, col: int):
+        self.game.make_move(col, self.game.current_player)
+
+    def undo(self, col: int):
+        self.game.undo_move(col)
+
+    def outcome(self) -> int:
+        return self.game.check_winner().value
+
+    def key(self) -> int:
+        return Position.from_game(self.game).key()
+
+class BoardEngine:
+    """Perft adapter for the NumPy Connect4Board"""
+
+    def __init__(self, moves: str = "", rows: int = 6, cols: int = 7):
+        self.board = Connect4Board(rows, cols)
+        for char in moves:
+            self.board.make_move(int(char) - 1)
+
+    def moves(self):
+        return self.board.get_valid_actions()
+
+    def play(self, col: int):
+        self.board.make_move(col)
+
+    def undo(self, col: int):
+        self.board.undo_move(col)
+
+    def outcome(self) -> int:
+        winner = self.board.check_winner()
+        if winner:
+            return int(winner)
+        return DRAW if not self.board.get_valid_actions() else ONGOING
+
+    def key(self) -> int:
+        return Position.from_board(self.board).key()
+
+class BitboardEngine:
+    """Perft adapter for the solver's bitboard Position"""
+
+    def __init__(self, moves: str = "", rows: int = 6, cols: int = 7):
+        self.position = Position(rows, cols)
+        for char in moves:
+            self.position.play(int(char) - 1)
+        self.stack = []
+        self.last_outcome = ONGOING
+
+    def moves(self):
+        return self.position.valid_moves()
+
+    def play(self, col: int):
+        position = self.position
+        self.stack.append((position.current, position.mask, self.last_outcome))
+        if position.is_winning_move(col):
+            self.last_outcome = PLAYER1_WIN if position.moves % 2 == 0 else PLAYER2_WIN
+        elif position.moves + 1 == position.rows * position.cols:
+            self.last_outcome = DRAW
+        position.play(col)
+
+    def undo(self, col: int):
+        self.position.current, self.position.mask, self.last_outcome = self.stack.pop()
+        self.position.moves -= 1
+
+    def outcome(self) -> int:
+        return self.last_outcome
+
+    def key(self) -> int:
+        return self.position.key()
+
+ENGINES = {"connect4": Connect4Engine, "board": BoardEngine, "bitboard": BitboardEngine}
+
+def perft(engine, depth: int, table: Optional[Dict] = None) -> PerftCounts:
+    """Count sequences below the engine's position; ``table`` deduplicates transpositions"""
+    if depth == 0:
+        return PerftCounts(leaves=1)
+
+    if table is not None:
+        key = (engine.key(), depth)
+        cached = table.get(key)
+        if cached is not None:
+            return PerftCounts(*cached.as_tuple())
+
+    counts = PerftCounts()
+    for col in engine.moves():
+        engine.play(col)
+        counts.nodes += 1
+        outcome = engine.outcome()
+        if outcome == ONGOING:
+            counts += perft(engine, depth - 1, table)
+        else:
+            if depth == 1:
+                counts.leaves += 1
+            if outcome == PLAYER1_WIN:
+                counts.player1_wins += 1
+            elif outcome == PLAYER2_WIN:
+                counts.player2_wins += 1
+            else:
+                counts.draws += 1
+        engine.undo(col)
+
+    if table is not None:
+        table[key] = counts
+    return counts
+
+def _perft_root_move(engine_name: str, moves: str, col: int, depth: int, dedupe: bool,
+                     rows: int, cols: int) -> PerftCounts:
+    engine = ENGINES[engine_name](moves, rows, cols)
+    counts = PerftCounts(nodes=1)
+    engine.play(col)
+    outcome = engine.outcome()
+    if outcome == ONGOING:
+        counts += perft(engine, depth - 1, {} if dedupe else None)
+    else:
+        counts += PerftCounts(leaves=int(depth == 1), player1_wins=int(outcome == PLAYER1_WIN),
+                              player2_wins=int(outcome == PLAYER2_WIN), draws=int(outcome == DRAW))
+    return counts
+
+def run_perft(engine_name: str = "bitboard", depth: int = 6, moves: str = "", dedupe: bool = False,
+              workers: int = 1, rows: int = 6, cols: int = 7) -> Tuple[PerftCounts, float]:
+    """Perft from the position after ``moves``, split by root move over ``workers`` processes"""
+    start_time = time.perf_counter()
+    if workers > 1 and depth > 0:
+        root_moves = ENGINES[engine_name](moves, rows, cols).moves()
+        counts = PerftCounts()
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(_perft_root_move, engine_name, moves, col, depth, dedupe, rows, cols)
+                       for col in root_moves]
+            for future in futures:
+                counts += future.result()
+    else:
+        counts = perft(ENGINES[engine_name](moves, rows, cols), depth, {} if dedupe else None)
+    return counts, time.perf_counter() - start_time
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Count Connect 4 move sequences to a fixed depth")
+    parser.add_argument("--depth", type=int, default=6, help="Search depth")
+    parser.add_argument("--engine", choices=list(ENGINES) + ["all"], default="all", help="Engine to run")
+    parser.add_argument("--moves", type=str, default="", help="Start position as 1-based columns, e.g. 4453")
+    parser.add_argument("--dedupe", action="store_true", help="Merge transpositions with a table")
+    parser.add_argument("--workers", type=int, default=1, help="Processes to split root moves over")
+    parser.add_argument("--rows", type=int, default=6, help="Board rows")
+    parser.add_argument("--cols", type=int, default=7, help="Board columns")
+
+    args = parser.parse_args()
+
+    engines = list(ENGINES) if args.engine == "all" else [args.engine]
+    for engine_name in engines:
+        counts, elapsed = run_perft(engine_name, args.depth, args.moves, args.dedupe,
+                                    args.workers, args.rows, args.cols)
+        print(f"{engine_name:9s} depth {args.depth}: leaves={counts.leaves} "
+              f"p1_wins={counts.player1_wins} p2_wins={counts.player2_wins} draws={counts.draws} "
+              f"nodes={counts.nodes} ({counts.nodes / max(elapsed, 1e-9):,.0f} nodes/s, {elapsed:.2f}s)")
+
+        if not args.moves and (args.rows, args.cols) == (6, 7) and args.depth in REFERENCE:
+            if counts.as_tuple() == REFERENCE[args.depth]:
+                print("  ✅ matches reference")
+            else:
+                print(f"  ❌ expected {REFERENCE[args.depth]}")
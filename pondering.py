@@ -0,0 +1,115 @@
+"""
+Background pondering: think about replies while the human is choosing a move
+"""
+
+import inspect
+import threading
+import time
+from typing import Dict, Optional
+from connect4 import Connect4, GameResult
+from solver import Position
+from timed_bot import LatencyHistogram
+
+class PonderingBot:
+    """Bot wrapper that precomputes replies to every human move in a background thread
+
+    Call ``start_pondering`` right before blocking on human input. When the
+    human's move arrives, ``get_move`` answers from the precomputed replies if
+    the move was covered, otherwise it stops pondering and thinks normally.
+    Bots whose ``get_move`` accepts ``stop`` (MCTSBot, SearchBot, TimedBot)
+    abandon a reply in progress as soon as it is no longer needed. Bots with
+    ``snapshot``/``restore`` get their state back after each pondered reply.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.replies: Dict[int, int] = {}
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        # Latency as seen by the human, pondering time excluded
+        self.histogram = LatencyHistogram()
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._pondering_key = None
+        # Reply the ponder thread is computing, and the move get_move is waiting for
+        self._computing = None
+        self._wanted = None
+        self._stoppable = 'stop' in inspect.signature(bot.get_move).parameters
+        # The wrapped bot is not thread-safe, only one thread may use it at a time
+        self._lock = threading.Lock()
+
+    def start_pondering(self, game: Connect4):
+        """Start computing replies to each possible move in ``game``"""
+        key = Position.from_game(game).key()
+        if self._thread is not None and self._pondering_key == key:
+            return
+        self.stop_pondering()
+        self._pondering_key = key
+        self.replies = {}
+        self._wanted = None
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._ponder, args=(game.copy(),), daemon=True)
+        self._thread.start()
+
+    def stop_pondering(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+            self._pondering_key = None
+
+    def _predicted_moves(self, game: Connect4):
+        # Center columns are the most likely human replies
+        center = game.cols // 2
+        return sorted(game.get_valid_moves(), key=lambda col: abs(col - center))
+
+    def _ponder(self, game: Connect4):
+        for col in self._predicted_moves(game):
+            if self._stop.is_set() or self._wanted is not None:
+                return
+            child = game.copy()
+            child.make_move(col, child.current_player)
+            if child.check_winner() != GameResult.ONGOING:
+                continue
+            key = Position.from_game(child).key()
+            with self._lock:
+                if self._stop.is_set():
+                    return
+                self._computing = key
+                # Speculative moves must not replace the bot's kept tree or count in its metrics
+                state = self.bot.snapshot() if hasattr(self.bot, 'snapshot') else None
+                try:
+                    if self._stoppable:
+                        move = self.bot.get_move(child, stop=self._stop)
+                    else:
+                        move = self.bot.get_move(child)
+                finally:
+                    if state is not None:
+                        self.bot.restore(state)
+                self._computing = None
+                if self._stop.is_set():
+                    return  # Cut short, not a real answer
+                self.replies[key] = move
+
+    def get_move(self, game: Connect4) -> int:
+        """Precomputed reply if available, otherwise ask the wrapped bot"""
+        start_time = time.perf_counter()
+        key = Position.from_game(game).key()
+        # Set before looking at _computing, so the ponder thread stops after the reply in progress
+        self._wanted = key
+        if self._thread is not None and key not in self.replies and self._computing == key:
+            # The reply for this move is being computed right now, let it finish
+            self._thread.join()
+        # Any other search in progress is for a move that was not played: abandon it
+        self.stop_pondering()
+
+        move = self.replies.pop(key, None)
+        self.replies = {}
+        if move is not None and game.is_valid_move(move):
+            self.ponder_hits += 1
+        else:
+            self.ponder_misses += 1
+            with self._lock:
+                move = self.bot.get_move(game)
+        self.histogram.record((time.perf_counter() - start_time) * 1000)
+        return move
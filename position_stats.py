@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+Position statistics: visit counts and outcome tallies per canonical position
+
+Positions are keyed by the solver's canonical bitboard key (the smaller of
+the key and its mirror image's), computed for whole batches of games with
+NumPy. The store is an open-addressing hash table with linear probing in
+one structured array, so there is no Python object per position. Batches
+are aggregated with np.unique first and then probed in vectorized rounds.
+
+File layout (little endian), readable in place through np.memmap:
+    header   8s magic, int64 rows, int64 cols, int64 capacity, int64 size (64 bytes)
+    entries  ENTRY_DTYPE[capacity]; tag 0 marks an empty slot
+"""
+
+import os
+import struct
+from typing import Dict, Optional, Sequence, Tuple
+import numpy as np
+
+MAGIC = b"C4STATS1"
+HEADER = struct.Struct("<8sqqqq")  # magic, rows, cols, capacity, size
+HEADER_BYTES = 64
+
+# Tags are canonical keys plus one, so the empty position is distinguishable from an empty slot.
+# Outcomes count first player wins, second player wins and draws.
+ENTRY_DTYPE = np.dtype([
+    ("tag", "<u8"),
+    ("visits", "<u8"),
+    ("outcomes", "<u8", (3,)),
+    ("ply", "u1"),
+])
+FIRST_WIN, SECOND_WIN, DRAW = range(3)
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+
+def _check_board(rows: int, cols: int):
+    if cols * (rows + 1) > 64:
+        raise ValueError(f"A {rows}x{cols} board does not fit in 64-bit position keys")
+
+def mirror_bitboards(bits: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Left-right mirror of column-major bitboards, vectorized over an array"""
+    height = np.uint64(rows + 1)
+    column = np.uint64((1 << (rows + 1)) - 1)
+    mirrored = np.zeros_like(bits)
+    for col in range(cols):
+        mirrored |= ((bits >> (np.uint64(col) * height)) & column) << (np.uint64(cols - 1 - col) * height)
+    return mirrored
+
+def canonical_keys(current: np.ndarray, mask: np.ndarray, rows: int, cols: int) -> np.ndarray:
+    """Position.canonical_key for arrays of (current, mask) bitboards"""
+    return np.minimum(current + mask,
+                      mirror_bitboards(current, rows, cols) + mirror_bitboards(mask, rows, cols))
+
+def game_keys(moves: np.ndarray, rows: int = 6, cols: int = 7) -> Tuple[np.ndarray, np.ndarray]:
+    """Canonical keys of every position of each game, the empty board included
+
+    ``moves`` is (games, plies) of 0-based columns padded with -1. Returns
+    keys and a mask of real positions, both shaped (games, plies + 1);
+    column ``t`` holds the position after ``t`` moves.
+    """
+    _check_board(rows, cols)
+    moves = np.asarray(moves)
+    games, plies = moves.shape
+    height = np.uint64(rows + 1)
+    column_bits = np.uint64((1 << rows) - 1)
+    current = np.zeros(games, dtype=np.uint64)
+    mask = np.zeros(games, dtype=np.uint64)
+    keys = np.zeros((games, plies + 1), dtype=np.uint64)
+    valid = np.zeros((games, plies + 1), dtype=bool)
+    valid[:, 0] = True
+    keys[:, 0] = canonical_keys(current, mask, rows, cols)
+    for ply in range(plies):
+        live = moves[:, ply] >= 0
+        shift = np.where(live, moves[:, ply], 0).astype(np.uint64) * height
+        move = (mask + (np.uint64(1) << shift)) & (column_bits << shift)
+        # Position.play_bit: the side to move becomes the other player's stones
+        current = np.where(live, current ^ mask, current)
+        mask = mask | np.where(live, move, np.uint64(0))
+        keys[:, ply + 1] = canonical_keys(current, mask, rows, cols)
+        valid[:, ply + 1] = live
+    return keys, valid
+
+def moves_from_records(records: Sequence[str], plies: Optional[int] = None) -> np.ndarray:
+    """Move strings of 1-based columns (as in load_games) -> (games, plies) padded with -1"""
+    plies = plies or max((len(record) for record in records), default=0)
+    moves = np.full((len(records), plies), -1, dtype=np.int8)
+    for i, record in enumerate(records):
+        moves[i, :len(record)] = [int(char) - 1 for char in record[:plies]]
+    return moves
+
+def boards_from_keys(keys: np.ndarray, rows: int = 6, cols: int = 7) -> np.ndarray:
+    """Decode position keys into DQN boards (+1 player 1, -1 player 2, row 0 at the top)
+
+    Within a column, key bits are mask + current = (2^h - 1) + current for h
+    stones, which falls in [2^h - 1, 2^(h+1) - 2], so h and current can be
+    read back per column.
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    height = rows + 1
+    stones_for = np.floor(np.log2(np.arange(1, (1 << height) + 1))).astype(np.int64)
+    boards = np.zeros((len(keys), rows, cols), dtype=np.float32)
+    to_move = np.zeros((len(keys), rows, cols), dtype=bool)
+    filled = np.zeros((len(keys), rows, cols), dtype=bool)
+    counts = np.zeros(len(keys), dtype=np.int64)
+    bits = np.arange(rows)
+    for col in range(cols):
+        column = ((keys >> np.uint64(col * height)) & np.uint64((1 << height) - 1)).astype(np.int64)
+        stones = stones_for[column]
+        current = column - ((1 << stones) - 1)
+        counts += stones
+        occupied = bits[np.newaxis, :] < stones[:, np.newaxis]
+        # Bit 0 is the bottom row, which is the last board row
+        filled[:, ::-1, col] = occupied
+        to_move[:, ::-1, col] = occupied & ((current[:, np.newaxis] >> bits) & 1).astype(bool)
+    # Player 1 is to move after an even number of stones
+    sign = np.where(counts % 2 == 0, 1.0, -1.0).astype(np.float32)[:, np.newaxis, np.newaxis]
+    boards[filled] = np.broadcast_to(-sign, boards.shape)[filled]
+    boards[to_move] = np.broadcast_to(sign, boards.shape)[to_move]
+    return boards
+
+class PositionStats:
+    """Open-addressing table of canonical position -> visits, outcomes and ply
+
+    Grows by doubling when it would pass ``max_load``. A table opened writable
+    from a file is updated in place until it has to grow; after that it lives
+    in memory and ``flush`` writes it back to the same file and maps it again.
+    """
+
+    def __init__(self, rows: int = 6, cols: int = 7, capacity: int = 1 << 16, max_load: float = 0.7):
+        _check_board(rows, cols)
+        if capacity & (capacity - 1):
+            raise ValueError(f"capacity must be a power of two, got {capacity}")
+        self.rows = rows
+        self.cols = cols
+        self.max_load = max_load
+        self.entries = np.zeros(capacity, dtype=ENTRY_DTYPE)
+        self.size = 0
+        self._header = None
+        self._path = None  # File a writable table flushes to
+
+    @property
+    def capacity(self) -> int:
+        return len(self.entries)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _slots(self, tags: np.ndarray) -> np.ndarray:
+        # Fibonacci hashing: the top bits of tag * 2^64 / phi
+        shift = np.uint64(64 - (self.capacity.bit_length() - 1))
+        return ((tags * _GOLDEN) >> shift).astype(np.intp) if self.capacity > 1 else np.zeros(len(tags), np.intp)
+
+    def _insert(self, tags: np.ndarray, plies: np.ndarray, visits: np.ndarray, outcomes: np.ndarray):
+        """Add counts for distinct ``tags``, probing all of them in vectorized rounds"""
+        table_tags = self.entries["tag"]
+        last = self.capacity - 1
+        slots = self._slots(tags)
+        pending = np.arange(len(tags))
+        while len(pending):
+            probe = slots[pending]
+            empty = table_tags[probe] == 0
+            if empty.any():
+                # Several keys may want the same empty slot; the first of each claims it
+                claimed, first = np.unique(probe[empty], return_index=True)
+                winners = pending[empty][first]
+                table_tags[claimed] = tags[winners]
+                self.entries["ply"][claimed] = plies[winners]
+                self.size += len(winners)
+            hit = table_tags[probe] == tags[pending]
+            found = probe[hit]
+            self.entries["visits"][found] += visits[pending[hit]]
+            self.entries["outcomes"][found] += outcomes[pending[hit]]
+            # Everyone else moves on to the next slot
+            slots[pending[~hit]] = (probe[~hit] + 1) & last
+            pending = pending[~hit]
+        if self._header is not None:
+            self._header[3] = self.size
+
+    def _reserve(self, extra: int):
+        needed = self.size + extra
+        if needed <= self.max_load * self.capacity:
+            return
+        capacity = self.capacity
+        while needed > self.max_load * capacity:
+            capacity *= 2
+        old = self.entries[self.entries["tag"] != 0]
+        self.entries = np.zeros(capacity, dtype=ENTRY_DTYPE)
+        self.size = 0
+        self._header = None  # Detached from the file until the next flush
+        self._insert(old["tag"], old["ply"], old["visits"], old["outcomes"])
+
+    def add(self, keys: np.ndarray, plies: np.ndarray, outcomes: Optional[np.ndarray] = None):
+        """Count one visit per key; ``outcomes`` are +1/-1/0 for a first player win/loss/draw"""
+        keys = np.asarray(keys, dtype=np.uint64)
+        if not len(keys):
+            return
+        tags, first, inverse = np.unique(keys + np.uint64(1), return_index=True, return_inverse=True)
+        inverse = inverse.ravel()
+        visits = np.bincount(inverse, minlength=len(tags)).astype(np.uint64)
+        tallies = np.zeros((len(tags), 3), dtype=np.uint64)
+        if outcomes is not None:
+            column = np.select([np.asarray(outcomes) > 0, np.asarray(outcomes) < 0], [FIRST_WIN, SECOND_WIN], DRAW)
+            tallies = np.bincount(inverse * 3 + column, minlength=3 * len(tags)).astype(np.uint64).reshape(-1, 3)
+        self._reserve(len(tags))
+        self._insert(tags, np.asarray(plies)[first].astype(np.uint8), visits, tallies)
+
+    def add_games(self, moves: np.ndarray, outcomes: Optional[np.ndarray] = None):
+        """Count every position of a batch of games, e.g. the moves recorded by play_games"""
+        keys, valid = game_keys(moves, self.rows, self.cols)
+        plies = np.broadcast_to(np.arange(keys.shape[1]), keys.shape)
+        game_outcomes = None
+        if outcomes is not None:
+            game_outcomes = np.broadcast_to(np.asarray(outcomes)[:, np.newaxis], keys.shape)[valid]
+        self.add(keys[valid], plies[valid], game_outcomes)
+
+    def lookup(self, keys: np.ndarray) -> np.ndarray:
+        """Table entries for canonical ``keys``; missing positions come back with zero visits"""
+        tags = np.asarray(keys, dtype=np.uint64) + np.uint64(1)
+        table_tags = self.entries["tag"]
+        result = np.zeros(len(tags), dtype=ENTRY_DTYPE)
+        slots = self._slots(tags)
+        pending = np.arange(len(tags))
+        while len(pending):
+            probe = slots[pending]
+            found = table_tags[probe]
+            hit = found == tags[pending]
+            result[pending[hit]] = self.entries[probe[hit]]
+            # An empty slot ends the probe sequence: the key is not in the table
+            more = ~hit & (found != 0)
+            slots[pending[more]] = (probe[more] + 1) & (self.capacity - 1)
+            pending = pending[more]
+        return result
+
+    def occupied(self) -> np.ndarray:
+        return self.entries[self.entries["tag"] != 0]
+
+    def total_visits(self) -> int:
+        return int(self.entries["visits"].sum())
+
+    def top(self, count: int = 10, ply: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Canonical keys and entries of the most visited positions, optionally at one ply"""
+        entries = self.occupied()
+        if ply is not None:
+            entries = entries[entries["ply"] == ply]
+        count = min(count, len(entries))
+        best = np.argpartition(-entries["visits"].astype(np.int64), count - 1)[:count] if count else []
+        best = entries[best]
+        best = best[np.argsort(-best["visits"].astype(np.int64), kind="stable")]
+        return best["tag"] - np.uint64(1), best
+
+    def coverage(self) -> Dict[str, object]:
+        """Distinct positions, visits and how they spread over plies and visit counts"""
+        entries = self.occupied()
+        visits = entries["visits"]
+        return {
+            "positions": len(entries),
+            "visits": int(visits.sum()),
+            "singletons": float(np.mean(visits == 1)) if len(entries) else 0.0,
+            "positions_by_ply": np.bincount(entries["ply"], minlength=self.rows * self.cols + 1).tolist(),
+            "visits_by_ply": np.bincount(entries["ply"], weights=visits,
+                                         minlength=self.rows * self.cols + 1).astype(np.int64).tolist(),
+        }
+
+    def save(self, path: str):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.rows, self.cols, self.capacity, self.size).ljust(HEADER_BYTES, b"\0"))
+            f.write(self.entries.tobytes())
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def open(cls, path: str, writable: bool = False, max_load: float = 0.7) -> "PositionStats":
+        """Map a saved table; reads only touch the pages they need"""
+        with open(path, "rb") as f:
+            magic, rows, cols, capacity, size = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a position statistics file")
+        stats = cls.__new__(cls)
+        stats.rows, stats.cols, stats.max_load, stats.size = rows, cols, max_load, size
+        mode = "r+" if writable else "r"
+        stats.entries = np.memmap(path, dtype=ENTRY_DTYPE, mode=mode, offset=HEADER_BYTES, shape=(capacity,))
+        stats._header = np.memmap(path, dtype="<i8", mode=mode, offset=len(MAGIC), shape=(4,)) if writable else None
+        stats._path = path if writable else None
+        return stats
+
+    def flush(self):
+        """Write a writable table's changes back to the file it was opened from"""
+        if self._path is None:
+            return
+        if self._header is None:
+            # Grown past the mapped file: rewrite it whole and map the new one
+            self.save(self._path)
+            mapped = PositionStats.open(self._path, writable=True, max_load=self.max_load)
+            self.entries, self._header = mapped.entries, mapped._header
+        else:
+            self.entries.flush()
+            self._header.flush()
+
+def format_board(board: np.ndarray) -> str:
+    return "\n".join("".join({1: "X", -1: "O"}.get(int(cell), ".") for cell in row) for row in board)
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from opponents import OPPONENTS, play_games
+
+    parser = argparse.ArgumentParser(description="Position coverage statistics for batched self-play")
+    parser.add_argument("--games", type=int, default=100000, help="Games to play")
+    parser.add_argument("--chunk", type=int, default=10000, help="Games per batch")
+    parser.add_argument("--first", choices=list(OPPONENTS), default="center", help="First player's policy")
+    parser.add_argument("--second", choices=list(OPPONENTS), default="center", help="Second player's policy")
+    parser.add_argument("--records", type=str, default=None, help="Count recorded games from this file instead")
+    parser.add_argument("--load", type=str, default=None, help="Add to (or just query) this statistics file")
+    parser.add_argument("--output", type=str, default=None, help="Save the table here")
+    parser.add_argument("--top", type=int, default=5, help="Most visited openings to show")
+    parser.add_argument("--ply", type=int, default=4, help="Ply of the openings to show")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    stats = PositionStats.open(args.load, writable=True) if args.load else PositionStats()
+    start_time = time.perf_counter()
+    if args.records:
+        from generate_dataset import load_games
+        stats.add_games(moves_from_records(load_games(args.records)))
+    else:
+        rng = np.random.default_rng(args.seed)
+        first, second = OPPONENTS[args.first](seed=rng), OPPONENTS[args.second](seed=rng)
+        print(f"{'games':>10s} {'positions':>12s} {'visits':>14s} {'singletons':>11s} {'games/s':>9s}")
+        played = 0
+        while played < args.games:
+            batch = min(args.chunk, args.games - played)
+            outcomes, moves = play_games(first, second, batch, return_moves=True)
+            stats.add_games(moves, outcomes)
+            played += batch
+            coverage = stats.coverage()
+            print(f"{played:10d} {coverage['positions']:12d} {coverage['visits']:14d} "
+                  f"{coverage['singletons']:10.1%} {played / (time.perf_counter() - start_time):9.0f}")
+
+    coverage = stats.coverage()
+    print(f"\n📊 {coverage['positions']} distinct positions from {coverage['visits']} visits "
+          f"in {time.perf_counter() - start_time:.1f}s")
+    print("Distinct positions by ply:", coverage["positions_by_ply"][:16])
+    keys, entries = stats.top(args.top, args.ply)
+    boards = boards_from_keys(keys, stats.rows, stats.cols)
+    for board, entry in zip(boards, entries):
+        wins, losses, draws = entry["outcomes"]
+        print(f"\n{entry['visits']} visits, first player {wins}-{losses}-{draws}")
+        print(format_board(board))
+    if args.output:
+        stats.save(args.output)
+        print(f"\n✅ Statistics saved to {args.output}")
+    elif args.load:
+        stats.flush()
+        print(f"\n✅ Statistics updated in {args.load}")
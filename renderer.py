@@ -0,0 +1,69 @@
+"""
+Buffered terminal renderer for watching games
+"""
+
+import sys
+import time
+from typing import List, Optional
+from connect4 import Connect4
+
+CLEAR_SCREEN = "\033[2J\033[H"
+CLEAR_LINE = "\033[K"
+
+class TerminalRenderer:
+    """Draws a game with ANSI escapes, redrawing only the cells that changed
+
+    Each frame is written to the stream in a single call. ``fps`` caps the
+    frame rate (None draws as fast as the game loop runs) and ``headless``
+    skips drawing entirely while still counting frames.
+    """
+
+    def __init__(self, fps: Optional[float] = None, headless: bool = False, stream=None):
+        self.fps = fps
+        self.headless = headless
+        self.stream = stream if stream is not None else sys.stdout
+        self.frames = 0
+        self._cells: Optional[List[list]] = None
+        self._header: Optional[str] = None
+        self._next_frame = 0.0
+
+    def reset(self):
+        """Force a full redraw on the next frame"""
+        self._cells = None
+
+    def render(self, game: Connect4, status: str = "", header: str = ""):
+        self.frames += 1
+        if self.headless:
+            return
+
+        if self.fps:
+            # Hold each frame for 1/fps seconds
+            now = time.perf_counter()
+            if now < self._next_frame:
+                time.sleep(self._next_frame - now)
+            self._next_frame = max(now, self._next_frame) + 1.0 / self.fps
+
+        header_lines = header.count("\n") + 1 if header else 0
+        # Board rows start after the header, a blank line and three frame lines (1-based)
+        first_row_line = header_lines + 5
+        status_line = first_row_line + game.rows + 1
+
+        if (self._cells is None or header != self._header
+                or len(self._cells) != game.rows or len(self._cells[0]) != game.cols):
+            lines = ([header] if header else []) + game.board_lines() + [status]
+            frame = CLEAR_SCREEN + "\n".join(lines) + "\n"
+        else:
+            parts = []
+            for row in range(game.rows):
+                for col in range(game.cols):
+                    cell = game.board[row][col]
+                    if cell != self._cells[row][col]:
+                        parts.append(f"\033[{first_row_line + row};{2 + 4 * col}H{Connect4.cell_string(cell)}")
+            parts.append(f"\033[{status_line};1H{status}{CLEAR_LINE}")
+            parts.append(f"\033[{status_line + 1};1H")
+            frame = "".join(parts)
+
+        self.stream.write(frame)
+        self.stream.flush()
+        self._cells = [row[:] for row in game.board]
+        self._header = header
@@ -0,0 +1,161 @@
+"""
+Replay storage backed by a memory-mapped file of fixed-width records
+
+Each transition takes 38 bytes: both boards as two 64-bit planes (player 1
+and player 2 stones, bit i = flat cell i of the DQN state), the action, the
+done flag and the reward. The file is a ring buffer, so the oldest
+transitions are overwritten once ``capacity`` is reached, and sampling
+gathers random records through the OS page cache.
+"""
+
+import os
+import struct
+from typing import Optional, Tuple
+import numpy as np
+
+MAGIC = b"C4REPLAY"
+HEADER = struct.Struct("<8sqqqq")  # magic, capacity, cells, next index, size
+HEADER_BYTES = 64
+
+RECORD_DTYPE = np.dtype([
+    ("state", "<u8", (2,)),
+    ("next_state", "<u8", (2,)),
+    ("action", "i1"),
+    ("done", "?"),
+    ("reward", "<f4"),
+])
+
+def encode_states(states: np.ndarray) -> np.ndarray:
+    """(N, cells) boards of +1/-1/0 -> (N, 2) uint64 stone planes"""
+    states = np.asarray(states).reshape(len(states), -1)
+    if states.shape[1] > 64:
+        raise ValueError(f"boards of {states.shape[1]} cells do not fit in 64-bit planes")
+    weights = np.left_shift(np.uint64(1), np.arange(states.shape[1], dtype=np.uint64))
+    planes = np.empty((len(states), 2), dtype=np.uint64)
+    planes[:, 0] = ((states > 0).astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    planes[:, 1] = ((states < 0).astype(np.uint64) * weights).sum(axis=1, dtype=np.uint64)
+    return planes
+
+def decode_states(planes: np.ndarray, cells: int) -> np.ndarray:
+    """(N, 2) uint64 stone planes -> (N, cells) float32 boards"""
+    shifts = np.arange(cells, dtype=np.uint64)
+    player1 = (planes[:, 0, np.newaxis] >> shifts) & np.uint64(1)
+    player2 = (planes[:, 1, np.newaxis] >> shifts) & np.uint64(1)
+    return player1.astype(np.float32) - player2.astype(np.float32)
+
+def mirror_transitions(states: np.ndarray, actions: np.ndarray, next_states: np.ndarray,
+                       mask: np.ndarray, rows: int, cols: int):
+    """Flip the ``mask``ed transitions left-right in place; action a becomes cols - 1 - a"""
+    for boards in (states, next_states):
+        flipped = boards[mask].reshape(-1, rows, cols)[:, :, ::-1]
+        boards[mask] = flipped.reshape(-1, rows * cols)
+    actions[mask] = cols - 1 - actions[mask]
+
+class MemmapReplayBuffer:
+    """Ring buffer of transitions in a memory-mapped file
+
+    Reopening an existing file with the same capacity and board size resumes
+    where it left off, and ``open`` reads both from the file. ``append`` takes the same arguments as
+    ``DQNAgent.remember``; ``sample`` returns NumPy arrays ready for tensors.
+    """
+
+    def __init__(self, path: str, capacity: int = 1_000_000, rows: int = 6, cols: int = 7):
+        self.path = path
+        self.capacity = capacity
+        self.rows = rows
+        self.cols = cols
+        self.cells = rows * cols
+        self.rng = np.random.default_rng()
+
+        size_bytes = HEADER_BYTES + capacity * RECORD_DTYPE.itemsize
+        if os.path.exists(path):
+            with open(path, "rb") as f:
+                magic, file_capacity, file_cells, _, _ = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC or (file_capacity, file_cells) != (capacity, self.cells):
+                raise ValueError(f"{path} holds a different replay layout "
+                                 f"(capacity {file_capacity}, {file_cells} cells)")
+        else:
+            with open(path, "wb") as f:
+                f.write(HEADER.pack(MAGIC, capacity, self.cells, 0, 0).ljust(HEADER_BYTES, b"\0"))
+                f.truncate(size_bytes)
+
+        self._header = np.memmap(path, dtype="<i8", mode="r+", offset=len(MAGIC), shape=(4,))
+        self.records = np.memmap(path, dtype=RECORD_DTYPE, mode="r+", offset=HEADER_BYTES,
+                                 shape=(capacity,))
+        self._index = int(self._header[2])
+        self._size = int(self._header[3])
+
+    @classmethod
+    def open(cls, path: str, cols: int = 7) -> "MemmapReplayBuffer":
+        """Reopen an existing replay file with the capacity and board size in its header"""
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No replay file at {path}")
+        with open(path, "rb") as f:
+            magic, capacity, cells, _, _ = HEADER.unpack(f.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a replay file")
+        if cells % cols:
+            raise ValueError(f"{path} holds {cells}-cell boards, not {cols} columns wide")
+        return cls(path, capacity, cells // cols, cols)
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, state, action, reward, next_state, done):
+        planes = encode_states(np.stack([np.asarray(state).ravel(), np.asarray(next_state).ravel()]))
+        self.records[self._index] = (planes[0], planes[1], action, done, reward)
+        self._advance(1)
+
+    def extend(self, states, actions, rewards, next_states, dones):
+        """Append many transitions with vectorized encoding"""
+        count = len(actions)
+        if count > self.capacity:
+            # Only the newest ``capacity`` transitions would survive anyway
+            start = count - self.capacity
+            return self.extend(states[start:], actions[start:], rewards[start:],
+                               next_states[start:], dones[start:])
+        batch = np.empty(count, dtype=RECORD_DTYPE)
+        batch["state"] = encode_states(states)
+        batch["next_state"] = encode_states(next_states)
+        batch["action"] = actions
+        batch["done"] = dones
+        batch["reward"] = rewards
+
+        first = min(count, self.capacity - self._index)
+        self.records[self._index:self._index + first] = batch[:first]
+        self.records[:count - first] = batch[first:]
+        self._advance(count)
+
+    def _advance(self, count: int):
+        self._index = (self._index + count) % self.capacity
+        self._size = min(self._size + count, self.capacity)
+        self._header[2] = self._index
+        self._header[3] = self._size
+
+    def sample(self, batch_size: int, rng: Optional[np.random.Generator] = None, mirror_prob: float = 0.0
+               ) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """Random (states, actions, rewards, next_states, dones) without replacement
+
+        Each transition is served mirrored with probability ``mirror_prob``.
+        """
+        rng = rng or self.rng
+        if batch_size > self._size:
+            raise ValueError(f"cannot sample {batch_size} of {self._size} transitions")
+        # Sorted indices touch each page once and in file order
+        indices = np.sort(rng.choice(self._size, batch_size, replace=False))
+        batch = self.records[indices]
+        states = decode_states(batch["state"], self.cells)
+        actions = batch["action"].astype(np.int64)
+        next_states = decode_states(batch["next_state"], self.cells)
+        if mirror_prob > 0:
+            mirror_transitions(states, actions, next_states, rng.random(batch_size) < mirror_prob,
+                               self.rows, self.cols)
+        return states, actions, batch["reward"].astype(np.float32), next_states, batch["done"].copy()
+
+    def flush(self):
+        self.records.flush()
+        self._header.flush()
+
+    def close(self):
+        self.flush()
+        del self.records, self._header
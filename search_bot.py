@@ -0,0 +1,208 @@
+"""
+Depth-limited alpha-beta search bot with iterative deepening
+"""
+
+import threading
+import time
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple
+from connect4 import Connect4
+from solver import Position
+
+WIN_SCORE = 100000
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the deadline passes or it is stopped"""
+
+def threat_evaluator(position: Position) -> float:
+    """Static score for the side to move: open threats and center stones"""
+    opponent = position.current ^ position.mask
+    own_threats = position.winning_position().bit_count()
+    opponent_threats = position.opponent_winning_position().bit_count()
+    center = position.column_mask(position.cols // 2)
+    return (4 * (own_threats - opponent_threats)
+            + (position.current & center).bit_count() - (opponent & center).bit_count())
+
+class SearchBot:
+    """Negamax with alpha-beta pruning, a transposition table and a deadline
+
+    ``iterate`` yields the best move after every completed depth, so callers
+    can stop at any time and keep the last answer. With a ``batch_evaluator``
+    (e.g. ``heuristic.evaluate_positions``) all leaves below a depth-1 node
+    are scored in one call.
+    """
+
+    def __init__(self, max_depth: Optional[int] = None, time_limit: Optional[float] = None,
+                 evaluator: Callable[[Position], float] = threat_evaluator,
+                 batch_evaluator: Optional[Callable[[Sequence[Position]], Sequence[float]]] = None,
+                 table_entries: int = 1 << 20):
+        self.max_depth = max_depth
+        self.time_limit = time_limit
+        self.evaluator = evaluator
+        self.batch_evaluator = batch_evaluator
+        self.table_entries = table_entries
+        self.table = {}
+        self.node_count = 0
+        self.last_depth = 0
+        self.last_score = 0.0
+        self._deadline = None
+        self._stop = None
+
+    def get_move(self, game: Connect4, deadline: Optional[float] = None,
+                 stop: Optional[threading.Event] = None) -> int:
+        """Deepen until the depth limit, the time limit, ``deadline`` or ``stop`` is reached"""
+        move, self.last_score, self.last_depth = self.search(Position.from_game(game), deadline, stop)
+        return move
+
+    def snapshot(self):
+        """Last search results, for ``restore`` after a speculative search"""
+        return self.node_count, self.last_depth, self.last_score
+
+    def restore(self, state):
+        self.node_count, self.last_depth, self.last_score = state
+
+    def search(self, position: Position, deadline: Optional[float] = None,
+               stop: Optional[threading.Event] = None) -> Tuple[int, float, int]:
+        if self.time_limit is not None:
+            limit = time.perf_counter() + self.time_limit
+            deadline = limit if deadline is None else min(deadline, limit)
+
+        for result in self.iterate(position, deadline, stop):
+            pass
+        return result
+
+    def iterate(self, position: Position, deadline: Optional[float] = None,
+                stop: Optional[threading.Event] = None) -> Iterator[Tuple[int, float, int]]:
+        """Yield (move, score, depth) after each fully searched depth
+
+        A depth-0 guess, the best-ordered non-losing move, comes first so a
+        search cut short before depth 1 still has a safe answer.
+        """
+        cells = position.rows * position.cols
+        for col in position.valid_moves():
+            if position.is_winning_move(col):
+                yield col, WIN_SCORE - position.moves, 1
+                return
+
+        candidates = position.possible_non_losing_moves()
+        moves = [col for col in position.valid_moves() if candidates & position.column_mask(col)]
+        if len(moves) <= 1:
+            # Forced or lost anyway: nothing to search
+            yield (moves or position.valid_moves())[0], 0.0, 0
+            return
+
+        if len(self.table) > self.table_entries:
+            self.table.clear()
+        best_move = self._order(position, moves)[0]
+        yield best_move, 0.0, 0
+
+        self._deadline = deadline
+        self._stop = stop
+        max_depth = min(self.max_depth or cells, cells - position.moves)
+        for depth in range(1, max_depth + 1):
+            try:
+                best_move, score = self._search_root(position, moves, best_move, depth)
+            except SearchTimeout:
+                return
+            yield best_move, score, depth
+            if abs(score) >= WIN_SCORE - cells:
+                return  # Forced result found, deeper search cannot change it
+
+    def _search_root(self, position: Position, moves, first_move: int, depth: int) -> Tuple[int, float]:
+        ordered = [first_move] + [col for col in self._order(position, moves) if col != first_move]
+        alpha, beta = -float('inf'), float('inf')
+        best_move = first_move
+        for col in ordered:
+            child = position.copy()
+            child.play(col)
+            score = -self.negamax(child, depth - 1, -beta, -alpha)
+            if score > alpha:
+                alpha, best_move = score, col
+        return best_move, alpha
+
+    def _order(self, position: Position, moves):
+        center = position.cols // 2
+        moves = sorted(moves, key=lambda col: abs(col - center))
+        scores = {col: position.move_score((position.mask + position.bottom_mask_col(col))
+                                           & position.column_mask(col)) for col in moves}
+        return sorted(moves, key=lambda col: -scores[col])
+
+    def negamax(self, position: Position, depth: int, alpha: float, beta: float) -> float:
+        self.node_count += 1
+        if self.node_count & 1023 == 0 and (
+                (self._deadline is not None and time.perf_counter() >= self._deadline)
+                or (self._stop is not None and self._stop.is_set())):
+            raise SearchTimeout()
+
+        cells = position.rows * position.cols
+        if position.can_win_next():
+            return WIN_SCORE - position.moves - 1
+        if position.moves >= cells - 1:
+            return 0.0
+        next_moves = position.possible_non_losing_moves()
+        if next_moves == 0:
+            return -(WIN_SCORE - position.moves - 2)
+        if depth <= 0:
+            return self.evaluator(position)
+        if depth == 1 and self.batch_evaluator is not None:
+            return self._evaluate_frontier(position, next_moves)
+
+        key = position.key()
+        entry = self.table.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, lower, upper, tt_move = entry
+            if entry_depth >= depth:
+                if lower >= beta:
+                    return lower
+                if upper <= alpha:
+                    return upper
+                alpha, beta = max(alpha, lower), min(beta, upper)
+
+        moves = [col for col in self._order(position, range(position.cols))
+                 if next_moves & position.column_mask(col)]
+        if tt_move in moves:
+            moves.remove(tt_move)
+            moves.insert(0, tt_move)
+
+        original_alpha = alpha
+        best, best_move = -float('inf'), moves[0]
+        for col in moves:
+            child = position.copy()
+            child.play(col)
+            score = -self.negamax(child, depth - 1, -beta, -alpha)
+            if score > best:
+                best, best_move = score, col
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                break
+
+        lower = best if best > original_alpha else -float('inf')
+        upper = best if best < beta else float('inf')
+        self.table[key] = (depth, lower, upper, best_move)
+        return best
+
+    def _evaluate_frontier(self, position: Position, next_moves: int) -> float:
+        """Score every child of a depth-1 node, batching the static evaluations"""
+        cells = position.rows * position.cols
+        best = -float('inf')
+        pending: List[Position] = []
+        for col in range(position.cols):
+            move = next_moves & position.column_mask(col)
+            if not move:
+                continue
+            child = position.copy()
+            child.play_bit(move)
+            self.node_count += 1
+            # Same tactical checks negamax does before evaluating a leaf
+            if child.can_win_next():
+                best = max(best, -(WIN_SCORE - child.moves - 1))
+            elif child.moves >= cells - 1:
+                best = max(best, 0.0)
+            elif child.possible_non_losing_moves() == 0:
+                best = max(best, WIN_SCORE - child.moves - 2)
+            else:
+                pending.append(child)
+        if pending:
+            best = max(best, -float(min(self.batch_evaluator(pending))))
+        return best
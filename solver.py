@@ -0,0 +1,340 @@
+"""
+Exact Connect 4 solver on bitboards.
+
+Positions are stored column-major with one spare bit on top of every column,
+so a board of ``rows x cols`` uses ``cols * (rows + 1)`` bits. ``current``
+holds the stones of the side to move and ``mask`` holds every stone.
+"""
+
+from typing import List, Optional, Tuple
+from connect4 import Connect4, Player
+from connect4_board import Connect4Board
+
+
+def column_order(cols: int) -> List[int]:
+    """Columns center first, the order the solver explores moves in"""
+    return [cols // 2 + (1 - 2 * (i % 2)) * ((i + 1) // 2) for i in range(cols)]
+
+
+class Position:
+    """Bitboard Connect 4 position"""
+
+    def __init__(self, rows: int = 6, cols: int = 7):
+        self.rows = rows
+        self.cols = cols
+        self.height = rows + 1
+        self.current = 0
+        self.mask = 0
+        self.moves = 0
+
+        self.bottom_mask = 0
+        for col in range(cols):
+            self.bottom_mask |= 1 << (col * self.height)
+        self.board_mask = self.bottom_mask * ((1 << rows) - 1)
+
+    def copy(self) -> "Position":
+        new_position = Position.__new__(Position)
+        new_position.__dict__.update(self.__dict__)
+        return new_position
+
+    @classmethod
+    def from_moves(cls, moves: str, rows: int = 6, cols: int = 7) -> "Position":
+        """Build a position from a move string of 1-based columns, e.g. "4453" """
+        position = cls(rows, cols)
+        for char in moves.strip():
+            col = int(char) - 1
+            if not position.can_play(col) or position.is_winning_move(col):
+                raise ValueError(f"Invalid move sequence: {moves}")
+            position.play(col)
+        return position
+
+    @classmethod
+    def from_game(cls, game: Connect4) -> "Position":
+        """Build a position from a Connect4 game (row 0 is the top row)"""
+        position = cls(game.rows, game.cols)
+        player1 = 0
+        for row in range(game.rows):
+            for col in range(game.cols):
+                cell = game.board[row][col]
+                if cell != Player.EMPTY:
+                    bit = 1 << (col * position.height + game.rows - 1 - row)
+                    position.mask |= bit
+                    position.moves += 1
+                    if cell == Player.HUMAN:
+                        player1 |= bit
+        position.current = player1 if game.current_player == Player.HUMAN else position.mask ^ player1
+        return position
+
+    @classmethod
+    def from_board(cls, board: Connect4Board) -> "Position":
+        """Build a position from a Connect4Board (player 1 is 1, player 2 is 2)"""
+        position = cls(board.rows, board.cols)
+        player1 = 0
+        for row in range(board.rows):
+            for col in range(board.cols):
+                if board.board[row][col] != 0:
+                    bit = 1 << (col * position.height + board.rows - 1 - row)
+                    position.mask |= bit
+                    position.moves += 1
+                    if board.board[row][col] == 1:
+                        player1 |= bit
+        position.current = player1 if board.current_player == 1 else position.mask ^ player1
+        return position
+
+    @classmethod
+    def from_state(cls, state) -> "Position":
+        """Build a position from a DQN state array (+1 player 1, -1 player 2)"""
+        rows, cols = len(state), len(state[0])
+        position = cls(rows, cols)
+        player1 = 0
+        for row in range(rows):
+            for col in range(cols):
+                if state[row][col] != 0:
+                    bit = 1 << (col * position.height + rows - 1 - row)
+                    position.mask |= bit
+                    position.moves += 1
+                    if state[row][col] > 0:
+                        player1 |= bit
+        # Player 1 always moves first, so parity tells whose turn it is
+        position.current = player1 if position.moves % 2 == 0 else position.mask ^ player1
+        return position
+
+    def player1_stones(self) -> int:
+        return self.current if self.moves % 2 == 0 else self.current ^ self.mask
+
+    def top_mask(self, col: int) -> int:
+        return 1 << (self.rows - 1 + col * self.height)
+
+    def bottom_mask_col(self, col: int) -> int:
+        return 1 << (col * self.height)
+
+    def column_mask(self, col: int) -> int:
+        return ((1 << self.rows) - 1) << (col * self.height)
+
+    def can_play(self, col: int) -> bool:
+        return 0 <= col < self.cols and (self.mask & self.top_mask(col)) == 0
+
+    def play(self, col: int):
+        self.play_bit((self.mask + self.bottom_mask_col(col)) & self.column_mask(col))
+
+    def play_bit(self, move: int):
+        self.current ^= self.mask
+        self.mask |= move
+        self.moves += 1
+
+    def is_winning_move(self, col: int) -> bool:
+        return bool(self.winning_position() & self.possible() & self.column_mask(col))
+
+    def can_win_next(self) -> bool:
+        return bool(self.winning_position() & self.possible())
+
+    def possible(self) -> int:
+        return (self.mask + self.bottom_mask) & self.board_mask
+
+    def winning_position(self) -> int:
+        return winning_cells(self.current, self.mask, self.height, self.board_mask)
+
+    def opponent_winning_position(self) -> int:
+        return winning_cells(self.current ^ self.mask, self.mask, self.height, self.board_mask)
+
+    def possible_non_losing_moves(self) -> int:
+        """Moves that do not let the opponent win on the spot (assumes no immediate win)"""
+        possible_mask = self.possible()
+        opponent_win = self.opponent_winning_position()
+        forced_moves = possible_mask & opponent_win
+        if forced_moves:
+            if forced_moves & (forced_moves - 1):
+                return 0  # Two forced moves, the opponent wins anyway
+            possible_mask = forced_moves
+        return possible_mask & ~(opponent_win >> 1)
+
+    def move_score(self, move: int) -> int:
+        """Number of winning cells created by a move, used for move ordering"""
+        return winning_cells(self.current | move, self.mask, self.height, self.board_mask).bit_count()
+
+    def valid_moves(self) -> List[int]:
+        return [col for col in range(self.cols) if self.can_play(col)]
+
+    def key(self) -> int:
+        return self.current + self.mask
+
+    def mirror_key(self) -> int:
+        return mirror_bits(self.current, self.cols, self.height) + mirror_bits(self.mask, self.cols, self.height)
+
+    def canonical_key(self) -> int:
+        return min(self.key(), self.mirror_key())
+
+    def to_state(self):
+        """DQN state array (+1 player 1, -1 player 2, row 0 is the top row)"""
+        import numpy as np
+        state = np.zeros((self.rows, self.cols), dtype=np.float32)
+        player1 = self.player1_stones()
+        for col in range(self.cols):
+            for row in range(self.rows):
+                bit = 1 << (col * self.height + row)
+                if self.mask & bit:
+                    state[self.rows - 1 - row][col] = 1.0 if player1 & bit else -1.0
+        return state
+
+
+def winning_cells(position: int, mask: int, height: int, board_mask: int) -> int:
+    """Empty cells that would complete four in a row for ``position``"""
+    # Vertical
+    r = (position << 1) & (position << 2) & (position << 3)
+
+    # Horizontal and both diagonals
+    for shift in (height, height - 1, height + 1):
+        p = (position << shift) & (position << 2 * shift)
+        r |= p & (position << 3 * shift)
+        r |= p & (position >> shift)
+        p = (position >> shift) & (position >> 2 * shift)
+        r |= p & (position << shift)
+        r |= p & (position >> 3 * shift)
+
+    return r & (board_mask ^ mask)
+
+
+def mirror_bits(bits: int, cols: int, height: int) -> int:
+    column = (1 << height) - 1
+    mirrored = 0
+    for col in range(cols):
+        mirrored |= ((bits >> (col * height)) & column) << ((cols - 1 - col) * height)
+    return mirrored
+
+
+class TranspositionTable:
+    """Fixed-size table of score bounds indexed by position key"""
+
+    def __init__(self, size: int = (1 << 20) + 7):
+        self.size = size
+        self.keys = [0] * size
+        self.values = [0] * size
+
+    def put(self, key: int, value: int):
+        index = key % self.size
+        self.keys[index] = key
+        self.values[index] = value
+
+    def get(self, key: int) -> int:
+        index = key % self.size
+        return self.values[index] if self.keys[index] == key else 0
+
+    def reset(self):
+        self.keys = [0] * self.size
+        self.values = [0] * self.size
+
+
+class Solver:
+    """Negamax solver with alpha-beta pruning and a transposition table
+
+    Scores follow the usual convention: positive if the side to move wins,
+    and the further from zero the sooner the game ends.
+    """
+
+    def __init__(self, table: Optional[TranspositionTable] = None):
+        self.table = table if table is not None else TranspositionTable()
+        self.node_count = 0
+
+    def reset(self):
+        self.node_count = 0
+        self.table.reset()
+
+    def _column_order(self, cols: int) -> List[int]:
+        return column_order(cols)
+
+    def negamax(self, position: Position, alpha: int, beta: int) -> int:
+        self.node_count += 1
+        cells = position.rows * position.cols
+
+        next_moves = position.possible_non_losing_moves()
+        if next_moves == 0:
+            return -((cells - position.moves) // 2)
+        if position.moves >= cells - 2:
+            return 0
+
+        min_score = -((cells - 2 - position.moves) // 2)
+        if alpha < min_score:
+            alpha = min_score
+            if alpha >= beta:
+                return alpha
+
+        max_score = (cells - 1 - position.moves) // 2
+        key = position.key()
+        value = self.table.get(key)
+        if value:
+            max_score = value + self._min_score(position) - 1
+        if beta > max_score:
+            beta = max_score
+            if alpha >= beta:
+                return beta
+
+        candidates = []
+        for col in self._column_order(position.cols):
+            move = next_moves & position.column_mask(col)
+            if move:
+                candidates.append((position.move_score(move), len(candidates), move))
+        candidates.sort(key=lambda c: (-c[0], c[1]))
+
+        for _, _, move in candidates:
+            child = position.copy()
+            child.play_bit(move)
+            score = -self.negamax(child, -beta, -alpha)
+            if score >= beta:
+                return score
+            if score > alpha:
+                alpha = score
+
+        self.table.put(key, alpha - self._min_score(position) + 1)
+        return alpha
+
+    def _min_score(self, position: Position) -> int:
+        return -((position.rows * position.cols) // 2) + 3
+
+    def solve(self, position: Position, weak: bool = False) -> int:
+        """Exact score of a position (or only its sign if ``weak``)"""
+        cells = position.rows * position.cols
+        if position.can_win_next():
+            return (cells + 1 - position.moves) // 2
+
+        lower = -((cells - position.moves) // 2)
+        upper = (cells + 1 - position.moves) // 2
+        if weak:
+            lower, upper = -1, 1
+
+        # Iteratively narrow the window with null-window searches
+        while lower < upper:
+            middle = lower + (upper - lower) // 2
+            if middle <= 0 and int(lower / 2) < middle:
+                middle = int(lower / 2)
+            elif middle >= 0 and upper // 2 > middle:
+                middle = upper // 2
+            result = self.negamax(position, middle, middle + 1)
+            if result <= middle:
+                upper = result
+            else:
+                lower = result
+        return lower
+
+    def analyze(self, position: Position, weak: bool = False) -> List[Optional[int]]:
+        """Score of every column from the side to move's view (None if unplayable)"""
+        cells = position.rows * position.cols
+        scores: List[Optional[int]] = [None] * position.cols
+        for col in range(position.cols):
+            if not position.can_play(col):
+                continue
+            if position.is_winning_move(col):
+                scores[col] = (cells + 1 - position.moves) // 2
+            else:
+                child = position.copy()
+                child.play(col)
+                scores[col] = -self.solve(child, weak)
+        return scores
+
+    def best_move(self, position: Position, weak: bool = False) -> Tuple[int, int]:
+        """Best column and its score, preferring center columns on ties"""
+        scores = self.analyze(position, weak)
+        best_col, best_score = -1, None
+        for col in self._column_order(position.cols):
+            if scores[col] is not None and (best_score is None or scores[col] > best_score):
+                best_col, best_score = col, scores[col]
+        return best_col, best_score
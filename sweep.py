@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Hyperparameter sweeps over train_dqn with successive halving
+
+Trials run in a process pool, each with a fixed torch thread budget. Every
+rung trains the surviving trials up to a larger episode budget (continuing
+from their checkpoints and replay files), scores them against a random
+opponent and keeps the best 1/eta. Each finished trial rung is appended
+to metrics.jsonl as soon as it completes.
+"""
+
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List, Optional
+import numpy as np
+import torch
+from dqn_agent import DQNAgent
+from train_dqn import train_dqn, play_against_random
+
+AGENT_KEYS = {"lr", "gamma", "epsilon", "epsilon_min", "epsilon_decay", "memory_size", "batch_size"}
+
+DEFAULT_SPACE = {
+    "lr": [1e-4, 3e-4, 1e-3],
+    "gamma": [0.9, 0.95, 0.99],
+    "epsilon_decay": [0.99, 0.995, 0.999],
+    "batch_size": [32, 64, 128],
+    "target_update_freq": [50, 100, 200],
+}
+
+def grid_configs(space: Dict[str, list]) -> List[dict]:
+    keys = sorted(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+def random_configs(space: Dict[str, object], count: int, seed: int = 0) -> List[dict]:
+    """Lists are sampled uniformly, {"low", "high", "log"} dicts as ranges"""
+    rng = np.random.default_rng(seed)
+    configs = []
+    for _ in range(count):
+        config = {}
+        for key in sorted(space):
+            values = space[key]
+            if isinstance(values, dict):
+                low, high = values["low"], values["high"]
+                if values.get("log"):
+                    value = float(math.exp(rng.uniform(math.log(low), math.log(high))))
+                else:
+                    value = float(rng.uniform(low, high))
+                config[key] = int(round(value)) if isinstance(low, int) and isinstance(high, int) else value
+            else:
+                config[key] = values[int(rng.integers(len(values)))]
+        configs.append(config)
+    return configs
+
+def run_trial(trial_id: int, config: dict, episodes: int, trained: int, output_dir: str,
+              threads: int, eval_games: int, seed: int) -> dict:
+    """Train one trial from ``trained`` up to ``episodes`` episodes and score it"""
+    torch.set_num_threads(threads)
+    random.seed(seed + trial_id)
+    np.random.seed(seed + trial_id)
+    torch.manual_seed(seed + trial_id)
+
+    start_time = time.perf_counter()
+    agent_kwargs = {key: value for key, value in config.items() if key in AGENT_KEYS}
+    prefix = os.path.join(output_dir, f"trial_{trial_id:04d}")
+    agents = []
+    for seat in (1, 2):
+        # File-backed replay keeps each trial's experience across rungs
+        agent = DQNAgent(replay_backend="memmap", replay_path=f"{prefix}_replay{seat}.c4r", **agent_kwargs)
+        if trained:
+            agent.load(f"{prefix}_agent{seat}.pth")
+        elif len(agent.memory):
+            raise ValueError(f"{prefix}_replay{seat}.c4r is left over from an earlier sweep")
+        agents.append(agent)
+
+    _, _, scores = train_dqn(episodes - trained, config.get("target_update_freq", 100), save_freq=0,
+                             agents=tuple(agents))
+
+    epsilon = agents[0].epsilon
+    agents[0].epsilon = 0.0
+    win_rate = play_against_random(agents[0], eval_games, verbose=False, seed=seed + trial_id)
+    agents[0].epsilon = epsilon
+    for seat, agent in zip((1, 2), agents):
+        agent.save(f"{prefix}_agent{seat}.pth")
+        agent.memory.flush()
+
+    return {"trial": trial_id, "config": config, "episodes": episodes, "win_rate": win_rate,
+            "mean_score": float(np.mean(scores)) if scores else 0.0, "epsilon": epsilon,
+            "seconds": time.perf_counter() - start_time}
+
+def successive_halving(configs: List[dict], output_dir: str, min_episodes: int = 100,
+                       max_episodes: int = 900, eta: int = 3, workers: Optional[int] = None,
+                       threads_per_trial: Optional[int] = None, eval_games: int = 50,
+                       seed: int = 0) -> List[dict]:
+    """Run the sweep; returns the last result of every trial, best first"""
+    os.makedirs(output_dir, exist_ok=True)
+    cpus = os.cpu_count() or 1
+    workers = workers or min(cpus, len(configs))
+    # Split the cores between concurrent trials instead of letting each grab all of them
+    threads_per_trial = threads_per_trial or max(1, cpus // workers)
+    metrics_path = os.path.join(output_dir, "metrics.jsonl")
+
+    latest: Dict[int, dict] = {}
+    trained = {trial_id: 0 for trial_id in range(len(configs))}
+    active = list(trained)
+    episodes = min(min_episodes, max_episodes)
+    rung = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor, open(metrics_path, "a") as metrics:
+        while active:
+            print(f"Rung {rung}: {len(active)} trial(s) at {episodes} episodes")
+            futures = [executor.submit(run_trial, trial_id, configs[trial_id], episodes, trained[trial_id],
+                                       output_dir, threads_per_trial, eval_games, seed)
+                       for trial_id in active]
+            for future in as_completed(futures):
+                result = dict(future.result(), rung=rung)
+                latest[result["trial"]] = result
+                trained[result["trial"]] = episodes
+                metrics.write(json.dumps(result) + "\n")
+                metrics.flush()
+                print(f"  trial {result['trial']:4d}: win rate {result['win_rate']:.2f} "
+                      f"({result['seconds']:.1f}s)")
+
+            if episodes >= max_episodes or len(active) <= 1:
+                break
+            ranked = sorted(active, key=lambda trial_id: -latest[trial_id]["win_rate"])
+            active = ranked[:max(1, len(active) // eta)]
+            episodes = min(episodes * eta, max_episodes)
+            rung += 1
+
+    return sorted(latest.values(), key=lambda result: (-result["rung"], -result["win_rate"]))
+
+def print_table(results: List[dict]):
+    keys = sorted({key for result in results for key in result["config"]})
+    header = f"{'rank':>4s} {'trial':>5s} {'rung':>4s} {'episodes':>8s} {'win':>5s}  " \
+        + " ".join(f"{key:>18s}" for key in keys)
+    print(header)
+    print("-" * len(header))
+    for rank, result in enumerate(results, 1):
+        values = " ".join(f"{str(result['config'].get(key, '')):>18s}" for key in keys)
+        print(f"{rank:4d} {result['trial']:5d} {result['rung']:4d} {result['episodes']:8d} "
+              f"{result['win_rate']:5.2f}  {values}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Sweep train_dqn hyperparameters")
+    parser.add_argument("--space", type=str, default=None, help="JSON search space (default: built-in)")
+    parser.add_argument("--mode", choices=["grid", "random"], default="random", help="Search strategy")
+    parser.add_argument("--trials", type=int, default=27, help="Trials for random search")
+    parser.add_argument("--min-episodes", type=int, default=100, help="Episodes at the first rung")
+    parser.add_argument("--max-episodes", type=int, default=2700, help="Episodes at the last rung")
+    parser.add_argument("--eta", type=int, default=3, help="Keep 1/eta of the trials per rung")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent trials (default: all cores)")
+    parser.add_argument("--threads-per-trial", type=int, default=None, help="Torch threads per trial")
+    parser.add_argument("--eval-games", type=int, default=50, help="Games against random per evaluation")
+    parser.add_argument("--output", type=str, default="sweeps/latest", help="Output directory")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+
+    args = parser.parse_args()
+
+    space = DEFAULT_SPACE
+    if args.space:
+        with open(args.space) as f:
+            space = json.load(f)
+    configs = grid_configs(space) if args.mode == "grid" else random_configs(space, args.trials, args.seed)
+
+    results = successive_halving(configs, args.output, args.min_episodes, args.max_episodes, args.eta,
+                                 args.workers, args.threads_per_trial, args.eval_games, args.seed)
+    print()
+    print_table(results)
+    print(f"\n✅ Metrics written to {os.path.join(args.output, 'metrics.jsonl')}")
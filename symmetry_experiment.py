@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Measure how mirror augmentation changes the episodes needed to beat a random player
+"""
+
+import random
+import numpy as np
+import torch
+from train_dqn import episodes_to_win_rate
+
+def run_experiment(mirror_probs=(0.0, 0.5), seeds=(0, 1, 2), target=0.9, eval_every=100,
+                   eval_games=100, max_episodes=5000) -> dict:
+    results = {}
+    for mirror_prob in mirror_probs:
+        episodes = []
+        for seed in seeds:
+            random.seed(seed)
+            np.random.seed(seed)
+            torch.manual_seed(seed)
+            needed = episodes_to_win_rate(target, {"mirror_prob": mirror_prob}, eval_every,
+                                          eval_games, max_episodes)
+            episodes.append(needed)
+            print(f"mirror_prob={mirror_prob} seed={seed}: "
+                  f"{needed if needed is not None else f'>{max_episodes}'} episodes")
+        results[mirror_prob] = episodes
+    return results
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Episodes to a target win rate with and without mirroring")
+    parser.add_argument("--target", type=float, default=0.9, help="Win rate against random to reach")
+    parser.add_argument("--seeds", type=int, default=3, help="Runs per setting")
+    parser.add_argument("--mirror-prob", type=float, default=0.5, help="Mirror probability to compare with 0")
+    parser.add_argument("--eval-every", type=int, default=100, help="Episodes between evaluations")
+    parser.add_argument("--eval-games", type=int, default=100, help="Games per evaluation")
+    parser.add_argument("--max-episodes", type=int, default=5000, help="Give up after this many episodes")
+
+    args = parser.parse_args()
+
+    results = run_experiment((0.0, args.mirror_prob), range(args.seeds), args.target, args.eval_every,
+                             args.eval_games, args.max_episodes)
+    print()
+    for mirror_prob, episodes in results.items():
+        # Runs that never reach the target count as the episode cap
+        capped = [needed if needed is not None else args.max_episodes for needed in episodes]
+        print(f"mirror_prob={mirror_prob}: median {int(np.median(capped))} episodes to "
+              f"{args.target:.0%} ({sum(needed is None for needed in episodes)} run(s) capped)")
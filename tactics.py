@@ -0,0 +1,70 @@
+"""
+Bitboard tactics in front of the network: take wins, block threats, avoid blunders
+"""
+
+from typing import List, Optional, Tuple
+from solver import Position
+
+class TacticsCounter:
+    """How often the tactical layer answered without a forward pass"""
+
+    def __init__(self):
+        self.queries = 0
+        self.wins = 0
+        self.blocks = 0
+        self.forced = 0
+        self.masked = 0
+
+    @property
+    def skipped(self) -> int:
+        return self.wins + self.blocks + self.forced
+
+    def skip_rate(self) -> float:
+        return self.skipped / self.queries if self.queries else 0.0
+
+    def summary(self) -> str:
+        return (f"queries={self.queries} skipped={self.skipped} ({self.skip_rate():.1%}): "
+                f"wins={self.wins} blocks={self.blocks} forced={self.forced} "
+                f"masked_blunders={self.masked}")
+
+def tactical_move(position: Position, counter: Optional[TacticsCounter] = None
+                  ) -> Tuple[Optional[int], List[bool]]:
+    """(move to play without the network or None, columns the network may choose)
+
+    An immediate win is taken, a single opponent threat is blocked, and moves
+    that let the opponent win on the spot are masked out unless every move does.
+    """
+    if counter is not None:
+        counter.queries += 1
+    valid = [position.can_play(col) for col in range(position.cols)]
+    possible = position.possible()
+
+    winning = position.winning_position() & possible
+    if winning:
+        if counter is not None:
+            counter.wins += 1
+        return _first_column(position, winning), valid
+
+    threats = position.opponent_winning_position() & possible
+    non_losing = position.possible_non_losing_moves()
+    if threats and not threats & (threats - 1):
+        if counter is not None:
+            counter.blocks += 1
+        return _first_column(position, threats), valid
+
+    allowed = [bool(non_losing & position.column_mask(col)) for col in range(position.cols)]
+    if not any(allowed):
+        return None, valid  # Lost whatever we play, let the network pick
+    if sum(allowed) == 1:
+        if counter is not None:
+            counter.forced += 1
+        return allowed.index(True), allowed
+    if counter is not None and allowed != valid:
+        counter.masked += 1
+    return None, allowed
+
+def _first_column(position: Position, moves: int) -> int:
+    for col in range(position.cols):
+        if moves & position.column_mask(col):
+            return col
+    raise ValueError("empty move mask")
@@ -3,7 +3,41 @@ import numpy as np
 import torch
 from connect4_board import Connect4Board
 from dqn_agent import DQNAgent, Connect4Environment, DQN
+from connect4 import Connect4, GameResult, Player
+from solver import Position, Solver
+from generate_dataset import generate_dataset, load_dataset, sample_position, check_games
+from opening_book import build_book, enumerate_positions, OpeningBook, BookBot
+from mcts_bot import MCTSBot
+from search_bot import SearchBot
+from timed_bot import TimedBot, LatencyHistogram
+from pondering import PonderingBot
+from eval_cache import EvaluationCache
+from dqn_agent import DQNBot
+from benchmark import compare
+from perft import run_perft, REFERENCE, ENGINES, perft
+from heuristic import line_indices, evaluate_boards, evaluate_positions, HeuristicBot
+from renderer import TerminalRenderer
+from game_server import GameServer
+from distributed import Learner, run_actor, pack_transitions, unpack_transitions
+from sweep import grid_configs, random_configs, successive_halving
+from distill import train_student, move_agreement, play_match, positions_from_self_play, positions_from_replay
+from tactics import tactical_move, TacticsCounter
+from parallel_solver import ParallelSolver, SharedTranspositionTable
+from opponents import (OPPONENTS, CenterWeightedPolicy, GreedyPolicy, HeuristicPolicy, UniformPolicy,
+                       play_games, valid_masks, winning_moves)
+from eval_daemon import EvalDaemon, win_rate_curve
+from position_stats import PositionStats, boards_from_keys, game_keys, moves_from_records
+from episodes import EpisodeBuffer, n_step_returns
+from replay_storage import MemmapReplayBuffer, encode_states, decode_states, mirror_transitions
+import asyncio
+import json
+import io
+import socket
+import threading
+import time
 import os
+import shutil
+import tempfile
 
 class TestConnect4Board(unittest.TestCase):
     def setUp(self):
@@ -208,6 +242,1203 @@ class TestGameplay(unittest.TestCase):
         # Game should end within 42 moves
         self.assertLessEqual(moves, max_moves)
 
+class TestSolver(unittest.TestCase):
+    def setUp(self):
+        self.solver = Solver()
+
+    def test_known_scores(self):
+        # Reference scores from the standard end-game benchmark set
+        cases = [("2252576253462244111563365343671351441", -1),
+                 ("7422341735647741166133573473242566", 1),
+                 ("23163416124767223154467471272416755633", 0)]
+        for moves, expected in cases:
+            self.assertEqual(self.solver.solve(Position.from_moves(moves)), expected)
+
+    def test_from_game_matches_moves(self):
+        game = Connect4()
+        for col in [3, 3, 4, 2]:
+            game.make_move(col, game.current_player)
+        self.assertEqual(Position.from_game(game).key(), Position.from_moves("4453").key())
+
+    def test_best_move_matches_solve(self):
+        position = Position.from_moves("7422341735647741166133573473242566")
+        col, score = self.solver.best_move(position)
+        self.assertEqual(score, self.solver.solve(position))
+        child = position.copy()
+        child.play(col)
+        self.assertEqual(-self.solver.solve(child), score)
+
+    def test_mirror_key(self):
+        self.assertEqual(Position.from_moves("1").mirror_key(), Position.from_moves("7").key())
+
+class TestDatasetGeneration(unittest.TestCase):
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.output_dir)
+
+    def test_generate_and_resume(self):
+        results = generate_dataset(self.output_dir, num_chunks=2, chunk_size=3,
+                                   min_ply=28, max_ply=32, workers=1)
+        self.assertEqual(len(results), 2)
+
+        data = load_dataset(self.output_dir)
+        self.assertEqual(data["states"].shape, (6, 6, 7))
+        self.assertTrue(np.all(data["move_scores"].max(axis=1) == data["values"]))
+
+        # Finished chunks are not solved again
+        self.assertEqual(generate_dataset(self.output_dir, num_chunks=2, chunk_size=3,
+                                          min_ply=28, max_ply=32, workers=1), [])
+
+    def test_sample_position_rejects_impossible_requests(self):
+        import random
+        rng = random.Random(0)
+        game, sequence = sample_position(rng, 3, 3, games=["4453", "4444"])
+        self.assertEqual(len(sequence), 3)
+        # A full 4x4 board always ends the game
+        with self.assertRaises(ValueError):
+            sample_position(rng, 16, 16, rows=4, cols=4, max_attempts=50)
+        for record in ["4448", "44x3"]:
+            with self.assertRaises(ValueError):
+                sample_position(rng, 4, 4, games=[record])
+        check_games(["4453", "1212121"])
+        for record in ["1111111", "44x3", "12121212"]:
+            with self.assertRaises(ValueError):
+                check_games([record])
+
+class TestOpeningBook(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.output_dir = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.output_dir, "book.bin")
+        build_book(cls.path, max_ply=2, rows=4, cols=4, workers=1)
+        cls.book = OpeningBook(cls.path)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.book.close()
+        shutil.rmtree(cls.output_dir)
+
+    def test_lookup_matches_solver(self):
+        solver = Solver()
+        for moves in ["", "1", "4", "12", "43", "22"]:
+            position = Position.from_moves(moves, rows=4, cols=4)
+            col, score = self.book.lookup(position)
+            self.assertEqual(score, solver.solve(position))
+            child = position.copy()
+            child.play(col)
+            self.assertEqual(-solver.solve(child), score)
+
+    def test_derived_entries_match_solver(self):
+        solver = Solver()
+        path = os.path.join(self.output_dir, "weak.bin")
+        build_book(path, max_ply=3, rows=4, cols=4, workers=1, weak=True)
+        weak_book = OpeningBook(path)
+        for position in enumerate_positions(2, rows=4, cols=4):
+            self.assertEqual(self.book.lookup(position), solver.best_move(position))
+            col, score = solver.best_move(position, weak=True)
+            self.assertEqual(weak_book.lookup(position), (col, max(-1, min(1, score))))
+        weak_book.close()
+
+    def test_positions_past_book_depth_miss(self):
+        self.assertIsNone(self.book.lookup(Position.from_moves("123", rows=4, cols=4)))
+        self.assertIsNone(self.book.lookup(Position.from_moves("1")))
+
+    def test_book_bot_falls_back(self):
+        class FixedBot:
+            def get_move(self, game):
+                return 3
+
+        bot = BookBot(FixedBot(), self.book)
+        game = Connect4(4, 4)
+        bot.get_move(game)
+        for col in [0, 1, 2]:
+            game.make_move(col, game.current_player)
+        self.assertEqual(bot.get_move(game), 3)
+        self.assertEqual((bot.book_hits, bot.book_misses), (1, 1))
+        with self.assertRaises(ValueError):
+            bot.get_move(Connect4())
+
+class TestMCTSBot(unittest.TestCase):
+    def setUp(self):
+        self.bot = MCTSBot(DQNAgent(), simulations=64, batch_size=8)
+
+    def test_takes_immediate_win(self):
+        game = Connect4()
+        for col in [0, 1, 0, 1, 0, 1]:
+            game.make_move(col, game.current_player)
+        self.assertEqual(self.bot.get_move(game), 0)
+        self.assertGreater(self.bot.simulations_per_second, 0)
+
+    def test_reuses_tree_between_moves(self):
+        game = Connect4()
+        move = self.bot.get_move(game)
+        game.make_move(move, game.current_player)
+        reply = next(child for child in self.bot.root.children if child.move == 2)
+        game.make_move(2, game.current_player)
+        self.assertGreater(reply.visits, 0)
+        self.assertIs(self.bot._find_root(Position.from_game(game)), reply)
+
+    def test_batches_leaf_evaluations(self):
+        self.bot.get_move(Connect4())
+        self.assertLess(self.bot.forward_passes, self.bot.last_simulations)
+
+    def test_time_only_budget(self):
+        bot = MCTSBot(DQNAgent(), simulations=None, time_limit=0.05, batch_size=8)
+        start_time = time.perf_counter()
+        self.assertIn(bot.get_move(Connect4()), range(7))
+        self.assertLess(time.perf_counter() - start_time, 1.0)
+        self.assertGreater(bot.last_simulations, 0)
+        with self.assertRaises(ValueError):
+            MCTSBot(DQNAgent(), simulations=None).get_move(Connect4())
+
+class TestSearchBot(unittest.TestCase):
+    def test_blocks_immediate_threat(self):
+        game = Connect4()
+        for col in [0, 6, 0, 6, 0]:
+            game.make_move(col, game.current_player)
+        self.assertEqual(SearchBot(max_depth=4).get_move(game), 0)
+
+    def test_iterative_deepening(self):
+        depths = [depth for _, _, depth in SearchBot(max_depth=3).iterate(Position())]
+        self.assertEqual(depths, [0, 1, 2, 3])
+
+    def test_deadline_stops_search(self):
+        bot = SearchBot()
+        start_time = time.perf_counter()
+        move = bot.get_move(Connect4(), deadline=start_time + 0.1)
+        self.assertLess(time.perf_counter() - start_time, 1.0)
+        self.assertIn(move, range(7))
+
+    def test_expired_deadline_plays_non_losing_move(self):
+        game = Connect4()
+        for col in [5, 3, 2, 2, 2, 3, 1, 1]:
+            game.make_move(col, game.current_player)
+        bot = SearchBot()
+        bot.node_count = 1023  # Time is checked on the very first node
+        move = bot.get_move(game, deadline=time.perf_counter())
+        self.assertEqual(bot.last_depth, 0)
+        self.assertIn(move, [1, 2, 3, 5, 6])  # Columns 0 and 4 hand the opponent a win
+
+class TestTimedBot(unittest.TestCase):
+    def test_anytime_bot_meets_deadline(self):
+        bot = TimedBot(MCTSBot(DQNAgent(), simulations=10 ** 9), deadline_ms=100)
+        game = Connect4()
+        for _ in range(3):
+            game.make_move(bot.get_move(game), game.current_player)
+        self.assertEqual(bot.histogram.count, 3)
+        self.assertLess(bot.histogram.max_ms, 300)
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for latency_ms in [1, 1, 1, 1, 1, 1, 1, 1, 1, 40]:
+            histogram.record(latency_ms)
+        self.assertEqual(histogram.percentile(50), 1)
+        self.assertEqual(histogram.percentile(100), 40)
+        self.assertAlmostEqual(histogram.fraction_over(25), 0.1)
+
+class TestPonderingBot(unittest.TestCase):
+    class SlowBot:
+        def __init__(self):
+            self.calls = 0
+
+        def get_move(self, game):
+            self.calls += 1
+            time.sleep(0.01)
+            return game.get_valid_moves()[0]
+
+    def test_reply_is_precomputed(self):
+        slow_bot = self.SlowBot()
+        bot = PonderingBot(slow_bot)
+        game = Connect4()
+        bot.start_pondering(game)
+        bot._thread.join()
+        self.assertEqual(slow_bot.calls, 7)
+
+        game.make_move(2, Player.HUMAN)
+        self.assertEqual(bot.get_move(game), 0)
+        self.assertEqual((bot.ponder_hits, slow_bot.calls), (1, 7))
+
+    def test_unpredicted_move_falls_back(self):
+        bot = PonderingBot(self.SlowBot())
+        game = Connect4()
+        bot.start_pondering(game)
+        game.make_move(6, Player.HUMAN)
+        self.assertEqual(bot.get_move(game), 0)
+        self.assertIsNone(bot._thread)
+        self.assertEqual(bot.ponder_hits + bot.ponder_misses, 1)
+
+    class StoppableBot:
+        """Thinks for ``seconds`` unless stopped; remembers which searches were cut short"""
+
+        def __init__(self, seconds):
+            self.seconds = seconds
+            self.stopped = 0
+
+        def get_move(self, game, stop=None):
+            end = time.perf_counter() + self.seconds
+            while time.perf_counter() < end:
+                if stop is not None and stop.is_set():
+                    self.stopped += 1
+                    break
+                time.sleep(0.001)
+            return game.get_valid_moves()[-1]
+
+    def wait_for_search(self, bot):
+        while bot._computing is None:
+            time.sleep(0.001)
+
+    def test_miss_abandons_search_in_progress(self):
+        slow_bot = self.StoppableBot(2.0)
+        bot = PonderingBot(slow_bot)
+        game = Connect4()
+        bot.start_pondering(game)
+        self.wait_for_search(bot)  # Thinking about the center reply
+        game.make_move(0, Player.HUMAN)
+        start_time = time.perf_counter()
+        slow_bot.seconds = 0.0
+        self.assertEqual(bot.get_move(game), 6)
+        self.assertLess(time.perf_counter() - start_time, 0.5)
+        self.assertEqual((slow_bot.stopped, bot.ponder_misses), (1, 1))
+
+    def test_hit_waits_for_reply_in_progress(self):
+        slow_bot = self.StoppableBot(0.2)
+        bot = PonderingBot(slow_bot)
+        game = Connect4()
+        bot.start_pondering(game)
+        self.wait_for_search(bot)
+        game.make_move(3, Player.HUMAN)
+        self.assertEqual(bot.get_move(game), 6)
+        self.assertEqual((bot.ponder_hits, slow_bot.stopped), (1, 0))
+        self.assertIsNone(bot._thread)
+
+    def test_pondering_keeps_tree_and_metrics(self):
+        mcts = MCTSBot(DQNAgent(), simulations=32)
+        timed = TimedBot(mcts, deadline_ms=10000)
+        bot = PonderingBot(timed)
+        game = Connect4()
+        game.make_move(bot.get_move(game), game.current_player)
+        root, searched = mcts.root, mcts.total_simulations
+        bot.start_pondering(game)
+        bot._thread.join()
+        self.assertIs(mcts.root, root)
+        self.assertEqual((mcts.total_simulations, timed.histogram.count), (searched, 1))
+        self.assertTrue(all(child.visits >= 32 for child in root.children))
+
+        game.make_move(3, game.current_player)
+        game.make_move(bot.get_move(game), game.current_player)
+        self.assertEqual((bot.ponder_hits, timed.histogram.count), (1, 1))
+        # The next search starts from the pondered subtree
+        reply = next(child for child in root.children if child.move == 3)
+        node = mcts._find_root(Position.from_game(game))
+        self.assertIn(node, reply.children)
+        self.assertGreater(node.visits, 0)
+
+    def test_anytime_bots_accept_stop(self):
+        stop = threading.Event()
+        stop.set()
+        game = Connect4()
+        self.assertIn(SearchBot(max_depth=20).get_move(game, stop=stop), range(7))
+        self.assertIn(MCTSBot(DQNAgent(), simulations=10 ** 6).get_move(game, stop=stop), range(7))
+        self.assertIn(TimedBot(SearchBot(max_depth=20), 5000.0).get_move(game, stop=stop), range(7))
+
+class TestEvaluationCache(unittest.TestCase):
+    def setUp(self):
+        self.agent = DQNAgent()
+        self.cache = EvaluationCache(max_entries=2)
+        self.bot = DQNBot(self.agent, self.cache)
+
+    def _game(self, moves):
+        game = Connect4()
+        for col in moves:
+            game.make_move(col, game.current_player)
+        return game
+
+    def test_cached_move_matches_uncached(self):
+        game = self._game([3, 2])
+        self.assertEqual(self.bot.get_move(game), DQNBot(self.agent).get_move(game))
+        self.bot.get_move(game)
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_mirror_positions_share_entry(self):
+        q_values = np.arange(7, dtype=np.float32)
+        self.cache.q_values(Position.from_moves("1"), self.agent.q_network, lambda: q_values)
+        mirrored = self.cache.q_values(Position.from_moves("7"), self.agent.q_network, lambda: None)
+        self.assertTrue(np.array_equal(mirrored, q_values[::-1]))
+        self.assertEqual(self.cache.hits, 1)
+
+    def test_lru_eviction(self):
+        for moves in ([0], [1], [2]):
+            self.bot.get_move(self._game(moves))
+        self.assertEqual((len(self.cache), self.cache.evictions), (2, 1))
+
+    def test_invalidated_when_weights_change(self):
+        self.bot.get_move(self._game([3]))
+        with torch.no_grad():
+            self.agent.q_network.fc4.bias.add_(1.0)
+        self.bot.get_move(self._game([3]))
+        self.assertEqual((self.cache.misses, self.cache.invalidations), (2, 1))
+
+class TestBenchmark(unittest.TestCase):
+    def test_batched_moves_match_single_moves(self):
+        bot = DQNBot(DQNAgent())
+        games = [Connect4() for _ in range(3)]
+        for i, game in enumerate(games):
+            for col in range(i * 2):
+                game.make_move(col % 7, game.current_player)
+        self.assertEqual(bot.get_moves(games), [bot.get_move(game) for game in games])
+
+    def test_compare_flags_slowdowns(self):
+        baseline = {"a": {"us_per_op": 10.0}, "b": {"us_per_op": 10.0}, "c": {"us_per_op": 10.0}}
+        results = {"a": {"us_per_op": 13.0}, "b": {"us_per_op": 10.5}, "c": {"us_per_op": 5.0},
+                   "new": {"us_per_op": 1.0}}
+        slower, faster = compare(results, baseline, threshold=0.2)
+        self.assertEqual((slower, faster), (["a"], ["c"]))
+
+class TestPerft(unittest.TestCase):
+    def test_engines_match_reference(self):
+        for engine_name in ENGINES:
+            counts, _ = run_perft(engine_name, 4)
+            self.assertEqual(counts.as_tuple(), REFERENCE[4])
+
+    def test_dedupe_matches_full_count(self):
+        counts, _ = run_perft("bitboard", 7, dedupe=True)
+        self.assertEqual(counts.as_tuple(), REFERENCE[7])
+
+    def test_engines_agree_from_position(self):
+        results = {run_perft(engine_name, 3, moves="445362")[0].as_tuple() for engine_name in ENGINES}
+        self.assertEqual(len(results), 1)
+
+    def test_undo_restores_position(self):
+        engine = ENGINES["connect4"]("4453")
+        before = engine.key()
+        perft(engine, 3)
+        self.assertEqual(engine.key(), before)
+
+class TestHeuristic(unittest.TestCase):
+    def test_line_count(self):
+        self.assertEqual(len(line_indices(6, 7)), 69)
+
+    def test_scores_are_antisymmetric(self):
+        boards = np.random.default_rng(0).integers(-1, 2, (50, 6, 7))
+        self.assertTrue(np.allclose(evaluate_boards(boards), -evaluate_boards(-boards)))
+
+    def test_open_three_beats_open_two(self):
+        two, three = np.zeros((2, 6, 7))
+        two[5, 0:2] = 1
+        three[5, 0:3] = 1
+        self.assertGreater(evaluate_boards(np.stack([three]))[0], evaluate_boards(np.stack([two]))[0])
+
+    def test_heuristic_bot_blocks(self):
+        game = Connect4()
+        for col in [3, 0, 4, 0, 5]:
+            game.make_move(col, game.current_player)
+        self.assertIn(HeuristicBot().get_move(game), [2, 6])
+
+    def test_batched_search_blocks(self):
+        game = Connect4()
+        for col in [0, 6, 0, 6, 0]:
+            game.make_move(col, game.current_player)
+        bot = SearchBot(max_depth=3, batch_evaluator=evaluate_positions)
+        self.assertEqual(bot.get_move(game), 0)
+
+    def test_reward_shaping(self):
+        env = Connect4Environment(shaping_weight=0.01)
+        env.reset()
+        _, reward, done, _ = env.step(3, Player.HUMAN)
+        self.assertFalse(done)
+        self.assertGreater(reward, 0)
+
+class TestTerminalRenderer(unittest.TestCase):
+    def test_redraws_only_changed_cells(self):
+        stream = io.StringIO()
+        renderer = TerminalRenderer(stream=stream)
+        game = Connect4()
+        renderer.render(game, "start")
+        self.assertTrue(stream.getvalue().startswith("\033[2J"))
+
+        stream.seek(0)
+        stream.truncate()
+        game.make_move(3, game.current_player)
+        renderer.render(game, "moved")
+        frame = stream.getvalue()
+        self.assertNotIn("\033[2J", frame)
+        self.assertIn("\033[10;14H", frame)
+        self.assertEqual(frame.count("🔵"), 1)
+
+    def test_headless_draws_nothing(self):
+        stream = io.StringIO()
+        renderer = TerminalRenderer(headless=True, stream=stream)
+        renderer.render(Connect4())
+        self.assertEqual((stream.getvalue(), renderer.frames), ("", 1))
+
+class TestGameServer(unittest.TestCase):
+    def test_sessions_over_localhost(self):
+        async def scenario():
+            server = GameServer(DQNAgent(), max_wait_ms=5.0)
+            listeners = await server.start("127.0.0.1", 0)
+            port = listeners[0].sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+
+            async def call(request):
+                writer.write((json.dumps(request) + "\n").encode())
+                await writer.drain()
+                return json.loads(await reader.readline())
+
+            first = await call({"cmd": "new"})
+            second = await call({"cmd": "new", "bot_first": True})
+            self.assertIsNotNone(second["bot_move"])
+            moved = await call({"cmd": "move", "session": first["session"], "col": 3})
+            self.assertEqual(moved["board"][-1][3], "X")
+            self.assertIn("O", "".join(moved["board"]))
+            invalid = await call({"cmd": "move", "session": first["session"], "col": 9})
+            stats = await call({"cmd": "stats"})
+            writer.close()
+            await server.stop()
+            return invalid, stats
+
+        invalid, stats = asyncio.run(scenario())
+        self.assertFalse(invalid["ok"])
+        self.assertEqual((stats["active_sessions"], stats["moves"]), (2, 1))
+        self.assertGreaterEqual(stats["batches"], 2)
+
+    def test_concurrent_moves_share_batches(self):
+        async def scenario():
+            server = GameServer(DQNAgent(), max_wait_ms=20.0)
+            await server.start(port=None)
+            sessions = [(await server.handle_request({"cmd": "new"}))["session"] for _ in range(32)]
+            responses = await asyncio.gather(*[server.handle_request({"cmd": "move", "session": s, "col": 0})
+                                               for s in sessions])
+            await server.stop()
+            return server, responses
+
+        server, responses = asyncio.run(scenario())
+        self.assertTrue(all(response["ok"] for response in responses))
+        self.assertLess(server.inference.batches, 32)
+
+    def test_overlapping_moves_in_one_session(self):
+        async def scenario():
+            server = GameServer(DQNAgent(), max_wait_ms=5.0)
+            await server.start(port=None)
+            session_id = (await server.handle_request({"cmd": "new"}))["session"]
+            responses = await asyncio.gather(
+                server.handle_request({"cmd": "move", "session": session_id, "col": 0}),
+                server.handle_request({"cmd": "move", "session": session_id, "col": 1}))
+            await server.stop()
+            return server.sessions[session_id], responses
+
+        session, (first, second) = asyncio.run(scenario())
+        self.assertTrue(first["ok"])
+        self.assertFalse(second["ok"])
+        # One human stone and one bot reply, nothing overwritten
+        self.assertEqual(session.moves, 2)
+        self.assertEqual("".join(first["board"]).count("X"), 1)
+        self.assertEqual("".join(first["board"]).count("O"), 1)
+
+    def test_non_object_requests(self):
+        async def scenario():
+            server = GameServer(DQNAgent())
+            listeners = await server.start("127.0.0.1", 0)
+            port = listeners[0].sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            replies = []
+            for line in (b"[]\n", b"1\n", b'"x"\n', b"not json\n"):
+                writer.write(line)
+                await writer.drain()
+                replies.append(json.loads(await asyncio.wait_for(reader.readline(), 5)))
+            writer.close()
+            await server.stop()
+            return replies
+
+        replies = asyncio.run(scenario())
+        self.assertEqual(len(replies), 4)
+        self.assertTrue(all(not reply["ok"] and "error" in reply for reply in replies))
+
+    def test_pipelined_ids_and_session_cleanup(self):
+        async def scenario():
+            server = GameServer(DQNAgent())
+            listeners = await server.start("127.0.0.1", 0)
+            port = listeners[0].sockets[0].getsockname()[1]
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            session_id = None
+            for request_id in ("a", "b"):
+                writer.write((json.dumps({"cmd": "new", "id": request_id}) + "\n").encode())
+            for _ in range(2):
+                session_id = json.loads(await reader.readline())["session"]
+            requests = [{"cmd": "stats", "id": 1}, {"cmd": "bogus", "id": 2},
+                        {"cmd": "move", "session": session_id, "col": 0, "id": 3}]
+            writer.write("".join(json.dumps(r) + "\n" for r in requests).encode())
+            replies = {}
+            for _ in requests:
+                reply = json.loads(await reader.readline())
+                replies[reply["id"]] = reply
+            while_open = server.stats()["active_sessions"]
+            writer.close()
+            await writer.wait_closed()
+            for _ in range(100):
+                if server.stats()["connections"] == 0:
+                    break
+                await asyncio.sleep(0.01)
+            after_close = server.stats()["active_sessions"]
+            await server.stop()
+            return replies, while_open, after_close
+
+        replies, while_open, after_close = asyncio.run(scenario())
+        self.assertEqual(sorted(replies), [1, 2, 3])
+        self.assertIn("active_sessions", replies[1])
+        self.assertFalse(replies[2]["ok"])
+        self.assertTrue(replies[3]["ok"])
+        self.assertEqual((while_open, after_close), (2, 0))
+
+    def test_rejects_non_integer_columns_and_sessions(self):
+        async def scenario():
+            server = GameServer(DQNAgent())
+            await server.start(port=None)
+            session_id = (await server.handle_request({"cmd": "new"}))["session"]
+            replies = [await server.handle_request({"cmd": "move", "session": session_id, "col": col})
+                       for col in (True, -1, 1.0)]
+            replies.append(await server.handle_request({"cmd": "move", "session": True, "col": 0}))
+            replies.append(await server.handle_request({"cmd": "close", "session": [session_id]}))
+            await server.stop()
+            return server.sessions[session_id], replies
+
+        session, replies = asyncio.run(scenario())
+        self.assertTrue(all(not reply["ok"] for reply in replies))
+        self.assertEqual(session.moves, 0)
+
+class TestMemmapReplayBuffer(unittest.TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "replay.c4r")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_encoding_round_trip(self):
+        states = np.random.default_rng(0).integers(-1, 2, (10, 42)).astype(np.float32)
+        np.testing.assert_array_equal(decode_states(encode_states(states), 42), states)
+
+    def test_ring_buffer_overwrites_oldest(self):
+        buffer = MemmapReplayBuffer(self.path, capacity=4)
+        state = np.zeros((6, 7), dtype=np.float32)
+        for action in range(6):
+            buffer.append(state, action, float(action), state, False)
+        self.assertEqual(len(buffer), 4)
+        self.assertEqual(sorted(buffer.records["action"].tolist()), [2, 3, 4, 5])
+        buffer.close()
+
+        reopened = MemmapReplayBuffer(self.path, capacity=4)
+        self.assertEqual(len(reopened), 4)
+        with self.assertRaises(ValueError):
+            MemmapReplayBuffer(self.path, capacity=8)
+
+    def test_open_reads_layout_from_header(self):
+        buffer = MemmapReplayBuffer(self.path, capacity=8, rows=4, cols=5)
+        state = np.ones((4, 5), dtype=np.float32)
+        buffer.append(state, 2, 1.0, -state, False)
+        buffer.close()
+
+        reopened = MemmapReplayBuffer.open(self.path, cols=5)
+        self.assertEqual((reopened.capacity, reopened.rows, len(reopened)), (8, 4, 1))
+        reopened.close()
+        self.assertEqual(positions_from_replay(self.path, rows=4, cols=5).shape, (2, 20))
+        with self.assertRaises(ValueError):
+            positions_from_replay(self.path)
+        with self.assertRaises(FileNotFoundError):
+            positions_from_replay(os.path.join(self.temp_dir, "typo.c4r"))
+        self.assertFalse(os.path.exists(os.path.join(self.temp_dir, "typo.c4r")))
+
+    def test_sample_returns_stored_transitions(self):
+        buffer = MemmapReplayBuffer(self.path, capacity=100)
+        states = np.random.default_rng(1).integers(-1, 2, (50, 42)).astype(np.float32)
+        buffer.extend(states, np.arange(50) % 7, np.arange(50, dtype=np.float32), -states, np.arange(50) % 2 == 0)
+        sampled, actions, rewards, next_states, dones = buffer.sample(16, np.random.default_rng(0))
+        indices = rewards.astype(int)
+        np.testing.assert_array_equal(sampled, states[indices])
+        np.testing.assert_array_equal(next_states, -states[indices])
+        np.testing.assert_array_equal(actions, indices % 7)
+        np.testing.assert_array_equal(dones, indices % 2 == 0)
+
+    def test_agent_memmap_backend(self):
+        agent = DQNAgent(batch_size=4, replay_backend="memmap", replay_path=self.path, memory_size=64)
+        state = np.zeros((6, 7), dtype=np.float32)
+        for i in range(8):
+            agent.remember(state, i % 7, 0.0, state, False)
+        self.assertEqual(len(agent.memory), 8)
+        agent.replay()
+
+    def test_default_replay_files_are_private(self):
+        state = np.zeros((6, 7), dtype=np.float32)
+        first = DQNAgent(replay_backend="memmap", memory_size=16)
+        second = DQNAgent(replay_backend="memmap", memory_size=16)
+        self.assertNotEqual(first.memory.path, second.memory.path)
+        first.remember(state, 0, 1.0, state, True)
+        self.assertEqual((len(first.memory), len(second.memory)), (1, 0))
+        replay_dir = os.path.dirname(first.memory.path)
+        first.memory.close()
+        del first
+        import gc
+        gc.collect()
+        self.assertFalse(os.path.exists(replay_dir))
+
+    def test_train_dqn_splits_replay_path(self):
+        from train_dqn import train_dqn
+        agent1, agent2, _ = train_dqn(episodes=2, save_freq=0, agent_kwargs=dict(
+            replay_backend="memmap", replay_path=self.path, memory_size=64, hidden_size=16))
+        self.assertEqual(sorted(os.listdir(self.temp_dir)), ["replay_agent1.c4r", "replay_agent2.c4r"])
+        self.assertGreater(len(agent1.memory), 0)
+        self.assertGreater(len(agent2.memory), 0)
+
+class TestDistributed(unittest.TestCase):
+    def test_wire_format_round_trip(self):
+        states = np.random.default_rng(0).integers(-1, 2, (5, 6, 7)).astype(np.float32)
+        payload = pack_transitions(2, [0, 1, 0, 1, 0], states, [0, 1, 2, 3, 4], [0.0, 0.0, 0.0, 0.0, 1.0],
+                                   -states, [False] * 4 + [True])
+        episodes, records = unpack_transitions(payload)
+        self.assertEqual((episodes, len(records)), (2, 5))
+        self.assertEqual(records["seat"].tolist(), [0, 1, 0, 1, 0])
+        self.assertTrue(records["done"][-1])
+        self.assertEqual(len(payload), 8 + 5 * 39)
+
+    def test_actors_feed_learner(self):
+        learner = Learner(broadcast_every=2)
+        learner.start()
+        results = {}
+        actors = [threading.Thread(target=lambda i=i: results.update({i: run_actor(
+            learner.address, i, episodes=4, batch_episodes=2)})) for i in range(2)]
+        for actor in actors:
+            actor.start()
+        learner.run(8)
+        for actor in actors:
+            actor.join(timeout=30)
+        learner.stop()
+
+        self.assertEqual(learner.episodes, 8)
+        self.assertEqual(set(learner.actor_stats), {0, 1})
+        self.assertGreater(learner.version, 0)
+        self.assertTrue(all(played == 4 for played, _ in results.values()))
+        self.assertGreater(len(learner.agents[0].memory), 0)
+
+    def test_actor_reconnects_until_learner_is_up(self):
+        probe = socket.create_server(("127.0.0.1", 0))
+        port = probe.getsockname()[1]
+        probe.close()
+        results = []
+        actor = threading.Thread(target=lambda: results.append(run_actor(
+            ("127.0.0.1", port), 7, episodes=2, batch_episodes=2, give_up_after=20.0)))
+        actor.start()
+        time.sleep(0.5)
+        learner = Learner(port=port)
+        learner.start()
+        learner.run(2)
+        actor.join(timeout=30)
+        learner.stop()
+        self.assertEqual(results[0][0], 2)
+        self.assertEqual(learner.actor_stats[7].episodes, 2)
+
+class TestSweep(unittest.TestCase):
+    def test_search_spaces(self):
+        self.assertEqual(len(grid_configs({"lr": [1e-3, 1e-4], "gamma": [0.9, 0.95, 0.99]})), 6)
+        configs = random_configs({"lr": {"low": 1e-4, "high": 1e-2, "log": True}, "batch_size": [32, 64]}, 5)
+        self.assertEqual(len(configs), 5)
+        self.assertTrue(all(1e-4 <= config["lr"] <= 1e-2 for config in configs))
+
+    def test_successive_halving_keeps_best(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            results = successive_halving([{"lr": 1e-3}, {"lr": 1e-4}], temp_dir, min_episodes=2,
+                                         max_episodes=4, eta=2, workers=1, eval_games=4)
+            self.assertEqual([result["rung"] for result in results], [1, 0])
+            self.assertEqual(results[0]["episodes"], 4)
+            with open(os.path.join(temp_dir, "metrics.jsonl")) as f:
+                self.assertEqual(len(f.readlines()), 3)
+        finally:
+            shutil.rmtree(temp_dir)
+
+class TestDistill(unittest.TestCase):
+    def test_student_checkpoint_loads_into_default_agent(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(temp_dir, "student.pth")
+            DQNAgent(hidden_size=32).save(path)
+            agent = DQNAgent()
+            agent.load(path)
+            self.assertEqual((agent.hidden_size, agent.q_network.fc1.out_features), (32, 32))
+        finally:
+            shutil.rmtree(temp_dir)
+
+    def test_student_learns_teacher_moves(self):
+        torch.manual_seed(0)
+        teacher = DQNAgent(epsilon=0.0)
+        states = np.unique(positions_from_self_play(teacher, 30), axis=0)
+        student = train_student(teacher, states, hidden_size=32, epochs=30)
+        self.assertGreater(move_agreement(teacher, student, states), 0.5)
+        self.assertEqual(sum(play_match(student, teacher, games=4)), 4)
+
+class TestSymmetry(unittest.TestCase):
+    def test_mirror_transitions(self):
+        states = np.arange(84, dtype=np.float32).reshape(2, 42)
+        next_states = states + 100
+        actions = np.array([1, 1])
+        mirror_transitions(states, actions, next_states, np.array([True, False]), 6, 7)
+        np.testing.assert_array_equal(states[0].reshape(6, 7), np.arange(42).reshape(6, 7)[:, ::-1])
+        np.testing.assert_array_equal(states[1], np.arange(42, 84))
+        self.assertEqual(next_states[0][0], 106)
+        self.assertEqual(actions.tolist(), [5, 1])
+
+    def test_mirrored_replay_trains(self):
+        agent = DQNAgent(batch_size=4, mirror_prob=1.0)
+        state = np.zeros((6, 7), dtype=np.float32)
+        state[5][0] = 1.0
+        for _ in range(4):
+            agent.remember(state, 0, 1.0, state, True)
+        states, actions, _, _, _ = agent.sample_batch()
+        self.assertEqual(actions.tolist(), [6] * 4)
+        self.assertEqual(states[0].reshape(6, 7)[5][6].item(), 1.0)
+        agent.replay()
+
+    def test_symmetric_bot_is_mirror_consistent(self):
+        bot = DQNBot(DQNAgent(), symmetric=True)
+        game, mirrored = Connect4(), Connect4()
+        for col in (0, 1, 1):
+            game.make_move(col, game.current_player)
+            mirrored.make_move(6 - col, mirrored.current_player)
+        self.assertEqual(bot.get_move(game), 6 - bot.get_move(mirrored))
+        self.assertEqual(bot.get_moves([game, mirrored]), [bot.get_move(game), bot.get_move(mirrored)])
+
+class TestTactics(unittest.TestCase):
+    def _game(self, moves):
+        game = Connect4()
+        for col in moves:
+            game.make_move(col, game.current_player)
+        return game
+
+    def test_win_and_block(self):
+        counter = TacticsCounter()
+        self.assertEqual(tactical_move(Position.from_moves("172736"), counter)[0], 3)
+        self.assertEqual(tactical_move(Position.from_moves("17273"), counter)[0], 3)
+        self.assertEqual((counter.wins, counter.blocks), (1, 1))
+
+    def test_masks_moves_that_lose(self):
+        # The opponent wins on the cell above column 3's next free cell
+        move, allowed = tactical_move(Position.from_moves("7121421624"))
+        self.assertIsNone(move)
+        self.assertFalse(allowed[2])
+        self.assertEqual(sum(allowed), 6)
+
+    def test_bot_skips_inference_in_batches(self):
+        bot = DQNBot(DQNAgent(), tactical=True)
+        games = [self._game([0, 6, 1, 6, 2, 5]), self._game([0, 6, 1, 6, 2]), self._game([3])]
+        moves = bot.get_moves(games)
+        self.assertEqual(moves[:2], [3, 3])
+        self.assertEqual((bot.tactics.queries, bot.tactics.skipped), (3, 2))
+        self.assertEqual(bot.get_move(games[0]), 3)
+
+    def test_agent_act_takes_win(self):
+        agent = DQNAgent(epsilon=1.0, tactical=True)
+        env = Connect4Environment()
+        state = env.reset()
+        for col in (0, 6, 1, 6, 2, 5):
+            state, _, _, _ = env.step(col, env.get_current_player())
+        self.assertEqual(agent.act(state, env.get_valid_actions()), 3)
+        self.assertEqual(agent.tactics.wins, 1)
+
+class TestLearningSchedule(unittest.TestCase):
+    def test_decay_epsilon_by_steps(self):
+        agent = DQNAgent(epsilon=1.0, epsilon_decay=0.5, epsilon_min=0.1)
+        agent.decay_epsilon(2)
+        self.assertAlmostEqual(agent.epsilon, 0.25)
+        agent.decay_epsilon(10)
+        self.assertAlmostEqual(agent.epsilon, 0.1)
+
+    def test_replay_without_epsilon_decay(self):
+        agent = DQNAgent(batch_size=64)
+        state = np.zeros((6, 7), dtype=np.float32)
+        for i in range(64):
+            agent.remember(state, i % 7, 1.0, state, True)
+        agent.replay(decay_epsilon=False)
+        self.assertEqual(agent.epsilon, 1.0)
+        agent.replay()
+        self.assertLess(agent.epsilon, 1.0)
+
+    def test_step_schedule_decays_per_move(self):
+        from train_dqn import train_dqn
+        agent1, agent2, _ = train_dqn(2, save_freq=0, learn_schedule="step", updates=0.5,
+                                      epsilon_schedule="steps", agent_kwargs={"epsilon_decay": 0.9})
+        moves = len(agent1.memory)
+        self.assertAlmostEqual(agent1.epsilon, 0.9 ** moves, places=5)
+        with self.assertRaises(ValueError):
+            train_dqn(1, save_freq=0, learn_schedule="time", updates=2.0)
+
+class TestCompiledAgent(unittest.TestCase):
+    def test_script_mode_matches_eager(self):
+        eager = DQNAgent()
+        scripted = DQNAgent(compile_mode="script")
+        scripted.q_network.load_state_dict(eager.q_network.state_dict())
+        states = torch.randn(5, 42)
+        torch.testing.assert_close(scripted.predict(states), eager.predict(states))
+
+    def test_warm_up_leaves_weights_unchanged(self):
+        agent = DQNAgent(bf16=True, batch_size=8)
+        before = [p.clone() for p in agent.q_network.parameters()]
+        agent.warm_up((1, 8))
+        for old, new in zip(before, agent.q_network.parameters()):
+            self.assertTrue(torch.equal(old, new))
+        self.assertEqual(agent.predict(torch.zeros(3, 42)).dtype, torch.float32)
+
+    def test_warm_up_runs_when_networks_are_built(self):
+        warm_ups = []
+
+        class CountingAgent(DQNAgent):
+            def warm_up(self, batch_sizes=(1, 2, 8, 32)):
+                warm_ups.append((self.rows, self.cols))
+                super().warm_up(batch_sizes)
+
+        CountingAgent()
+        self.assertEqual(warm_ups, [])
+        agent = CountingAgent(bf16=True, batch_size=8)
+        self.assertEqual(warm_ups, [(6, 7)])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "wide.pth")
+            DQNAgent(rows=7, cols=8, hidden_size=32).save(path)
+            agent.load(path)
+        self.assertEqual(warm_ups, [(6, 7), (7, 8)])
+
+    def test_mcts_and_server_use_predict(self):
+        calls = []
+
+        class CountingAgent(DQNAgent):
+            def predict(self, states):
+                calls.append(len(states))
+                return super().predict(states)
+
+        agent = CountingAgent(bf16=True)
+        calls.clear()
+        MCTSBot(agent, simulations=8).get_move(Connect4())
+        self.assertTrue(calls)
+        calls.clear()
+        server = GameServer(agent)
+        self.assertIn(server.inference._evaluate([Position()])[0], range(7))
+        self.assertEqual(calls, [1])
+
+    def test_bf16_replay_and_bot(self):
+        agent = DQNAgent(bf16=True, batch_size=8)
+        state = np.zeros((6, 7), dtype=np.float32)
+        for i in range(8):
+            agent.remember(state, i % 7, 1.0, state, True)
+        agent.replay()
+        self.assertIn(DQNBot(agent).get_move(Connect4()), range(7))
+        with self.assertRaises(ValueError):
+            DQNAgent(compile_mode="jit")
+
+class TestBoardSizes(unittest.TestCase):
+    def test_checkpoint_records_board_size(self):
+        agent = DQNAgent(rows=7, cols=8, hidden_size=32)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "agent.pth")
+            agent.save(path)
+            loaded = DQNAgent()
+            loaded.load(path)
+        self.assertEqual((loaded.rows, loaded.cols, loaded.state_size, loaded.action_size), (7, 8, 56, 8))
+        states = torch.randn(3, 56)
+        torch.testing.assert_close(loaded.predict(states), agent.predict(states))
+
+    def test_load_resets_replay_for_new_board(self):
+        state = np.zeros((6, 7), dtype=np.float32)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "agent.pth")
+            DQNAgent(rows=7, cols=8, hidden_size=32).save(path)
+            for backend in ("memory", "memmap"):
+                agent = DQNAgent(replay_backend=backend, batch_size=2)
+                for _ in range(4):
+                    agent.remember(state, 0, 1.0, state, True)
+                agent.replay()
+                old_path = getattr(agent.memory, "path", None)
+                agent.load(path)
+                self.assertEqual(len(agent.memory), 0)
+                if old_path is not None:
+                    self.assertFalse(os.path.exists(old_path))
+                    self.assertEqual(agent.memory.cells, 56)
+                wide = np.zeros((7, 8), dtype=np.float32)
+                for _ in range(4):
+                    agent.remember(wide, 7, 1.0, wide, True)
+                agent.replay()
+
+            replay_path = os.path.join(tmp, "replay.c4r")
+            agent = DQNAgent(replay_backend="memmap", replay_path=replay_path)
+            with self.assertRaises(ValueError):
+                agent.load(path)
+            self.assertEqual((agent.rows, agent.cols), (6, 7))
+
+    def test_bot_and_tactics_on_wide_board(self):
+        agent = DQNAgent(rows=7, cols=9, tactical=True, epsilon=0.0)
+        game = Connect4(7, 9)
+        for col in (0, 8, 1, 8, 2):
+            game.make_move(col, game.current_player)
+        self.assertEqual(DQNBot(agent, tactical=True).get_move(game), 3)
+        state = Connect4Environment(rows=7, cols=9)._game_to_state(game)
+        self.assertEqual(agent.act(state, game.get_valid_moves()), 3)
+
+    def test_train_dqn_on_9x7(self):
+        from train_dqn import train_dqn
+        agent1, agent2, _ = train_dqn(episodes=2, save_freq=0, rows=7, cols=9,
+                                      agent_kwargs=dict(batch_size=8))
+        self.assertEqual((agent1.rows, agent1.cols), (7, 9))
+        self.assertEqual(agent2.q_network(torch.zeros(1, 63)).shape, (1, 9))
+
+class TestParallelSolver(unittest.TestCase):
+    def test_shared_table_rejects_torn_slots(self):
+        table = SharedTranspositionTable(101)
+        table.put(12345, 7)
+        self.assertEqual(table.get(12345), 7)
+        self.assertEqual(table.get(12345 + 101), 0)
+        table.slots[2 * (12345 % 101) + 1] = 9  # Value written, check word not yet
+        self.assertEqual(table.get(12345), 0)
+        table.reset()
+        self.assertEqual(table.get(12345), 0)
+
+    def test_strategies_match_single_threaded_solver(self):
+        position = Position.from_moves("74223417356477411661335")
+        expected = Solver().analyze(position)
+        for strategy in ("lazy", "split"):
+            with ParallelSolver(2, strategy, table_size=(1 << 16) + 1) as solver:
+                self.assertEqual(solver.solve(position), max(s for s in expected if s is not None))
+                self.assertEqual(solver.analyze(position), expected)
+                self.assertGreater(solver.node_count, 0)
+
+    def test_full_board_is_a_draw(self):
+        position = Position(4, 4)
+        for col in [0, 1, 0, 1, 2, 3, 2, 3, 1, 0, 1, 0, 3, 2, 3, 2]:
+            position.play(col)
+        for strategy in ("lazy", "split"):
+            with ParallelSolver(2, strategy, table_size=17) as solver:
+                self.assertEqual(solver.solve(position), Solver().solve(position))
+                self.assertEqual(solver.solve(position, weak=True), 0)
+
+    def test_oversized_board_and_unknown_strategy(self):
+        with self.assertRaises(ValueError):
+            ParallelSolver(1, "ybwc")
+        with ParallelSolver(1, table_size=17) as solver:
+            with self.assertRaises(ValueError):
+                solver.solve(Position(7, 9))
+
+class TestOpponents(unittest.TestCase):
+    def boards(self, *sequences):
+        env = Connect4Environment()
+        boards = []
+        for sequence in sequences:
+            game = Connect4()
+            for char in sequence:
+                game.make_move(int(char) - 1, game.current_player)
+            boards.append(env._game_to_state(game))
+        return np.stack(boards)
+
+    def test_greedy_wins_then_blocks(self):
+        boards = self.boards("172736", "17273", "")
+        masks = valid_masks(boards)
+        np.testing.assert_array_equal(winning_moves(boards, masks)[0], [c == 3 for c in range(7)])
+        self.assertFalse(winning_moves(boards, masks)[1].any())
+        actions = GreedyPolicy(seed=0)(boards, masks)
+        self.assertEqual(list(actions[:2]), [3, 3])
+
+    def test_policies_respect_masks_and_seeds(self):
+        boards = self.boards("1111112222", "4444443", "")
+        masks = valid_masks(boards)
+        for name, policy in OPPONENTS.items():
+            actions = policy(seed=5)(np.repeat(boards, 50, axis=0), np.repeat(masks, 50, axis=0))
+            self.assertTrue(np.repeat(masks, 50, axis=0)[np.arange(150), actions].all(), name)
+            again = policy(seed=5)(np.repeat(boards, 50, axis=0), np.repeat(masks, 50, axis=0))
+            np.testing.assert_array_equal(actions, again)
+
+    def test_center_weighting_and_heuristic_bot_agreement(self):
+        empty = np.zeros((20000, 6, 7), dtype=np.float32)
+        counts = np.bincount(CenterWeightedPolicy(seed=0)(empty, valid_masks(empty)), minlength=7)
+        np.testing.assert_allclose(counts / 20000, np.array([1, 2, 3, 4, 3, 2, 1]) / 16, atol=0.01)
+        game = Connect4()
+        for col in (3, 3, 2, 4):
+            game.make_move(col, game.current_player)
+        self.assertEqual(HeuristicPolicy().get_move(game), HeuristicBot().get_move(game))
+
+    def test_play_games_outcomes(self):
+        outcomes = play_games(GreedyPolicy(seed=1), UniformPolicy(seed=2), 400)
+        self.assertEqual(outcomes.shape, (400,))
+        self.assertGreater(np.mean(outcomes == 1), 0.8)
+        np.testing.assert_array_equal(outcomes, play_games(GreedyPolicy(seed=1), UniformPolicy(seed=2), 400))
+        full = play_games(UniformPolicy(seed=0), UniformPolicy(seed=1), 50, rows=4, cols=4)
+        self.assertTrue(set(full.tolist()) <= {-1, 0, 1})
+
+    def test_play_against_random_is_seeded(self):
+        from train_dqn import play_against_random
+        agent = DQNAgent(epsilon=0.5)
+        first = play_against_random(agent, 40, verbose=False, seed=3)
+        self.assertEqual(first, play_against_random(agent, 40, verbose=False, seed=3))
+
+class TestEvalDaemon(unittest.TestCase):
+    def test_scores_new_checkpoints_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            DQNAgent().save(os.path.join(tmp, "dqn_agent1_episode_100.pth"))
+            DQNAgent(rows=7, cols=8).save(os.path.join(tmp, "dqn_agent1_episode_200.pth"))
+            with open(os.path.join(tmp, "broken.pth"), "wb") as f:
+                f.write(b"not a checkpoint")
+            self.assertEqual(sorted(os.listdir(tmp)), ["broken.pth", "dqn_agent1_episode_100.pth",
+                                                        "dqn_agent1_episode_200.pth"])
+
+            daemon = EvalDaemon(tmp, panel=("uniform", "greedy"), games=6, settle=0.0)
+            records = daemon.poll()
+            self.assertEqual([r["episode"] for r in records], [100, 200])
+            for record in records:
+                self.assertEqual(set(record["opponents"]), {"uniform", "greedy"})
+                rates = record["opponents"]["uniform"]
+                self.assertAlmostEqual(rates["win_rate"] + rates["loss_rate"] + rates["draw_rate"], 1.0)
+            self.assertEqual(daemon.poll(), [])
+
+            # A restarted daemon resumes from the log; only the rewritten checkpoint is new
+            time.sleep(0.01)
+            DQNAgent().save(os.path.join(tmp, "dqn_agent1_episode_100.pth"))
+            restarted = EvalDaemon(tmp, panel=("uniform",), games=4, settle=0.0)
+            self.assertEqual([r["episode"] for r in restarted.poll()], [100])
+            self.assertEqual(list(win_rate_curve(restarted.metrics_path)), [100, 200])
+        with self.assertRaises(ValueError):
+            EvalDaemon(panel=("grandmaster",))
+
+    def test_broken_checkpoint_is_logged_and_dropped(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(os.path.join(tmp, "broken.pth"), "wb") as f:
+                f.write(b"not a checkpoint")
+            daemon = EvalDaemon(tmp, panel=("uniform",), games=2, settle=0.0, max_failures=2)
+            self.assertEqual(daemon.poll(), [])
+            self.assertEqual(len(daemon.pending()), 1)
+            self.assertEqual(daemon.poll(), [])
+            self.assertEqual(daemon.pending(), [])
+            with open(daemon.metrics_path) as f:
+                failures = [json.loads(line) for line in f]
+            self.assertEqual([(r["checkpoint"], r["attempts"]) for r in failures], [("broken.pth", 2)])
+
+            # A restarted daemon does not retry it, and the curve ignores it
+            DQNAgent().save(os.path.join(tmp, "dqn_agent1_episode_100.pth"))
+            restarted = EvalDaemon(tmp, panel=("uniform",), games=2, settle=0.0)
+            self.assertEqual([r["checkpoint"] for r in restarted.poll()], ["dqn_agent1_episode_100.pth"])
+            self.assertEqual(list(win_rate_curve(restarted.metrics_path)), [100])
+
+class TestPositionStats(unittest.TestCase):
+    records = ["4453", "44", "121212", "7654321", "4444"]
+
+    def test_game_keys_match_positions(self):
+        keys, valid = game_keys(moves_from_records(self.records))
+        for i, record in enumerate(self.records):
+            expected = [Position.from_moves(record[:ply]).canonical_key() for ply in range(len(record) + 1)]
+            self.assertEqual(keys[i][valid[i]].tolist(), expected)
+        position = Position.from_moves("445326")
+        np.testing.assert_array_equal(boards_from_keys(np.array([position.key()], dtype=np.uint64))[0],
+                                      position.to_state())
+
+    def test_bulk_counts_survive_growth_and_collisions(self):
+        from collections import Counter
+        rng = np.random.default_rng(0)
+        keys = rng.integers(0, 500, 5000).astype(np.uint64)
+        stats = PositionStats(capacity=4)
+        for chunk in np.array_split(keys, 7):
+            stats.add(chunk, np.zeros(len(chunk), dtype=np.uint8), np.ones(len(chunk)))
+        counts = Counter(keys.tolist())
+        self.assertEqual(len(stats), len(counts))
+        entries = stats.lookup(np.array(list(counts), dtype=np.uint64))
+        self.assertEqual(entries["visits"].tolist(), list(counts.values()))
+        self.assertEqual(entries["outcomes"][:, 0].tolist(), list(counts.values()))
+        self.assertEqual(stats.lookup(np.array([10 ** 6], dtype=np.uint64))["visits"].tolist(), [0])
+
+    def test_games_coverage_top_and_mmap(self):
+        outcomes, moves = play_games(UniformPolicy(seed=0), UniformPolicy(seed=1), 300, return_moves=True)
+        stats = PositionStats()
+        stats.add_games(moves, outcomes)
+        coverage = stats.coverage()
+        self.assertEqual(coverage["visits"], int((moves >= 0).sum()) + 300)
+        self.assertEqual(coverage["positions_by_ply"][:2], [1, 4])
+        keys, entries = stats.top(1, ply=0)
+        self.assertEqual(keys.tolist(), [0])
+        self.assertEqual(entries["visits"][0], 300)
+        self.assertEqual(entries["outcomes"][0].tolist(),
+                         [int(np.sum(outcomes == 1)), int(np.sum(outcomes == -1)), int(np.sum(outcomes == 0))])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stats.c4s")
+            stats.save(path)
+            mapped = PositionStats.open(path, writable=True)
+            self.assertEqual(len(mapped), len(stats))
+            mapped.add_games(moves[:10], outcomes[:10])
+            mapped.flush()
+            reopened = PositionStats.open(path)
+            self.assertEqual(reopened.lookup(np.zeros(1, dtype=np.uint64))["visits"].tolist(), [310])
+            del mapped, reopened
+
+    def test_grown_mapped_table_flushes_to_its_file(self):
+        outcomes, moves = play_games(UniformPolicy(seed=0), UniformPolicy(seed=1), 200, return_moves=True)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "stats.c4s")
+            small = PositionStats(capacity=64)
+            small.add_games(moves[:5], outcomes[:5])
+            small.save(path)
+            mapped = PositionStats.open(path, writable=True)
+            mapped.add_games(moves[5:], outcomes[5:])
+            self.assertGreater(mapped.capacity, small.capacity)
+            mapped.flush()
+            reopened = PositionStats.open(path)
+            self.assertEqual(reopened.capacity, mapped.capacity)
+            self.assertEqual(reopened.total_visits(), int((moves >= 0).sum()) + 200)
+            # Still mapped after the rewrite, later flushes keep landing in the file
+            mapped.add_games(moves[:1], outcomes[:1])
+            mapped.flush()
+            self.assertEqual(PositionStats.open(path).lookup(np.zeros(1, dtype=np.uint64))["visits"].tolist(), [201])
+            del mapped, reopened
+
+class TestEpisodeTransitions(unittest.TestCase):
+    def play(self, moves, n_step=1):
+        env = Connect4Environment()
+        episode = EpisodeBuffer(n_step, gamma=0.5)
+        state = env.reset()
+        for col in moves:
+            next_state, reward, done, _ = env.step(col, env.get_current_player())
+            episode.add(state, col, reward)
+            state = next_state
+        self.assertTrue(done)
+        return env, episode.finish(state, env.result == GameResult.PLAYER1_WIN), state
+
+    def test_both_seats_see_the_outcome(self):
+        env, (first, second), final = self.play([0, 1, 0, 1, 0, 1, 0])
+        states, actions, rewards, next_states, dones = first
+        self.assertEqual(actions.tolist(), [0, 0, 0, 0])
+        self.assertEqual(rewards.tolist(), [0, 0, 0, 1])
+        self.assertEqual(dones.tolist(), [False, False, False, True])
+        # The next state is the seat's own next turn, not the opponent's
+        np.testing.assert_array_equal(next_states[0], states[1])
+        states, actions, rewards, next_states, dones = second
+        self.assertEqual(rewards.tolist(), [0, 0, -1])
+        self.assertEqual(dones.tolist(), [False, False, True])
+        np.testing.assert_array_equal(next_states[-1], final.ravel())
+
+    def test_n_step_returns(self):
+        rewards = np.array([0.0, 1.0, 0.0, -1.0], dtype=np.float32)
+        expected = [sum(0.5 ** k * rewards[t + k] for k in range(3) if t + k < 4) for t in range(4)]
+        np.testing.assert_allclose(n_step_returns(rewards, 3, 0.5), expected)
+        _, (first, second), _ = self.play([0, 1, 0, 1, 0, 1, 0], n_step=2)
+        self.assertEqual(first[2].tolist(), [0, 0, 0.5, 1])
+        self.assertEqual(first[4].tolist(), [False, False, True, True])
+        np.testing.assert_array_equal(first[3][0], first[0][2])
+        with self.assertRaises(ValueError):
+            EpisodeBuffer(0)
+
+    def test_train_dqn_stores_whole_episodes(self):
+        from train_dqn import train_dqn
+        agent1, agent2, _ = train_dqn(3, save_freq=0, n_step=3, agent_kwargs=dict(batch_size=8))
+        self.assertEqual(agent1.n_step, 3)
+        terminal = [t for t in agent2.memory if t[4]]
+        self.assertTrue(terminal)
+        self.assertTrue(all(t[2] != 0 for t in terminal))
+        agent1, _, _ = train_dqn(1, save_freq=0, transitions="step")
+        self.assertEqual(agent1.n_step, 1)
+        with self.assertRaises(ValueError):
+            train_dqn(1, save_freq=0, transitions="game")
+
 def run_tests():
     unittest.main(verbosity=2)
 
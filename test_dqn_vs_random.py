@@ -4,21 +4,21 @@ Test DQN agent against Random bot
 """
 
 import numpy as np
-import time
-import os
 from connect4 import Connect4, Player, GameResult, RandomBot
 from dqn_agent import DQNAgent, DQNBot
+from eval_cache import EvaluationCache
+from timed_bot import anytime_bot
+from pondering import PonderingBot
+from renderer import TerminalRenderer
 
-def clear_screen():
-    """Clear the terminal screen"""
-    os.system('clear' if os.name == 'posix' else 'cls')
-
-def test_dqn_vs_random(model_path="dqn_connect4.pth", num_games=1000, watch=False):
+def test_dqn_vs_random(model_path="dqn_connect4.pth", num_games=1000, watch=False, cache_size=0,
+                       fps=2.0, headless=False):
     """Test DQN agent against random bot"""
     print(f"Loading model from {model_path}...")
     agent = DQNAgent()
     agent.load(model_path)
-    dqn_bot = DQNBot(agent)
+    cache = EvaluationCache(cache_size) if cache_size > 0 else None
+    dqn_bot = DQNBot(agent, cache)
     random_bot = RandomBot()
     
     wins = 0
@@ -26,65 +26,63 @@ def test_dqn_vs_random(model_path="dqn_connect4.pth", num_games=1000, watch=Fals
     losses = 0
     
     print(f"Testing DQN agent vs Random bot for {num_games} games...")
-    if watch:
+    renderer = TerminalRenderer(fps=fps, headless=headless) if watch else None
+    # Only pause for the viewer when games are shown at a watchable pace
+    pause = watch and not headless and fps is not None
+    if pause:
         print("Watch mode enabled - you'll see the games being played!")
         print("DQN Agent: 🔴 (Red) | Random Bot: 🔵 (Blue)")
         input("Press Enter to start...")
     
     for i in range(num_games):
-        game = Connect4()
+        game = Connect4(agent.rows, agent.cols)
         
         # Randomly decide who goes first
         dqn_goes_first = np.random.random() < 0.5
         
         if watch:
-            clear_screen()
-            print(f"Game {i+1}/{num_games}")
             if dqn_goes_first:
-                print(f"DQN Agent (🔴) goes first | Random Bot (🔵) goes second")
+                order = f"DQN Agent (🔴) goes first | Random Bot (🔵) goes second"
             else:
-                print(f"Random Bot (🔵) goes first | DQN Agent (🔴) goes second")
-            print("=" * 50)
+                order = f"Random Bot (🔵) goes first | DQN Agent (🔴) goes second"
+            header = f"Game {i+1}/{num_games}\n{order}\n" + "=" * 50
+            renderer.render(game, "", header)
         
         while True:
             if game.current_player == Player.HUMAN:
                 # DQN agent's turn (always red)
                 action = dqn_bot.get_move(game)
-                if watch:
-                    print(f"🧠 🔴 DQN Agent plays column {action + 1}")
+                status = f"🧠 🔴 DQN Agent plays column {action + 1}"
             else:
                 # Random bot's turn (always blue)
                 action = random_bot.get_move(game)
-                if watch:
-                    print(f"🤖 🔵 Random Bot plays column {action + 1}")
+                status = f"🤖 🔵 Random Bot plays column {action + 1}"
             
             game.make_move(action, game.current_player)
             
             if watch:
-                game.display_board()
-                time.sleep(0.5)  # Pause to see the move
+                renderer.render(game, status, header)
             
             result = game.check_winner()
             if result != GameResult.ONGOING:
                 # Determine result - DQN agent is Player.HUMAN (red), Random bot is Player.BOT (blue)
                 if result == GameResult.PLAYER1_WIN:
                     wins += 1
-                    if watch:
-                        print(f"\n🏆 DQN Agent (🔴) wins!")
+                    status = f"🏆 DQN Agent (🔴) wins!"
                 elif result == GameResult.PLAYER2_WIN:
                     losses += 1
-                    if watch:
-                        print(f"\n💪 Random Bot (🔵) wins!")
+                    status = f"💪 Random Bot (🔵) wins!"
                 else:  # DRAW
                     draws += 1
-                    if watch:
-                        print(f"\n🤝 It's a draw!")
+                    status = f"🤝 It's a draw!"
                 
                 if watch:
+                    renderer.render(game, status, header)
+                if pause:
                     input("Press Enter to continue...")
                 break
         
-        if not watch and (i + 1) % 100 == 0:
+        if not pause and (i + 1) % 100 == 0:
             print(f"Progress: {i+1}/{num_games} games completed")
     
     win_rate = wins / num_games
@@ -97,32 +95,38 @@ def test_dqn_vs_random(model_path="dqn_connect4.pth", num_games=1000, watch=Fals
     print(f"Draws: {draws} ({draw_rate:.1%})")
     print(f"Losses: {losses} ({loss_rate:.1%})")
     print(f"Win Rate: {win_rate:.1%}")
+    if cache is not None:
+        print(f"Evaluation cache: {cache.summary()}")
     
     return win_rate
 
-def interactive_test(model_path="dqn_connect4.pth"):
+def interactive_test(model_path="dqn_connect4.pth", deadline_ms=None):
     """Interactive test - play against the agent"""
     print(f"Loading model from {model_path}...")
     agent = DQNAgent()
     agent.load(model_path)
-    dqn_bot = DQNBot(agent)
+    dqn_bot = DQNBot(agent) if deadline_ms is None else anytime_bot(agent, deadline_ms)
+    # Keep thinking while the human chooses a move
+    dqn_bot = PonderingBot(dqn_bot)
     
     print("Interactive test mode!")
     print("You will play as 🔵 (blue pieces) against the DQN agent 🔴 (red pieces)")
-    print("Enter column numbers (1-7) to make moves.")
+    print(f"Enter column numbers (1-{agent.cols}) to make moves.")
     print("Type 'quit' to exit.\n")
     
     while True:
-        game = Connect4()
+        game = Connect4(agent.rows, agent.cols)
         game.display_board()
         
         while True:
             if game.current_player == Player.HUMAN:
                 # Human's turn
+                dqn_bot.start_pondering(game)
                 try:
-                    move_input = input(f"\n🔵 Your turn (1-7): ").strip()
+                    move_input = input(f"\n🔵 Your turn (1-{game.cols}): ").strip()
                     if move_input.lower() == 'quit':
                         print("Goodbye!")
+                        dqn_bot.stop_pondering()
                         return
                     
                     move = int(move_input) - 1
@@ -132,7 +136,7 @@ def interactive_test(model_path="dqn_connect4.pth"):
                     
                     game.make_move(move, Player.HUMAN)
                 except ValueError:
-                    print("❌ Please enter a valid number (1-7).")
+                    print(f"❌ Please enter a valid number (1-{game.cols}).")
                     continue
             else:
                 # DQN agent's turn
@@ -145,12 +149,15 @@ def interactive_test(model_path="dqn_connect4.pth"):
             
             result = game.check_winner()
             if result != GameResult.ONGOING:
+                # The human's last move may have ended the game while the bot was pondering
+                dqn_bot.stop_pondering()
                 if result == GameResult.PLAYER1_WIN:
                     print(f"\n🏆 You (🔵) win! 🎉")
                 elif result == GameResult.PLAYER2_WIN:
                     print(f"\n🤖 DQN agent (🔴) wins! 💪")
                 else:
                     print(f"\n🤝 It's a draw! ⚖️")
+                print(f"⏱️  Agent latency: {dqn_bot.histogram.summary()}")
                 break
         
         play_again = input(f"\nPlay again? (y/n): ").strip().lower()
@@ -166,10 +173,14 @@ if __name__ == "__main__":
     parser.add_argument("--games", type=int, default=1000, help="Number of games to test")
     parser.add_argument("--watch", action="store_true", help="Watch games being played")
     parser.add_argument("--interactive", action="store_true", help="Play against the agent")
+    parser.add_argument("--fps", type=float, default=2.0, help="Watch mode frame rate (0 fast-forwards)")
+    parser.add_argument("--headless", action="store_true", help="Play watch-mode games without drawing them")
+    parser.add_argument("--cache-size", type=int, default=0, help="Cache this many position evaluations (0 disables)")
+    parser.add_argument("--deadline-ms", type=float, default=None, help="Agent thinking time per move in interactive mode")
     
     args = parser.parse_args()
     
     if args.interactive:
-        interactive_test(args.model)
+        interactive_test(args.model, args.deadline_ms)
     else:
-        test_dqn_vs_random(args.model, args.games, args.watch) 
\ No newline at end of file
+        test_dqn_vs_random(args.model, args.games, args.watch, args.cache_size, args.fps or None, args.headless) 
\ No newline at end of file
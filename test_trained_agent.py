@@ -6,13 +6,11 @@ Test trained DQN agents against random bot
 import os
 import glob
 import numpy as np
-import time
 from connect4 import Connect4, Player, GameResult, RandomBot
 from dqn_agent import DQNAgent, DQNBot
-
-def clear_screen():
-    """Clear the terminal screen"""
-    os.system('clear' if os.name == 'posix' else 'cls')
+from timed_bot import anytime_bot
+from pondering import PonderingBot
+from renderer import TerminalRenderer
 
 def scan_agents_directory():
     """Scan the agents directory and return available models"""
@@ -76,7 +74,7 @@ def select_agent(model_files):
             print("\n👋 Goodbye!")
             return None
 
-def test_agent_vs_random(model_path, num_games=100, watch=False):
+def test_agent_vs_random(model_path, num_games=100, watch=False, fps=2.0, headless=False):
     """Test selected agent against random bot"""
     print(f"Loading model from {model_path}...")
     agent = DQNAgent()
@@ -89,65 +87,63 @@ def test_agent_vs_random(model_path, num_games=100, watch=False):
     losses = 0
     
     print(f"Testing trained agent vs Random bot for {num_games} games...")
-    if watch:
+    renderer = TerminalRenderer(fps=fps, headless=headless) if watch else None
+    # Only pause for the viewer when games are shown at a watchable pace
+    pause = watch and not headless and fps is not None
+    if pause:
         print("Watch mode enabled - you'll see the games being played!")
         print("Trained Agent: 🔴 (Red) | Random Bot: 🔵 (Blue)")
         input("Press Enter to start...")
     
     for i in range(num_games):
-        game = Connect4()
+        game = Connect4(agent.rows, agent.cols)
         
         # Randomly decide who goes first
         agent_goes_first = np.random.random() < 0.5
         
         if watch:
-            clear_screen()
-            print(f"Game {i+1}/{num_games}")
             if agent_goes_first:
-                print(f"Trained Agent (🔴) goes first | Random Bot (🔵) goes second")
+                order = f"Trained Agent (🔴) goes first | Random Bot (🔵) goes second"
             else:
-                print(f"Random Bot (🔵) goes first | Trained Agent (🔴) goes second")
-            print("=" * 50)
+                order = f"Random Bot (🔵) goes first | Trained Agent (🔴) goes second"
+            header = f"Game {i+1}/{num_games}\n{order}\n" + "=" * 50
+            renderer.render(game, "", header)
         
         while True:
             if game.current_player == Player.HUMAN:
                 # Trained agent's turn (always red)
                 action = dqn_bot.get_move(game)
-                if watch:
-                    print(f"🧠 🔴 Trained Agent plays column {action + 1}")
+                status = f"🧠 🔴 Trained Agent plays column {action + 1}"
             else:
                 # Random bot's turn (always blue)
                 action = random_bot.get_move(game)
-                if watch:
-                    print(f"🤖 🔵 Random Bot plays column {action + 1}")
+                status = f"🤖 🔵 Random Bot plays column {action + 1}"
             
             game.make_move(action, game.current_player)
             
             if watch:
-                game.display_board()
-                time.sleep(0.5)  # Pause to see the move
+                renderer.render(game, status, header)
             
             result = game.check_winner()
             if result != GameResult.ONGOING:
                 # Determine result - Trained agent is Player.HUMAN (red), Random bot is Player.BOT (blue)
                 if result == GameResult.PLAYER1_WIN:
                     wins += 1
-                    if watch:
-                        print(f"\n🏆 Trained Agent (🔴) wins!")
+                    status = f"🏆 Trained Agent (🔴) wins!"
                 elif result == GameResult.PLAYER2_WIN:
                     losses += 1
-                    if watch:
-                        print(f"\n💪 Random Bot (🔵) wins!")
+                    status = f"💪 Random Bot (🔵) wins!"
                 else:  # DRAW
                     draws += 1
-                    if watch:
-                        print(f"\n🤝 It's a draw!")
+                    status = f"🤝 It's a draw!"
                 
                 if watch:
+                    renderer.render(game, status, header)
+                if pause:
                     input("Press Enter to continue...")
                 break
         
-        if not watch and (i + 1) % 20 == 0:
+        if not pause and (i + 1) % 20 == 0:
             print(f"Progress: {i+1}/{num_games} games completed")
     
     win_rate = wins / num_games
@@ -164,29 +160,33 @@ def test_agent_vs_random(model_path, num_games=100, watch=False):
     
     return win_rate
 
-def interactive_test(model_path):
+def interactive_test(model_path, deadline_ms=None):
     """Interactive test - play against the trained agent"""
     print(f"Loading model from {model_path}...")
     agent = DQNAgent()
     agent.load(model_path)
-    dqn_bot = DQNBot(agent)
+    dqn_bot = DQNBot(agent) if deadline_ms is None else anytime_bot(agent, deadline_ms)
+    # Keep thinking while the human chooses a move
+    dqn_bot = PonderingBot(dqn_bot)
     
     print("Interactive test mode!")
     print("You will play as 🔵 (blue pieces) against the trained agent 🔴 (red pieces)")
-    print("Enter column numbers (1-7) to make moves.")
+    print(f"Enter column numbers (1-{agent.cols}) to make moves.")
     print("Type 'quit' to exit.\n")
     
     while True:
-        game = Connect4()
+        game = Connect4(agent.rows, agent.cols)
         game.display_board()
         
         while True:
             if game.current_player == Player.HUMAN:
                 # Human's turn
+                dqn_bot.start_pondering(game)
                 try:
-                    move_input = input(f"\n🔵 Your turn (1-7): ").strip()
+                    move_input = input(f"\n🔵 Your turn (1-{game.cols}): ").strip()
                     if move_input.lower() == 'quit':
                         print("Goodbye!")
+                        dqn_bot.stop_pondering()
                         return
                     
                     move = int(move_input) - 1
@@ -196,7 +196,7 @@ def interactive_test(model_path):
                     
                     game.make_move(move, Player.HUMAN)
                 except ValueError:
-                    print("❌ Please enter a valid number (1-7).")
+                    print(f"❌ Please enter a valid number (1-{game.cols}).")
                     continue
             else:
                 # Trained agent's turn
@@ -209,12 +209,15 @@ def interactive_test(model_path):
             
             result = game.check_winner()
             if result != GameResult.ONGOING:
+                # The human's last move may have ended the game while the bot was pondering
+                dqn_bot.stop_pondering()
                 if result == GameResult.PLAYER1_WIN:
                     print(f"\n🏆 You (🔵) win! 🎉")
                 elif result == GameResult.PLAYER2_WIN:
                     print(f"\n🤖 Trained agent (🔴) wins! 💪")
                 else:
                     print(f"\n🤝 It's a draw! ⚖️")
+                print(f"⏱️  Agent latency: {dqn_bot.histogram.summary()}")
                 break
         
         play_again = input(f"\nPlay again? (y/n): ").strip().lower()
@@ -0,0 +1,108 @@
+"""
+Deadline-aware bot wrapper with per-move latency histograms
+"""
+
+import bisect
+import copy
+import inspect
+import threading
+import time
+from typing import List, Optional
+from connect4 import Connect4
+
+class LatencyHistogram:
+    """Move latencies in log-spaced millisecond buckets"""
+
+    def __init__(self, bounds_ms: Optional[List[float]] = None):
+        self.bounds_ms = bounds_ms or [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100,
+                                       250, 500, 1000, 2500, 5000, 10000]
+        self.counts = [0] * (len(self.bounds_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms: float):
+        self.counts[bisect.bisect_left(self.bounds_ms, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, p: float) -> float:
+        """Upper bound of the bucket holding the p-th percentile"""
+        if self.count == 0:
+            return 0.0
+        target = p / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.bounds_ms + [self.max_ms], self.counts):
+            seen += count
+            if seen >= target:
+                return min(bound, self.max_ms)
+        return self.max_ms
+
+    def fraction_over(self, limit_ms: float) -> float:
+        """Fraction of moves slower than ``limit_ms`` (bucket resolution)"""
+        if self.count == 0:
+            return 0.0
+        index = bisect.bisect_left(self.bounds_ms, limit_ms)
+        return sum(self.counts[index + 1:]) / self.count
+
+    def summary(self) -> str:
+        if self.count == 0:
+            return "no moves recorded"
+        return (f"moves={self.count} mean={self.total_ms / self.count:.1f}ms "
+                f"p50<={self.percentile(50):.1f}ms p99<={self.percentile(99):.1f}ms "
+                f"max={self.max_ms:.1f}ms")
+
+class TimedBot:
+    """Wraps a bot so every move is answered within a deadline
+
+    Anytime bots (those whose ``get_move`` accepts ``deadline``, such as
+    MCTSBot and SearchBot) keep thinking until the deadline minus a safety
+    margin; other bots are called as-is and only measured.
+    """
+
+    def __init__(self, bot, deadline_ms: float = 1000.0, safety_ms: float = 10.0):
+        self.bot = bot
+        self.deadline_ms = deadline_ms
+        self.safety_ms = safety_ms
+        self.histogram = LatencyHistogram()
+        self.deadline_misses = 0
+        parameters = inspect.signature(bot.get_move).parameters
+        self._anytime = 'deadline' in parameters
+        self._stoppable = 'stop' in parameters
+
+    def get_move(self, game: Connect4, deadline_ms: Optional[float] = None,
+                 stop: Optional[threading.Event] = None) -> int:
+        """Best move found before ``deadline_ms`` milliseconds from now, or before ``stop`` is set"""
+        deadline_ms = self.deadline_ms if deadline_ms is None else deadline_ms
+        start_time = time.perf_counter()
+
+        if self._anytime:
+            deadline = start_time + max(deadline_ms - self.safety_ms, 0.0) / 1000
+            if self._stoppable and stop is not None:
+                move = self.bot.get_move(game, deadline=deadline, stop=stop)
+            else:
+                move = self.bot.get_move(game, deadline=deadline)
+        else:
+            move = self.bot.get_move(game)
+
+        latency_ms = (time.perf_counter() - start_time) * 1000
+        self.histogram.record(latency_ms)
+        if latency_ms > deadline_ms:
+            self.deadline_misses += 1
+        return move
+
+    def snapshot(self):
+        """Latency metrics and the wrapped bot's state, for ``restore`` after a speculative move"""
+        inner = self.bot.snapshot() if hasattr(self.bot, 'snapshot') else None
+        return copy.deepcopy(self.histogram), self.deadline_misses, inner
+
+    def restore(self, state):
+        self.histogram, self.deadline_misses, inner = state
+        if inner is not None:
+            self.bot.restore(inner)
+
+def anytime_bot(agent, deadline_ms: float = 1000.0) -> TimedBot:
+    """DQN-guided MCTS that searches until the deadline"""
+    from mcts_bot import MCTSBot
+    return TimedBot(MCTSBot(agent, simulations=None), deadline_ms)
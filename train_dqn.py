@@ -1,27 +1,78 @@
 import os
+import time
 import numpy as np
 import matplotlib.pyplot as plt
 from dqn_agent import DQNAgent, Connect4Environment
 from connect4 import Connect4, Player, GameResult
-import random
+from episodes import EpisodeBuffer
+from opponents import DQNPolicy, GreedyPolicy, UniformPolicy, play_games
 
-def train_dqn(episodes=2000, target_update_freq=100, save_freq=100):
-    env = Connect4Environment()
-    agent1 = DQNAgent()  # DQN agent (Player 1)
-    agent2 = DQNAgent()  # DQN agent (Player 2)
+def train_dqn(episodes=2000, target_update_freq=100, save_freq=100, agent_kwargs=None, agents=None,
+              learn_schedule="episode", updates=1.0, epsilon_schedule="replay", rows=6, cols=7,
+              transitions="episode", n_step=1):
+    """Self-play training; pass ``agents`` to continue training them, ``save_freq=0`` to skip saving
+
+    ``learn_schedule`` sets how many gradient steps each agent takes:
+    "episode" - ``updates`` per episode, "step" - ``updates`` per environment
+    step (fractions accumulate), "time" - keep learning until ``updates`` of
+    the wall-clock time (0 < updates < 1) is spent in gradient steps.
+    ``epsilon_schedule`` "replay" decays epsilon on every gradient step as
+    before; "steps" decays it once per move the agent makes instead.
+    ``transitions`` "episode" buffers each game and stores it when it ends,
+    with the outcome given to both players and ``n_step`` returns (the agents'
+    n_step is set to match); "step" stores every move as it is played, as
+    before, where the loser's last move never sees the loss.
+    """
+    if learn_schedule not in ("episode", "step", "time"):
+        raise ValueError(f"unknown learn schedule {learn_schedule!r}")
+    if learn_schedule == "time" and not 0 < updates < 1:
+        raise ValueError("a time schedule needs 0 < updates < 1")
+    if transitions not in ("episode", "step"):
+        raise ValueError(f"unknown transitions mode {transitions!r}")
+    decay_on_replay = epsilon_schedule == "replay"
+    if agents is not None:
+        agent1, agent2 = agents
+        rows, cols = agent1.rows, agent1.cols
+    else:
+        kwargs1, kwargs2 = dict(agent_kwargs or {}), dict(agent_kwargs or {})
+        if kwargs1.get("replay_path"):
+            # One replay file per seat, the agents must not write the same ring buffer
+            root, ext = os.path.splitext(kwargs1["replay_path"])
+            kwargs1["replay_path"], kwargs2["replay_path"] = f"{root}_agent1{ext}", f"{root}_agent2{ext}"
+        agent1 = DQNAgent(rows=rows, cols=cols, **kwargs1)  # DQN agent (Player 1)
+        agent2 = DQNAgent(rows=rows, cols=cols, **kwargs2)  # DQN agent (Player 2)
+    env = Connect4Environment(rows=rows, cols=cols)
+    episode_buffer = EpisodeBuffer(n_step, agent1.gamma)
+    agent1.n_step = agent2.n_step = n_step if transitions == "episode" else 1
     
     scores = []
     wins_player1 = 0
     wins_player2 = 0
     draws = 0
+    gradient_steps = 0
+    pending_updates = 0.0
+    act_time = 0.0
+    learn_time = 0.0
+    
+    def learn(count):
+        nonlocal gradient_steps, learn_time
+        start_time = time.perf_counter()
+        for _ in range(count):
+            agent1.replay(decay_epsilon=decay_on_replay)
+            agent2.replay(decay_epsilon=decay_on_replay)
+        gradient_steps += count
+        learn_time += time.perf_counter() - start_time
     
     for episode in range(1, episodes + 1):
+        episode_start = time.perf_counter()
+        learn_time_before = learn_time
         state = env.reset()
         total_reward = 0
         steps = 0
-        max_steps = 42  # Maximum possible moves in Connect 4
+        max_steps = rows * cols  # Maximum possible moves in Connect 4
+        done = False
         
-        while env.board.check_winner() == GameResult.ONGOING and steps < max_steps:
+        while not done and steps < max_steps:
             current_player = env.get_current_player()
             valid_actions = env.get_valid_actions()
             
@@ -31,18 +82,36 @@ def train_dqn(episodes=2000, target_update_freq=100, save_freq=100):
             if current_player == Player.HUMAN:
                 action = agent1.act(state, valid_actions)
                 next_state, reward, done, _ = env.step(action, current_player)
-                agent1.remember(state, action, reward, next_state, done)
                 total_reward += reward
             else:
                 action = agent2.act(state, valid_actions)
                 next_state, reward, done, _ = env.step(action, current_player)
+            
+            if transitions == "episode":
+                episode_buffer.add(state, action, reward)
+            elif current_player == Player.HUMAN:
+                agent1.remember(state, action, reward, next_state, done)
+            else:
                 agent2.remember(state, action, -reward, next_state, done)  # Opposite reward for player 2
             
+            if not decay_on_replay:
+                (agent1 if current_player == Player.HUMAN else agent2).decay_epsilon()
+            
             state = next_state
             steps += 1
+            
+            if learn_schedule == "step":
+                pending_updates += updates
+                if pending_updates >= 1:
+                    learn(int(pending_updates))
+                    pending_updates -= int(pending_updates)
         
         # Count wins and draws
-        winner = env.board.check_winner()
+        winner = env.result
+        if transitions == "episode" and len(episode_buffer):
+            won = winner in (GameResult.PLAYER1_WIN, GameResult.PLAYER2_WIN)
+            for agent, seat_transitions in zip((agent1, agent2), episode_buffer.finish(state, won)):
+                agent.remember_batch(*seat_transitions)
         if winner == GameResult.PLAYER1_WIN:
             wins_player1 += 1
         elif winner == GameResult.PLAYER2_WIN:
@@ -53,8 +122,16 @@ def train_dqn(episodes=2000, target_update_freq=100, save_freq=100):
         scores.append(total_reward)
         
         # Train both agents
-        agent1.replay()
-        agent2.replay()
+        if learn_schedule == "episode":
+            pending_updates += updates
+            learn(int(pending_updates))
+            pending_updates -= int(pending_updates)
+        elif learn_schedule == "time":
+            act_time += time.perf_counter() - episode_start - (learn_time - learn_time_before)
+            # Learn until gradient steps take ``updates`` of the total time
+            ready = len(agent1.memory) >= agent1.batch_size and len(agent2.memory) >= agent2.batch_size
+            while ready and learn_time < updates / (1 - updates) * act_time:
+                learn(1)
         
         # Update target networks
         if episode % target_update_freq == 0:
@@ -62,7 +139,7 @@ def train_dqn(episodes=2000, target_update_freq=100, save_freq=100):
             agent2.update_target_network()
         
         # Save agents every 100 episodes
-        if episode % save_freq == 0:
+        if save_freq and episode % save_freq == 0:
             agent1_path = f"agents/dqn_agent1_episode_{episode}.pth"
             agent2_path = f"agents/dqn_agent2_episode_{episode}.pth"
             agent1.save(agent1_path)
@@ -71,58 +148,54 @@ def train_dqn(episodes=2000, target_update_freq=100, save_freq=100):
             print(f"Episode {episode}/{episodes}")
             print(f"Average Score (last 100): {np.mean(scores[-100:]):.2f}")
             print(f"Player 1 Wins: {wins_player1}, Player 2 Wins: {wins_player2}, Draws: {draws}")
-            print(f"Epsilon: {agent1.epsilon:.3f}")
+            print(f"Epsilon: {agent1.epsilon:.3f}, gradient steps: {gradient_steps}")
             print(f"Agents saved to {agent1_path} and {agent2_path}")
             print("-" * 50)
     
     return agent1, agent2, scores
 
-def play_against_random(agent, num_games=100):
-    env = Connect4Environment()
-    wins = 0
-    losses = 0
-    draws = 0
-    
-    for game in range(num_games):
-        state = env.reset()
-        
-        # Randomly decide if agent goes first or second
-        agent_player = random.choice([Player.HUMAN, Player.BOT])
-        
-        while env.board.check_winner() == GameResult.ONGOING:
-            current_player = env.get_current_player()
-            valid_actions = env.get_valid_actions()
-            
-            if len(valid_actions) == 0:
-                break
-            
-            if current_player == agent_player:
-                # Agent's turn
-                action = agent.act(state, valid_actions)
-                next_state, reward, done, _ = env.step(action, current_player)
-                state = next_state
-            else:
-                # Random opponent's turn
-                action = random.choice(valid_actions)
-                next_state, reward, done, _ = env.step(action, current_player)
-                state = next_state
-        
-        # Determine winner
-        winner = env.board.check_winner()
-        if winner == GameResult.PLAYER1_WIN and agent_player == Player.HUMAN:
-            wins += 1
-        elif winner == GameResult.PLAYER2_WIN and agent_player == Player.BOT:
-            wins += 1
-        elif winner == GameResult.DRAW:
-            draws += 1
-        else:
-            losses += 1
+def play_against_random(agent, num_games=100, verbose=True, seed=None):
+    """Batched games against uniform random moves, the agent moving first in half of them"""
+    rng = np.random.default_rng(seed)
+    agent_policy = DQNPolicy(agent, agent.epsilon, rng)
+    if agent.tactical:
+        agent_policy = GreedyPolicy(agent_policy, rng)
+    opponent = UniformPolicy(rng)
+    first = num_games - num_games // 2
+    outcomes = np.concatenate([
+        play_games(agent_policy, opponent, first, agent.rows, agent.cols),
+        -play_games(opponent, agent_policy, num_games - first, agent.rows, agent.cols),
+    ])
+    wins = int(np.sum(outcomes == 1))
+    losses = int(np.sum(outcomes == -1))
+    draws = int(np.sum(outcomes == 0))
     
     win_rate = wins / num_games
-    print(f"Win Rate against Random: {win_rate:.2f}")
-    print(f"Wins: {wins}, Losses: {losses}, Draws: {draws}")
+    if verbose:
+        print(f"Win Rate against Random: {win_rate:.2f}")
+        print(f"Wins: {wins}, Losses: {losses}, Draws: {draws}")
     return win_rate
 
+def episodes_to_win_rate(target=0.9, agent_kwargs=None, eval_every=100, eval_games=100,
+                         max_episodes=5000, target_update_freq=100, train_kwargs=None):
+    """Train until agent 1 beats a random player ``target`` of the time; None if it never does
+
+    ``train_kwargs`` are passed on to train_dqn, e.g. ``{"transitions": "step"}``.
+    """
+    agents = None
+    trained = 0
+    while trained < max_episodes:
+        agent1, agent2, _ = train_dqn(eval_every, target_update_freq, save_freq=0,
+                                      agent_kwargs=agent_kwargs, agents=agents, **(train_kwargs or {}))
+        agents = (agent1, agent2)
+        trained += eval_every
+        epsilon, agent1.epsilon = agent1.epsilon, 0.0
+        win_rate = play_against_random(agent1, eval_games, verbose=False)
+        agent1.epsilon = epsilon
+        if win_rate >= target:
+            return trained
+    return None
+
 def plot_training_progress(scores):
     plt.figure(figsize=(12, 4))
     
@@ -149,6 +222,7 @@ if __name__ == "__main__":
     print("Starting DQN training for Connect 4...")
     print("This will train two DQN agents to play against each other.")
     print("Agents will be saved every 100 episodes in the 'agents' directory.")
+    print("Run 'python eval_daemon.py' alongside to log win rates as checkpoints appear.")
     print("-" * 60)
     
     # Train the agents